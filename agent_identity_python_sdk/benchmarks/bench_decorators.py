@@ -0,0 +1,361 @@
+"""
+Micro-benchmarks of the per-call overhead of the requires_* decorators.
+
+The IdentityClient is replaced by a stub whose calls to Agent Identity answer immediately, so the
+results measure the SDK itself: context lookup, cache access, single-flight deduplication, the STS
+credential cache and credential client pool of the IdentityClient and, for synchronous functions,
+the hand-off to the background event loop.
+
+Every decorator is measured for asynchronous and synchronous functions, on the cache hit path and
+on the cache miss path (caches are cleared before each call, outside the measured time). Synchronous
+functions are called from 1, 8 and 64 threads, asynchronous functions from 1, 100 and 1000
+concurrent tasks. For each scenario the throughput and the median and 99th percentile latency are
+reported. Single-worker scenarios also report the peak memory allocated during a call and the
+memory blocks left allocated after it, which reveal leaks.
+
+Usage:
+    python benchmarks/bench_decorators.py
+    python benchmarks/bench_decorators.py --decorator api_key --mode sync --path hit
+    python benchmarks/bench_decorators.py --json results.json
+    python benchmarks/bench_decorators.py --compare results.json --max-regression 0.25
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+from agent_identity_python_sdk.core import decorators
+from agent_identity_python_sdk.core.decorators import (
+    requires_access_token,
+    requires_api_key,
+    requires_sts_token,
+    requires_workload_access_token
+)
+from agent_identity_python_sdk.core.identity import DEFAULT_CREDENTIAL_CLIENT_POOL_SIZE, IdentityClient
+from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.utils import cache
+from agent_identity_python_sdk.utils.event_loop import shutdown
+
+DECORATORS = ["access_token", "api_key", "sts_token", "workload_access_token"]
+MODES = ["async", "sync"]
+PATHS = ["hit", "miss"]
+THREADS = [1, 8, 64]
+TASKS = [1, 100, 1000]
+
+# Calls measured per scenario, and calls made before measuring
+DEFAULT_CALLS = 5000
+WARMUP_CALLS = 200
+
+# Calls traced to measure allocations, tracing slows calls down so they are not timed
+ALLOCATION_CALLS = 200
+
+
+def _jwt(claims: Dict[str, Any]) -> str:
+    def encode(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+_WORKLOAD_ACCESS_TOKEN = _jwt({"exp": int(time.time()) + 86400})
+_STS_CREDENTIAL = STSCredential(
+    access_key_id="bench-access-key-id",
+    access_key_secret="bench-access-key-secret",
+    security_token="bench-security-token",
+    expiration="2099-12-31T23:59:59Z"
+)
+
+
+class _StubIdentityClient(IdentityClient):
+    """IdentityClient whose calls to Agent Identity answer immediately, without network access.
+
+    get_sts_credential_client is the real one: it reads the STS credential cache, assumes the role
+    through the stub on a miss, and returns a credential client built from the credential.
+    """
+
+    def __init__(self):
+        # Skip the construction of the API clients, none of them is called
+        self.logger = logging.getLogger("agentidentity.identity_client")
+        self._credential_client_pool = cache.TTLCache(max_size=DEFAULT_CREDENTIAL_CLIENT_POOL_SIZE,
+                                                      name="credential_client")
+
+    def create_workload_identity(self, *args: Any, **kwargs: Any) -> str:
+        return "bench-workload"
+
+    async def get_workload_access_token_async(self, *args: Any, **kwargs: Any) -> str:
+        return _WORKLOAD_ACCESS_TOKEN
+
+    async def get_token(self, **kwargs: Any) -> str:
+        return "bench-access-token"
+
+    async def get_api_key(self, **kwargs: Any) -> str:
+        return "bench-api-key"
+
+    async def assume_role_for_workload_identity(self, **kwargs: Any) -> STSCredential:
+        return _STS_CREDENTIAL
+
+
+def _decorate(decorator: str, mode: str) -> Callable:
+    if decorator == "access_token":
+        wrap = requires_access_token(credential_provider_name="bench-provider", scopes=["read"])
+    elif decorator == "api_key":
+        wrap = requires_api_key(credential_provider_name="bench-provider")
+    elif decorator == "sts_token":
+        wrap = requires_sts_token()
+    else:
+        wrap = requires_workload_access_token()
+
+    if mode == "async":
+        async def tool(**kwargs: Any) -> Any:
+            return kwargs
+    else:
+        def tool(**kwargs: Any) -> Any:
+            return kwargs
+    return wrap(tool)
+
+
+def _clear_caches():
+    cache._sts_cache.clear()
+    cache._workload_access_token_cache.clear()
+    cache._api_key_cache.clear()
+    cache._oauth2_token_cache.clear()
+
+
+def _percentile(sorted_latencies: List[int], percentile: float) -> float:
+    index = min(int(len(sorted_latencies) * percentile), len(sorted_latencies) - 1)
+    return sorted_latencies[index] / 1000
+
+
+def _run_sync(func: Callable, miss: bool, workers: int, calls: int) -> List[int]:
+    latencies: List[List[int]] = [[] for _ in range(workers)]
+    barrier = threading.Barrier(workers)
+
+    def worker(index: int):
+        samples = latencies[index]
+        barrier.wait()
+        for _ in range(calls // workers):
+            if miss:
+                _clear_caches()
+            start = time.perf_counter_ns()
+            func()
+            samples.append(time.perf_counter_ns() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [sample for samples in latencies for sample in samples]
+
+
+def _run_async(func: Callable, miss: bool, workers: int, calls: int) -> List[int]:
+    latencies: List[int] = []
+
+    async def worker():
+        for _ in range(calls // workers):
+            if miss:
+                _clear_caches()
+            start = time.perf_counter_ns()
+            await func()
+            latencies.append(time.perf_counter_ns() - start)
+
+    async def main():
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    asyncio.run(main())
+    return latencies
+
+
+def _measure_allocations(func: Callable, mode: str, miss: bool) -> Dict[str, float]:
+    peaks: List[int] = []
+
+    def before_call() -> int:
+        if miss:
+            _clear_caches()
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        return current
+
+    def after_call(current: int):
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - current)
+
+    async def call_async():
+        for _ in range(ALLOCATION_CALLS):
+            current = before_call()
+            await func()
+            after_call(current)
+
+    def call_sync():
+        for _ in range(ALLOCATION_CALLS):
+            current = before_call()
+            func()
+            after_call(current)
+
+    async def plain_async():
+        for _ in range(ALLOCATION_CALLS):
+            if miss:
+                _clear_caches()
+            await func()
+
+    def plain_sync():
+        for _ in range(ALLOCATION_CALLS):
+            if miss:
+                _clear_caches()
+            func()
+
+    # Count blocks without tracing, whose bookkeeping allocates too
+    plain = (lambda: asyncio.run(plain_async())) if mode == "async" else plain_sync
+    plain()  # Fill lazily created structures before measuring
+    blocks_before = sys.getallocatedblocks()
+    plain()
+    blocks_after = sys.getallocatedblocks()
+
+    run = (lambda: asyncio.run(call_async())) if mode == "async" else call_sync
+    tracemalloc.start()
+    try:
+        run()
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_bytes_per_call": sum(peaks) / len(peaks),
+        "retained_blocks_per_call": (blocks_after - blocks_before) / ALLOCATION_CALLS,
+    }
+
+
+def run_scenario(decorator: str, mode: str, path: str, workers: int, calls: int) -> Dict[str, Any]:
+    """
+    Measure one decorator, mode, cache path and concurrency
+
+    Args:
+        decorator: One of DECORATORS
+        mode: "async" or "sync"
+        path: "hit" or "miss"
+        workers: Number of threads (sync) or concurrent tasks (async)
+        calls: Number of calls measured
+
+    Returns:
+        The scenario and its results
+    """
+    func = _decorate(decorator, mode)
+    miss = path == "miss"
+    run = _run_async if mode == "async" else _run_sync
+    calls = max(calls, workers)
+
+    _clear_caches()
+    run(func, miss, min(workers, WARMUP_CALLS), WARMUP_CALLS)
+    start = time.perf_counter()
+    latencies = run(func, miss, workers, calls)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+
+    result = {
+        "decorator": decorator,
+        "mode": mode,
+        "path": path,
+        "concurrency": workers,
+        "calls": len(latencies),
+        "ops_per_sec": len(latencies) / elapsed,
+        "p50_us": _percentile(latencies, 0.5),
+        "p99_us": _percentile(latencies, 0.99),
+    }
+    if workers == 1:
+        result.update(_measure_allocations(func, mode, miss))
+    return result
+
+
+def _scenario_key(result: Dict[str, Any]) -> str:
+    return f"{result['decorator']}/{result['mode']}/{result['path']}/{result['concurrency']}"
+
+
+def _print_table(results: List[Dict[str, Any]]):
+    header = (f"{'decorator':<22} {'mode':<5} {'path':<4} {'conc':>5} {'ops/s':>10} {'p50 us':>9} "
+              f"{'p99 us':>9} {'peak B':>9} {'blocks/call':>11}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        peak = f"{r['peak_bytes_per_call']:.0f}" if "peak_bytes_per_call" in r else "-"
+        blocks = f"{r['retained_blocks_per_call']:.2f}" if "retained_blocks_per_call" in r else "-"
+        print(f"{r['decorator']:<22} {r['mode']:<5} {r['path']:<4} {r['concurrency']:>5} {r['ops_per_sec']:>10.0f} "
+              f"{r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {peak:>9} {blocks:>11}")
+
+
+def _compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {_scenario_key(r): r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        previous = baseline.get(_scenario_key(r))
+        if previous is None:
+            continue
+        change = r["ops_per_sec"] / previous["ops_per_sec"] - 1
+        if change < -max_regression:
+            regressions.append(f"{_scenario_key(r)}: {previous['ops_per_sec']:.0f} -> {r['ops_per_sec']:.0f} ops/s "
+                               f"({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the per-call overhead of the requires_* decorators.")
+    parser.add_argument("--decorator", choices=DECORATORS, action="append",
+                        help="Decorator to measure, may be repeated, all by default")
+    parser.add_argument("--mode", choices=MODES, action="append", help="Function kind to measure, both by default")
+    parser.add_argument("--path", choices=PATHS, action="append", help="Cache path to measure, both by default")
+    parser.add_argument("--calls", type=int, default=DEFAULT_CALLS, help="Calls measured per scenario")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Compare the throughput with results written by --json")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Largest accepted throughput drop against --compare, as a fraction (default 0.25)")
+    args = parser.parse_args(argv)
+
+    # Keep per-call log lines out of the measurements
+    logging.getLogger("agentidentity").setLevel(logging.WARNING)
+    for name in ("agentidentity.core.decorators", "agentidentity.utils.config"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    os.environ["AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME"] = "bench-workload"
+    # A workload identity created by the decorators is remembered in a local config file of the working directory
+    workdir = tempfile.mkdtemp(prefix="agentidentity-bench-")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+
+    stub = _StubIdentityClient()
+    get_identity_client = decorators.get_identity_client
+    decorators.get_identity_client = lambda *args, **kwargs: stub
+    results = []
+    try:
+        for decorator in args.decorator or DECORATORS:
+            for mode in args.mode or MODES:
+                for path in args.path or PATHS:
+                    for workers in (TASKS if mode == "async" else THREADS):
+                        results.append(run_scenario(decorator, mode, path, workers, args.calls))
+    finally:
+        decorators.get_identity_client = get_identity_client
+        shutdown()
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = _compare(results, args.compare, args.max_regression)
+        if regressions:
+            print("\nThroughput regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
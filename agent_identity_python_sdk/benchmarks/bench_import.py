@@ -0,0 +1,127 @@
+"""
+Benchmark of the time taken to import the SDK, which adds to the cold start of serverless runtimes.
+
+Each scenario runs in a fresh interpreter, repeated to smooth out disk cache and scheduling noise,
+and reports the median, minimum and maximum time along with the number of modules it imported:
+
+- package: import agent_identity_python_sdk
+- decorators: import a decorator from the package and decorate a function
+- client: import IdentityClient and create one, which imports the data API client
+- sdk: import the Alibaba Cloud SDK modules the package used to import eagerly, for reference
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --scenario package --repeat 20
+    python benchmarks/bench_import.py --json results.json
+    python benchmarks/bench_import.py --compare results.json --max-regression 0.25
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+SCENARIOS = {
+    "package": "import agent_identity_python_sdk",
+    "decorators": (
+        "from agent_identity_python_sdk import requires_api_key\n"
+        "requires_api_key(credential_provider_name='bench-provider')(lambda api_key: api_key)"
+    ),
+    "client": (
+        "from agent_identity_python_sdk.core.identity import IdentityClient\n"
+        "IdentityClient('cn-beijing')"
+    ),
+    "sdk": (
+        "import alibabacloud_agentidentity20250901.client\n"
+        "import alibabacloud_agentidentitydata20251127.client\n"
+        "import alibabacloud_credentials.client\n"
+        "import pydantic"
+    ),
+}
+
+DEFAULT_REPEAT = 10
+
+# Run in the child interpreter: time the scenario and count the modules it imported
+_CHILD = """
+import sys, time
+before = len(sys.modules)
+start = time.perf_counter()
+exec(compile({code!r}, "<scenario>", "exec"))
+elapsed = time.perf_counter() - start
+print(elapsed, len(sys.modules) - before)
+"""
+
+
+def run_scenario(name: str, repeat: int) -> Dict[str, Any]:
+    # The client scenario must not reach a credential endpoint or the STS service
+    env = dict(os.environ, AGENT_IDENTITY_USE_STS="false")
+    times = []
+    modules = 0
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", _CHILD.format(code=SCENARIOS[name])], env=env,
+                                check=True, capture_output=True, text=True).stdout
+        elapsed, modules = output.split()[-2:]
+        times.append(float(elapsed) * 1000)
+    return {
+        "scenario": name,
+        "median_ms": statistics.median(times),
+        "min_ms": min(times),
+        "max_ms": max(times),
+        "modules": int(modules),
+    }
+
+
+def _print_table(results: List[Dict[str, Any]]):
+    header = f"{'scenario':<12} {'median ms':>10} {'min ms':>8} {'max ms':>8} {'modules':>8}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<12} {r['median_ms']:>10.1f} {r['min_ms']:>8.1f} {r['max_ms']:>8.1f} {r['modules']:>8}")
+
+
+def _compare(results: List[Dict[str, Any]], baseline_path: str, max_regression: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["scenario"]: r for r in json.load(f)}
+    regressions = []
+    for r in results:
+        previous = baseline.get(r["scenario"])
+        if previous is None:
+            continue
+        change = r["median_ms"] / previous["median_ms"] - 1
+        if change > max_regression:
+            regressions.append(f"{r['scenario']}: {previous['median_ms']:.1f} -> {r['median_ms']:.1f} ms ({change:+.0%})")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure the time taken to import the SDK.")
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append",
+                        help="Scenario to measure, may be repeated, all by default")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Fresh interpreters per scenario")
+    parser.add_argument("--json", metavar="FILE", help="Write the results to FILE as JSON")
+    parser.add_argument("--compare", metavar="FILE", help="Compare the import times with results written by --json")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Largest accepted import time increase against --compare, as a fraction (default 0.25)")
+    args = parser.parse_args(argv)
+
+    results = [run_scenario(name, args.repeat) for name in args.scenario or SCENARIOS]
+
+    _print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        regressions = _compare(results, args.compare, args.max_regression)
+        if regressions:
+            print("\nImport time regressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
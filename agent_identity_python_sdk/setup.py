@@ -30,6 +30,12 @@ setup(
             "pytest-asyncio>=0.24.0",
             "pytest-cov>=6.0.0",
         ],
+        "redis": [
+            "redis>=5.0.0",
+        ],
+        "opentelemetry": [
+            "opentelemetry-api>=1.20.0",
+        ],
     },
     classifiers=[
         "Development Status :: 4 - Beta",
@@ -2,16 +2,44 @@
 
 __version__ = "0.1.5"
 
+import importlib
+from typing import Any
+
 from .context import AgentIdentityContext
-from .core import requires_access_token, requires_sts_token, requires_api_key, requires_workload_access_token
-from .core import IdentityClient
+
+# Names exported from submodules that import the Alibaba Cloud SDK, imported on first access
+_LAZY_EXPORTS = {
+    "IdentityClient": ".core.identity",
+    "get_identity_client": ".core.identity",
+    "requires_access_token": ".core.decorators",
+    "requires_sts_token": ".core.decorators",
+    "requires_api_key": ".core.decorators",
+    "requires_workload_access_token": ".core.decorators",
+    "invalidate_api_key": ".core.decorators",
+    "invalidate_access_token": ".core.decorators",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
 
 
 __all__ = [
     "IdentityClient",
+    "get_identity_client",
     "requires_access_token",
     "requires_sts_token",
     "requires_api_key",
     "requires_workload_access_token",
+    "invalidate_api_key",
+    "invalidate_access_token",
     "AgentIdentityContext"
 ]
@@ -1,6 +1,33 @@
 """Agent identity core package."""
 
-from .decorators import requires_access_token, requires_api_key, requires_sts_token, requires_workload_access_token
-from .identity import IdentityClient
+import importlib
+from typing import Any
 
-__all__ = ["requires_access_token", "requires_api_key", "requires_sts_token", "requires_workload_access_token", "IdentityClient"]
+# Submodule of every exported name, imported on first access
+_LAZY_EXPORTS = {
+    "requires_access_token": ".decorators",
+    "requires_api_key": ".decorators",
+    "requires_sts_token": ".decorators",
+    "requires_workload_access_token": ".decorators",
+    "invalidate_api_key": ".decorators",
+    "invalidate_access_token": ".decorators",
+    "IdentityClient": ".identity",
+    "get_identity_client": ".identity",
+    "prewarm_credentials": ".prewarm",
+    "prewarm_credentials_async": ".prewarm",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
+
+__all__ = ["requires_access_token", "requires_api_key", "requires_sts_token", "requires_workload_access_token", "invalidate_api_key", "invalidate_access_token", "IdentityClient", "get_identity_client", "prewarm_credentials", "prewarm_credentials_async"]
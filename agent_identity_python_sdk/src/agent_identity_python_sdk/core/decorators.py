@@ -1,23 +1,47 @@
 """Authentication decorators for agent identity service."""
 
 import asyncio
-import contextvars
+import hashlib
+import json
 import logging
 import os
 import uuid
 from functools import wraps
-from typing import Any, Callable, Dict, List, Literal, Optional
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
 
 from ..context import AgentIdentityContext
-from ..core.identity import IdentityClient
+from ..core.identity import IdentityClient, get_identity_client
 from ..model.stscredential import STSCredential
+from ..utils.cache import (
+    call_cache,
+    call_cache_compute,
+    get_cached_api_key,
+    get_cached_oauth2_token,
+    get_cached_workload_access_token,
+    get_or_compute_api_key,
+    get_or_compute_workload_access_token,
+    invalidate_cached_api_key,
+    invalidate_cached_oauth2_token,
+    store_api_key_in_cache,
+    store_oauth2_token_in_cache
+)
 from ..utils.config import read_local_config, write_local_config
+from ..utils.event_loop import run_sync
+from ..utils.singleflight import SingleFlight
+from ..utils.token import get_jwt_expiration
+from ..utils.tracing import Span, start_span
+
+if TYPE_CHECKING:
+    from alibabacloud_credentials.client import Client as CredentialClient
 
 logger = logging.getLogger("agentidentity.core.decorators")
 logger.setLevel("INFO")
 if not logger.handlers:
     logger.addHandler(logging.StreamHandler())
 
+# Deduplicates concurrent credential fetches for the same key across coroutines and threads
+_credential_flight = SingleFlight()
+
 def get_region() -> str:
     region_env = os.getenv("AGENT_IDENTITY_REGION_ID", None)
     if region_env is not None:
@@ -46,7 +70,8 @@ def requires_access_token(
 
         scopes: OAuth2 scopes list
 
-        on_auth_url: Callback function for handling authorization URLs when they are obtained
+        on_auth_url: Callback function for handling authorization URLs when they are obtained. A synchronous
+                     callback of a synchronous decorated function runs on a worker thread
 
         auth_flow: Authentication flow type ("USER_FEDERATION")
 
@@ -65,30 +90,12 @@ def requires_access_token(
     """
 
     def decorator(func: Callable) -> Callable:
-        client = IdentityClient(get_region())
-
-        async def _get_token() -> str:
-            user_id = AgentIdentityContext.get_user_id()
-            id_token = AgentIdentityContext.get_user_token()
-            state = AgentIdentityContext.get_custom_state()
-
-            workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
-            credential_client = await client.get_sts_credential_client(workload_token=workload_access_token,
-                                                                       user_id=user_id, user_token=id_token)
-
-            return await client.get_token(
-                credential_provider_name=credential_provider_name,
-                workload_identity_token=workload_access_token,
-                scopes=scopes,
-                on_auth_url=on_auth_url,
-                auth_flow=auth_flow,
-                callback_url=callback_url,
-                force_authentication=force_authentication,
-                custom_state=state,
-                custom_parameters=custom_parameters,
-                credential=credential_client,
-                poll_for_token=poll_for_token
-            )
+        async def _get_token(check_cache: bool = True) -> str:
+            return await _resolve_access_token(credential_provider_name, scopes=scopes, on_auth_url=on_auth_url,
+                                               auth_flow=auth_flow, callback_url=callback_url,
+                                               force_authentication=force_authentication,
+                                               custom_parameters=custom_parameters, poll_for_token=poll_for_token,
+                                               check_cache=check_cache)
 
         @wraps(func)
         async def async_wrapper(*args: Any, **kwargs_func: Any) -> Any:
@@ -97,15 +104,11 @@ def requires_access_token(
 
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs_func: Any) -> Any:
-            if _has_running_loop():
-                ctx = contextvars.copy_context()
-                import concurrent.futures
-
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(ctx.run, asyncio.run, _get_token())
-                    token = future.result()
-            else:
-                token = asyncio.run(_get_token())
+            token = None
+            if not force_authentication:
+                token = _get_cached_access_token(credential_provider_name, scopes, custom_parameters)
+            if not token:
+                token = run_sync(_get_token(check_cache=False))
 
             kwargs_func[inject_param_name] = token
             return func(*args, **kwargs_func)
@@ -131,19 +134,8 @@ def requires_api_key(*, credential_provider_name: str, inject_param_name: str =
     """
 
     def decorator(func: Callable) -> Callable:
-        client = IdentityClient(get_region())
-
-        async def _get_api_key():
-            user_id = AgentIdentityContext.get_user_id()
-            id_token = AgentIdentityContext.get_user_token()
-
-            workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
-            credential_client = await client.get_sts_credential_client(workload_token=workload_access_token, user_id=user_id, user_token=id_token)
-            return await client.get_api_key(
-                credential_provider_name=credential_provider_name,
-                agent_identity_token=workload_access_token,
-                credential=credential_client
-            )
+        async def _get_api_key(check_cache: bool = True) -> str:
+            return await _resolve_api_key(credential_provider_name, check_cache=check_cache)
 
         @wraps(func)
         async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -153,15 +145,7 @@ def requires_api_key(*, credential_provider_name: str, inject_param_name: str =
 
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-            if _has_running_loop():
-                ctx = contextvars.copy_context()
-                import concurrent.futures
-
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(ctx.run, asyncio.run, _get_api_key())
-                    api_key = future.result()
-            else:
-                api_key = asyncio.run(_get_api_key())
+            api_key = _get_cached_api_key(credential_provider_name) or run_sync(_get_api_key(check_cache=False))
 
             kwargs[inject_param_name] = api_key
             return func(*args, **kwargs)
@@ -194,17 +178,8 @@ def requires_sts_token(*, inject_param_name: str = "sts_credential",
     """
 
     def decorator(func: Callable) -> Callable:
-        client = IdentityClient(get_region())
-
         async def _get_sts_token() -> STSCredential:
-            user_id = AgentIdentityContext.get_user_id()
-            id_token = AgentIdentityContext.get_user_token()
-
-            workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
-            return await client.assume_role_for_workload_identity(workload_token=workload_access_token,
-                                                                  role_session_name=f'AgentIdentitySessionRole-{uuid.uuid4()}',
-                                                                  duration_seconds=session_duration,
-                                                                  policy=policy)
+            return await _resolve_sts_token(session_duration, policy)
 
         @wraps(func)
         async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -214,15 +189,7 @@ def requires_sts_token(*, inject_param_name: str = "sts_credential",
 
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-            if _has_running_loop():
-                ctx = contextvars.copy_context()
-                import concurrent.futures
-
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(ctx.run, asyncio.run, _get_sts_token())
-                    sts_credential = future.result()
-            else:
-                sts_credential = asyncio.run(_get_sts_token())
+            sts_credential = run_sync(_get_sts_token())
 
             kwargs[inject_param_name] = sts_credential
             return func(*args, **kwargs)
@@ -245,13 +212,8 @@ def requires_workload_access_token(*, inject_param_name: str = "workload_access_
     """
 
     def decorator(func: Callable) -> Callable:
-        client = IdentityClient(get_region())
-
-        async def _get_workload_token() -> str:
-            user_id = AgentIdentityContext.get_user_id()
-            id_token = AgentIdentityContext.get_user_token()
-            
-            return await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
+        async def _get_workload_token(check_cache: bool = True) -> str:
+            return await _resolve_workload_access_token(check_cache=check_cache)
 
         @wraps(func)
         async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
@@ -261,15 +223,8 @@ def requires_workload_access_token(*, inject_param_name: str = "workload_access_
 
         @wraps(func)
         def sync_wrapper(*args: Any, **kwargs: Any) -> Any:
-            if _has_running_loop():
-                ctx = contextvars.copy_context()
-                import concurrent.futures
-
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    future = executor.submit(ctx.run, asyncio.run, _get_workload_token())
-                    workload_access_token = future.result()
-            else:
-                workload_access_token = asyncio.run(_get_workload_token())
+            workload_access_token = (_get_cached_workload_access_token()
+                                     or run_sync(_get_workload_token(check_cache=False)))
 
             kwargs[inject_param_name] = workload_access_token
             return func(*args, **kwargs)
@@ -281,33 +236,286 @@ def requires_workload_access_token(*, inject_param_name: str = "workload_access_
 
     return decorator
 
-async def _get_workload_access_token_local(client: IdentityClient, user_id: Optional[str] = None, id_token: Optional[str] = None) -> str:
+async def _resolve_access_token(credential_provider_name: str, *, scopes: Optional[List[str]] = None,
+                                on_auth_url: Optional[Callable[[str], Any]] = None,
+                                auth_flow: Literal["USER_FEDERATION"] = "USER_FEDERATION",
+                                callback_url: Optional[str] = None, force_authentication: bool = False,
+                                custom_parameters: Optional[Dict[str, str]] = None,
+                                poll_for_token: bool = True, check_cache: bool = True) -> str:
+    """Get the OAuth2 access token of the current user, from the cache or else from Agent Identity.
+
+    Synchronous callers that already missed the cache pass check_cache=False.
+    """
+    with start_span("agentidentity.requires_access_token",
+                    {"agentidentity.credential_provider_name": credential_provider_name,
+                     "agentidentity.force_authentication": force_authentication}) as span:
+        client = get_identity_client(get_region())
+        user_id, id_token = _get_user_context()
+        state = AgentIdentityContext.get_custom_state()
+
+        # Forced authentication must always go through the authorization flow
+        cache_key = None
+        if not force_authentication:
+            cache_key = _get_access_token_cache_key(credential_provider_name, scopes, custom_parameters, user_id, id_token)
+            if cache_key and check_cache:
+                cached_access_token = await call_cache(get_cached_oauth2_token, cache_key)
+                span.set_attribute("agentidentity.cache_hit", cached_access_token is not None)
+                if cached_access_token:
+                    return cached_access_token
+
+        workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
+        credential_client = await client.get_sts_credential_client(workload_token=workload_access_token,
+                                                                   user_id=user_id, user_token=id_token)
+
+        # Callers that do not poll, or that handle authorization URLs differently, must not share a fetch:
+        # a caller waiting for the user to authorize would otherwise get the error of one that does not poll
+        flight_key = _get_credential_key("oauth2", credential_provider_name, sorted(scopes or []),
+                                         workload_access_token, auth_flow, callback_url, force_authentication,
+                                         state, custom_parameters, poll_for_token,
+                                         id(on_auth_url) if on_auth_url is not None else None)
+        access_token = await _credential_flight.do(flight_key, lambda: client.get_token(
+            credential_provider_name=credential_provider_name,
+            workload_identity_token=workload_access_token,
+            scopes=scopes,
+            on_auth_url=on_auth_url,
+            auth_flow=auth_flow,
+            callback_url=callback_url,
+            force_authentication=force_authentication,
+            custom_state=state,
+            custom_parameters=custom_parameters,
+            credential=credential_client,
+            poll_for_token=poll_for_token
+        ))
+
+        if not force_authentication:
+            # A workload identity may have been created by this call, so resolve the key again
+            cache_key = cache_key or _get_access_token_cache_key(credential_provider_name, scopes,
+                                                                 custom_parameters, user_id, id_token)
+            if cache_key:
+                await call_cache(store_oauth2_token_in_cache, cache_key, access_token, get_jwt_expiration(access_token))
+        return access_token
+
+async def _resolve_api_key(credential_provider_name: str, check_cache: bool = True) -> str:
+    """Get the API key of the current workload identity, from the cache or else from Agent Identity.
+
+    Synchronous callers that already missed the cache pass check_cache=False.
+    """
+    with start_span("agentidentity.requires_api_key",
+                    {"agentidentity.credential_provider_name": credential_provider_name}) as span:
+        client = get_identity_client(get_region())
+        cache_key = _get_api_key_cache_key(credential_provider_name)
+        if cache_key and check_cache:
+            cached_api_key = await call_cache(get_cached_api_key, cache_key)
+            span.set_attribute("agentidentity.cache_hit", cached_api_key is not None)
+            if cached_api_key:
+                return cached_api_key
+
+        user_id, id_token = _get_user_context()
+
+        workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
+        credential_client = await client.get_sts_credential_client(workload_token=workload_access_token, user_id=user_id, user_token=id_token)
+        flight_key = _get_credential_key("apikey", credential_provider_name, workload_access_token)
+
+        def _fetch() -> Awaitable[str]:
+            return client.get_api_key(
+                credential_provider_name=credential_provider_name,
+                agent_identity_token=workload_access_token,
+                credential=credential_client
+            )
+
+        if cache_key:
+            return await _credential_flight.do(flight_key,
+                                               lambda: call_cache_compute(get_or_compute_api_key, cache_key, _fetch))
+
+        api_key = await _credential_flight.do(flight_key, _fetch)
+        # A workload identity may have been created by this call, so resolve the key again
+        cache_key = _get_api_key_cache_key(credential_provider_name)
+        if cache_key:
+            await call_cache(store_api_key_in_cache, cache_key, api_key)
+        return api_key
+
+async def _resolve_sts_token(session_duration: Optional[int], policy: Optional[str]) -> STSCredential:
+    """Assume the role of the current workload identity for the current user."""
+    with start_span("agentidentity.requires_sts_token"):
+        client = get_identity_client(get_region())
+        user_id, id_token = _get_user_context()
+
+        workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
+        flight_key = _get_credential_key("sts", workload_access_token, session_duration, policy)
+        return await _credential_flight.do(flight_key, lambda: client.assume_role_for_workload_identity(
+            workload_token=workload_access_token,
+            role_session_name=f'AgentIdentitySessionRole-{uuid.uuid4()}',
+            duration_seconds=session_duration,
+            policy=policy
+        ))
+
+async def _resolve_sts_credential_client() -> "CredentialClient":
+    """Get the client of the STS credential used to call the data API for the current user."""
+    client = get_identity_client(get_region())
+    user_id, id_token = _get_user_context()
+    workload_access_token = await _get_workload_access_token(client, user_id=user_id, id_token=id_token)
+    return await client.get_sts_credential_client(workload_token=workload_access_token, user_id=user_id, user_token=id_token)
+
+async def _resolve_workload_access_token(check_cache: bool = True) -> str:
+    """Get the workload access token of the current user, from the context, the cache or else from Agent Identity.
+
+    Synchronous callers that already missed the cache pass check_cache=False.
+    """
+    with start_span("agentidentity.requires_workload_access_token"):
+        client = get_identity_client(get_region())
+        user_id, id_token = _get_user_context()
+        return await _get_workload_access_token(client, user_id=user_id, id_token=id_token, check_cache=check_cache)
+
+def _get_cached_access_token(credential_provider_name: str, scopes: Optional[List[str]],
+                             custom_parameters: Optional[Dict[str, str]]) -> Optional[str]:
+    """Get the cached OAuth2 access token of the current user, so synchronous callers skip the event loop on a hit."""
+    cache_key = _get_access_token_cache_key(credential_provider_name, scopes, custom_parameters,
+                                            AgentIdentityContext.get_user_id(), AgentIdentityContext.get_user_token())
+    return get_cached_oauth2_token(cache_key) if cache_key else None
+
+def _get_cached_api_key(credential_provider_name: str) -> Optional[str]:
+    """Get the cached API key of the current workload identity, so synchronous callers skip the event loop on a hit."""
+    cache_key = _get_api_key_cache_key(credential_provider_name)
+    return get_cached_api_key(cache_key) if cache_key else None
+
+def _get_cached_workload_access_token() -> Optional[str]:
+    """Get the workload access token of the current user from the context or the cache, so synchronous callers skip the event loop on a hit."""
+    token = AgentIdentityContext.get_workload_access_token()
+    if token is not None:
+        return token
+    workload_identity_name = _get_configured_workload_identity_name()
+    if not workload_identity_name:
+        return None
+    cache_key = _get_workload_token_cache_key(workload_identity_name, AgentIdentityContext.get_user_id(),
+                                              AgentIdentityContext.get_user_token())
+    return get_cached_workload_access_token(cache_key)
+
+def invalidate_api_key(credential_provider_name: str):
+    """Remove the cached API key of a credential provider for the current workload identity.
+
+    Call this when the downstream service rejects an API key injected by requires_api_key, for example
+    with HTTP 401, so that the next call fetches it from Agent Identity again.
+
+    Args:
+        credential_provider_name: The credential provider name
+    """
+    cache_key = _get_api_key_cache_key(credential_provider_name)
+    if cache_key:
+        invalidate_cached_api_key(cache_key)
+
+def invalidate_access_token(credential_provider_name: str, scopes: Optional[List[str]] = None,
+                            custom_parameters: Optional[Dict[str, str]] = None):
+    """Remove the cached OAuth2 access token of a credential provider for the current workload identity and user.
+
+    Call this when the resource server rejects an access token injected by requires_access_token, for example
+    with HTTP 401, so that the next call fetches it from Agent Identity again.
+
+    Args:
+        credential_provider_name: The OAuth2 credential provider name
+
+        scopes: OAuth2 scopes list, as passed to requires_access_token
+
+        custom_parameters: Custom parameters, as passed to requires_access_token
+    """
+    cache_key = _get_access_token_cache_key(credential_provider_name, scopes, custom_parameters,
+                                            AgentIdentityContext.get_user_id(), AgentIdentityContext.get_user_token())
+    if cache_key:
+        invalidate_cached_oauth2_token(cache_key)
+
+def _get_api_key_cache_key(credential_provider_name: str) -> Optional[str]:
+    """Generate an API key cache key from the provider name and the current workload identity, if it is known."""
+    workload_identity_key = _get_workload_identity_key()
+    if workload_identity_key:
+        return f"{credential_provider_name}:{workload_identity_key}"
+    return None
+
+def _get_access_token_cache_key(credential_provider_name: str, scopes: Optional[List[str]],
+                                custom_parameters: Optional[Dict[str, str]],
+                                user_id: Optional[str], id_token: Optional[str]) -> Optional[str]:
+    """Generate an OAuth2 access token cache key, if the current workload identity is known."""
+    workload_identity_key = _get_workload_identity_key()
+    if not workload_identity_key:
+        return None
+    user_key = _get_workload_token_cache_key(workload_identity_key, user_id, id_token)
+    return _get_credential_key("oauth2", credential_provider_name, sorted(scopes or []), custom_parameters, user_key)
+
+def _get_workload_identity_key() -> Optional[str]:
+    """Identify the current workload identity by a hash of the context workload access token, or else by its configured name.
+
+    The context token takes precedence: requests carrying different workload access tokens, for example
+    of different users, must not share cached credentials even when a workload identity name is configured.
+    """
+    workload_access_token = AgentIdentityContext.get_workload_access_token()
+    if workload_access_token:
+        return f"token:{hashlib.sha256(workload_access_token.encode('utf-8')).hexdigest()}"
+    return _get_configured_workload_identity_name()
+
+def _get_configured_workload_identity_name() -> Optional[str]:
     workload_identity_name = os.environ.get("AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME", None)
     if not workload_identity_name:
         workload_identity_name = read_local_config('workload_identity_name')
+    return workload_identity_name
+
+async def _get_workload_access_token_local(client: IdentityClient, user_id: Optional[str] = None, id_token: Optional[str] = None,
+                                           span: Optional[Span] = None, check_cache: bool = True) -> str:
+    workload_identity_name = _get_configured_workload_identity_name()
 
     if workload_identity_name:
-        logger.info(f"Using workload identity from config file: {workload_identity_name}")
+        logger.debug("Using configured workload identity: %s", workload_identity_name)
     else:
-        workload_identity_name = client.create_workload_identity()
+        # The control plane client and the config file are synchronous, run them off the event loop, which may be
+        # the background loop shared by all synchronous callers
+        workload_identity_name = await asyncio.to_thread(client.create_workload_identity)
         logger.info("Created a workload identity: %s", workload_identity_name)
-
-    write_local_config("workload_identity_name", workload_identity_name)
-
-    return client.get_workload_access_token(workload_identity_name, user_id=user_id, user_token=id_token)
+        # Remember the new identity, so later calls and restarts reuse it instead of creating another one
+        await asyncio.to_thread(write_local_config, "workload_identity_name", workload_identity_name)
+
+    cache_key = _get_workload_token_cache_key(workload_identity_name, user_id, id_token)
+    if check_cache:
+        cached_token = await call_cache(get_cached_workload_access_token, cache_key)
+        if span is not None:
+            span.set_attribute("agentidentity.cache_hit", cached_token is not None)
+        if cached_token:
+            return cached_token
+
+    async def _fetch() -> str:
+        # Another caller, possibly of another process, may fill the cache while this one waits to lead the fetch
+        return await call_cache_compute(get_or_compute_workload_access_token, cache_key,
+                                        lambda: client.get_workload_access_token_async(
+                                            workload_identity_name, user_id=user_id, user_token=id_token))
+
+    return await _credential_flight.do(f"workload:{cache_key}", _fetch)
+
+def _get_workload_token_cache_key(workload_identity_name: str, user_id: Optional[str], id_token: Optional[str]) -> str:
+    """Generate a workload access token cache key, following the user token/user ID/none priority."""
+    if id_token:
+        return f"{workload_identity_name}:jwt:{hashlib.sha256(id_token.encode('utf-8')).hexdigest()}"
+    if user_id:
+        return f"{workload_identity_name}:user:{user_id}"
+    return f"{workload_identity_name}:"
+
+def _get_credential_key(kind: str, *parts: Any) -> str:
+    """Generate a key for a credential fetch from the parameters that determine its result."""
+    digest = hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return f"{kind}:{digest}"
 
 async def _get_workload_access_token(client: IdentityClient,
         user_id: Optional[str] = None,
-        id_token: Optional[str] = None) -> str:
-    token = AgentIdentityContext.get_workload_access_token()
-    if token is not None:
-        return token
-    else:
-        return await _get_workload_access_token_local(client, user_id, id_token)
-
-def _has_running_loop() -> bool:
-    try:
-        asyncio.get_running_loop()
-        return True
-    except RuntimeError:
-        return False
\ No newline at end of file
+        id_token: Optional[str] = None,
+        check_cache: bool = True) -> str:
+    with start_span("agentidentity.workload_access_token") as span:
+        token = AgentIdentityContext.get_workload_access_token()
+        span.set_attribute("agentidentity.from_context", token is not None)
+        if token is not None:
+            return token
+        else:
+            return await _get_workload_access_token_local(client, user_id, id_token, span, check_cache)
+
+def _get_user_context() -> Tuple[Optional[str], Optional[str]]:
+    """Read the user ID and user token of the current request from the context."""
+    with start_span("agentidentity.context_lookup") as span:
+        user_id = AgentIdentityContext.get_user_id()
+        id_token = AgentIdentityContext.get_user_token()
+        span.set_attribute("agentidentity.has_user_id", user_id is not None)
+        span.set_attribute("agentidentity.has_user_token", id_token is not None)
+        return user_id, id_token
\ No newline at end of file
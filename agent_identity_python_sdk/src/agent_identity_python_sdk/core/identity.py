@@ -10,31 +10,86 @@ The client supports various authentication flows including JWT-based authenticat
 user ID-based authentication, and OAuth2 authorization flows with resource providers.
 """
 
+from __future__ import annotations
+
 import asyncio
+import importlib
 import logging
 import os
+import threading
+import time
 import uuid
-from typing import Any, Callable, Dict, List, Literal, Optional
-
-from alibabacloud_agentidentity20250901.client import Client as ControlClient
-from alibabacloud_agentidentity20250901.models import CreateWorkloadIdentityRequest
-from alibabacloud_agentidentitydata20251127.client import Client as DataClient
-from alibabacloud_agentidentitydata20251127.models import (
-    AssumeRoleForWorkloadIdentityRequest,
-    CompleteResourceTokenAuthRequest,
-    CompleteResourceTokenAuthRequestUserIdentifier,
-    GetResourceAPIKeyRequest,
-    GetResourceOAuth2TokenRequest,
-    GetWorkloadAccessTokenForJWTRequest,
-    GetWorkloadAccessTokenForUserIdRequest,
-    GetWorkloadAccessTokenRequest
+import weakref
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple, TypeVar, Union
+
+from ..model.stscredential import CompactSTSCredential, STSCredential, parse_expiration
+from ..utils.cache import (
+    TTLCache,
+    _get_cached_compact_credential,
+    _get_or_compute_compact_credential,
+    call_cache,
+    call_cache_compute,
+    claim_credential_refresh,
+    release_credential_refresh,
+    store_credential_in_cache
 )
-from alibabacloud_credentials.client import Client as CredentialClient
-from alibabacloud_credentials.models import Config as CredentialConfig
-from alibabacloud_tea_openapi import models as open_api_models
-
-from ..model.stscredential import STSCredential
-from ..utils.cache import get_cached_credential, store_credential_in_cache
+from ..utils.auth_completion import notify_auth_completed, wait_for_auth_completion
+from ..utils.backoff import BackoffStrategy, ExponentialBackoff, FixedBackoff
+from ..utils.circuit_breaker import get_circuit_breaker
+from ..utils.event_loop import in_background_loop, submit
+from ..utils.metrics import add_oauth2_polls_in_flight, instrumented
+from ..utils.retry import get_retry_policy
+from ..utils.singleflight import SingleFlight
+from ..utils.tracing import start_span
+
+if TYPE_CHECKING:
+    from alibabacloud_agentidentity20250901.client import Client as ControlClient
+    from alibabacloud_agentidentitydata20251127.client import Client as DataClient
+    from alibabacloud_credentials.client import Client as CredentialClient
+
+# Names of the Alibaba Cloud SDK, imported on first use since importing it takes hundreds of milliseconds.
+# Each name maps to its module and attribute, None for the module itself.
+_LAZY_IMPORTS: Dict[str, Tuple[str, Optional[str]]] = {
+    "ControlClient": ("alibabacloud_agentidentity20250901.client", "Client"),
+    "CreateWorkloadIdentityRequest": ("alibabacloud_agentidentity20250901.models", "CreateWorkloadIdentityRequest"),
+    "DataClient": ("alibabacloud_agentidentitydata20251127.client", "Client"),
+    "AssumeRoleForWorkloadIdentityRequest": ("alibabacloud_agentidentitydata20251127.models", "AssumeRoleForWorkloadIdentityRequest"),
+    "CompleteResourceTokenAuthRequest": ("alibabacloud_agentidentitydata20251127.models", "CompleteResourceTokenAuthRequest"),
+    "CompleteResourceTokenAuthRequestUserIdentifier": ("alibabacloud_agentidentitydata20251127.models", "CompleteResourceTokenAuthRequestUserIdentifier"),
+    "GetResourceAPIKeyRequest": ("alibabacloud_agentidentitydata20251127.models", "GetResourceAPIKeyRequest"),
+    "GetResourceOAuth2TokenRequest": ("alibabacloud_agentidentitydata20251127.models", "GetResourceOAuth2TokenRequest"),
+    "GetWorkloadAccessTokenForJWTRequest": ("alibabacloud_agentidentitydata20251127.models", "GetWorkloadAccessTokenForJWTRequest"),
+    "GetWorkloadAccessTokenForUserIdRequest": ("alibabacloud_agentidentitydata20251127.models", "GetWorkloadAccessTokenForUserIdRequest"),
+    "GetWorkloadAccessTokenRequest": ("alibabacloud_agentidentitydata20251127.models", "GetWorkloadAccessTokenRequest"),
+    "CredentialClient": ("alibabacloud_credentials.client", "Client"),
+    "CredentialConfig": ("alibabacloud_credentials.models", "Config"),
+    "open_api_models": ("alibabacloud_tea_openapi.models", None),
+}
+
+# Names needed on the request path, the control API is only used to create workload identities
+_DATA_API_IMPORTS = tuple(name for name in _LAZY_IMPORTS if name not in ("ControlClient", "CreateWorkloadIdentityRequest"))
+_CONTROL_API_IMPORTS = ("ControlClient", "CreateWorkloadIdentityRequest", "open_api_models")
+
+# Deduplicates concurrent AssumeRoleForWorkloadIdentity calls for the same cache key
+_sts_credential_flight = SingleFlight()
+
+T = TypeVar("T")
+
+# Default overall deadline in seconds for polling an OAuth2 token while the user authorizes
+DEFAULT_OAUTH2_POLL_TIMEOUT = 60
+
+# Default maximum number of data API clients kept per IdentityClient for STS credentials
+DEFAULT_DATA_CLIENT_POOL_SIZE = 32
+
+# Default maximum number of credential clients kept per IdentityClient for cached STS credentials
+DEFAULT_CREDENTIAL_CLIENT_POOL_SIZE = 100
+
+# STS credential clients created by the SDK, mapped to the access key ID and expiration of their credential
+_sts_credential_identities: "weakref.WeakKeyDictionary[CredentialClient, Tuple[str, float]]" = weakref.WeakKeyDictionary()
+
+# Shared IdentityClient instances, keyed by region, endpoints and whether STS is used
+_identity_clients: Dict[Tuple[str, Optional[str], Optional[str], bool], "IdentityClient"] = {}
+_identity_clients_lock = threading.Lock()
 
 
 def _get_sts_cache_key(user_id: str, id_token: str, role_session_name: str) -> str:
@@ -42,28 +97,175 @@ def _get_sts_cache_key(user_id: str, id_token: str, role_session_name: str) -> s
     return f"{user_id}:{id_token}:{role_session_name}"
 
 
+def get_identity_client(region_id: str, data_api_endpoint: Optional[str] = None,
+                        control_api_endpoint: Optional[str] = None) -> "IdentityClient":
+    """
+    Get the shared IdentityClient for a region and endpoints, creating it on first use.
+
+    All shared clients authenticate with the default credential chain, so a client is shared by
+    every caller with the same region, endpoints and AGENT_IDENTITY_USE_STS setting.
+
+    Args:
+        region_id: The region ID
+        data_api_endpoint: Endpoint of the data API, derived from the region if not specified
+        control_api_endpoint: Endpoint of the control API, derived from the region if not specified
+
+    Returns:
+        IdentityClient: The shared client
+    """
+    key = (region_id, data_api_endpoint, control_api_endpoint, _use_sts())
+    client = _identity_clients.get(key)
+    if client is None:
+        with _identity_clients_lock:
+            client = _identity_clients.get(key)
+            if client is None:
+                client = IdentityClient(region_id, data_api_endpoint=data_api_endpoint,
+                                        control_api_endpoint=control_api_endpoint)
+                _identity_clients[key] = client
+    return client
+
+
+def clear_identity_clients():
+    """Drop all shared IdentityClient instances, so that the next call to get_identity_client creates new ones."""
+    with _identity_clients_lock:
+        _identity_clients.clear()
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_IMPORTS:
+        _import_lazily(name)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _import_lazily(*names: str):
+    """Import Alibaba Cloud SDK names into the module globals, keeping names already set, for example by tests."""
+    module_globals = globals()
+    for name in names:
+        if name not in module_globals:
+            module_name, attribute = _LAZY_IMPORTS[name]
+            module = importlib.import_module(module_name)
+            module_globals[name] = module if attribute is None else getattr(module, attribute)
+
+
+def _use_sts() -> bool:
+    return os.getenv("AGENT_IDENTITY_USE_STS", "true") == "true"
+
+
+def _get_expires_at(credential: Union[STSCredential, CompactSTSCredential]) -> Optional[float]:
+    if isinstance(credential, CompactSTSCredential):
+        return credential.expires_at
+    return parse_expiration(credential.expiration)
+
+
+def _split_endpoint(endpoint: str) -> Tuple[str, Optional[str]]:
+    """Split an endpoint given as a URL, such as http://127.0.0.1:8765 for a local emulator, into host and protocol."""
+    scheme, separator, host = endpoint.partition("://")
+    if not separator:
+        return endpoint, None
+    return host.rstrip("/"), scheme.upper()
+
+
 class IdentityClient:
     def __init__(self, region_id: str, data_api_endpoint: Optional[str] = None,
                  control_api_endpoint: Optional[str] = None
                  ):
+        _import_lazily(*_DATA_API_IMPORTS)
         self.logger = logging.getLogger("agentidentity.identity_client")
-        self.use_sts = os.getenv("AGENT_IDENTITY_USE_STS", "true") == "true"
+        self.use_sts = _use_sts()
         self.region_id = region_id
         self.credential = CredentialClient()
         self.control_api_endpoint = control_api_endpoint
         self.data_api_endpoint = data_api_endpoint
-        self.control_client = ControlClient(config=open_api_models.Config(
-            credential=self.credential,
-            region_id=region_id,
-            endpoint=control_api_endpoint or f"agentidentity.{region_id}.aliyuncs.com"
-        ))
-        self.data_client = DataClient(config=open_api_models.Config(
-            credential=self.credential,
-            region_id=region_id,
-            endpoint=data_api_endpoint or f"agentidentitydata.{region_id}.aliyuncs.com"
+        # Endpoint the circuits of the data API operations are kept for
+        self._data_api_endpoint = data_api_endpoint or f"agentidentitydata.{region_id}.aliyuncs.com"
+        self._control_client: Optional[ControlClient] = None
+        self._control_client_lock = threading.Lock()
+        self.data_client = self._new_data_client(self.credential)
+        self._data_client_pool = TTLCache(max_size=DEFAULT_DATA_CLIENT_POOL_SIZE, name="data_client")
+        self._credential_client_pool = TTLCache(max_size=DEFAULT_CREDENTIAL_CLIENT_POOL_SIZE, name="credential_client")
+
+    @property
+    def control_client(self) -> ControlClient:
+        """Client of the control API, created on first use since only creating a workload identity needs it."""
+        if self._control_client is None:
+            with self._control_client_lock:
+                if self._control_client is None:
+                    _import_lazily(*_CONTROL_API_IMPORTS)
+                    endpoint, protocol = _split_endpoint(self.control_api_endpoint or f"agentidentity.{self.region_id}.aliyuncs.com")
+                    self._control_client = ControlClient(config=open_api_models.Config(
+                        credential=self.credential,
+                        region_id=self.region_id,
+                        endpoint=endpoint,
+                        protocol=protocol
+                    ))
+        return self._control_client
+
+    @control_client.setter
+    def control_client(self, control_client: ControlClient):
+        self._control_client = control_client
+
+    def _new_data_client(self, credential: Optional[CredentialClient]) -> DataClient:
+        endpoint, protocol = _split_endpoint(self._data_api_endpoint)
+        return DataClient(config=open_api_models.Config(
+            credential=credential,
+            region_id=self.region_id,
+            endpoint=endpoint,
+            protocol=protocol
         ))
 
+    def _get_data_client(self, credential: Optional[CredentialClient]) -> DataClient:
+        """Get the data API client to use with the given credential.
+
+        Clients for STS credentials created by this SDK are pooled by access key ID and expiration,
+        so that building the client and its configuration is not repeated until the credential expires.
+        This saves object construction only: the Tea runtime opens an HTTP session per request, so no
+        connection is kept between calls.
+        """
+        if not self.use_sts:
+            return self.data_client
+
+        identity = _sts_credential_identities.get(credential) if credential is not None else None
+        if identity is None:
+            return self._new_data_client(credential)
+
+        access_key_id, expires_at = identity
+        pool_key = f"{access_key_id}:{expires_at}"
+        client = self._data_client_pool.get(pool_key)
+        if client is None:
+            client = self._new_data_client(credential)
+            ttl = expires_at - time.time()
+            if ttl > 0:
+                self._data_client_pool.set(pool_key, client, ttl)
+        return client
+
+    def _call_data_api(self, operation: str, call: Callable[[], T], retry: bool = True) -> T:
+        """Call an operation of the data API, through its circuit if a circuit breaker is set.
+
+        Failed attempts are retried according to the retry policy, unless retry is False.
+        """
+        circuit_breaker = get_circuit_breaker()
+
+        def attempt() -> T:
+            if circuit_breaker is None:
+                return call()
+            return circuit_breaker.call(self._data_api_endpoint, operation, call)
+
+        return get_retry_policy().call(operation, attempt) if retry else attempt()
 
+    async def _call_data_api_async(self, operation: str, call: Callable[[], Awaitable[T]], retry: bool = True) -> T:
+        """Non-blocking variant of _call_data_api."""
+        circuit_breaker = get_circuit_breaker()
+
+        async def attempt() -> T:
+            if circuit_breaker is None:
+                return await call()
+            return await circuit_breaker.call_async(self._data_api_endpoint, operation, call)
+
+        return await (get_retry_policy().call_async(operation, attempt) if retry else attempt())
+
+
+    @instrumented("create_workload_identity")
     def create_workload_identity(
             self, workload_identity_name: Optional[str] = None,
             role_arn: Optional[str] = None,
@@ -96,10 +298,11 @@ class IdentityClient:
             workload_identity_name = f"workload-{uuid.uuid4().hex[:8]}"
 
         self.logger.info(f"Creating workload identity: {workload_identity_name}")
+        control_client = self.control_client
         request = CreateWorkloadIdentityRequest(workload_identity_name=workload_identity_name,
                                                 allowed_resource_oauth2_return_urls=allowed_resource_oauth2_return_urls or [],
                                                 role_arn=role_arn, identity_provider_name=identity_provider_name)
-        response = self.control_client.create_workload_identity(request)
+        response = control_client.create_workload_identity(request)
         try:
             return response.body.workload_identity.workload_identity_name
         except Exception as e:
@@ -107,6 +310,7 @@ class IdentityClient:
             raise e
 
 
+    @instrumented("get_workload_access_token")
     def get_workload_access_token(
         self, workload_name: str, user_token: Optional[str] = None, user_id: Optional[str] = None
     ) -> str:
@@ -124,23 +328,62 @@ class IdentityClient:
                 self.logger.info(f"Fetching workload access token for {workload_name} using user token.")
                 request = GetWorkloadAccessTokenForJWTRequest(workload_identity_name=workload_name,
                                                               user_token=user_token)
-                resp = self.data_client.get_workload_access_token_for_jwt(request)
+                resp = self._call_data_api("GetWorkloadAccessTokenForJWT",
+                                           lambda: self.data_client.get_workload_access_token_for_jwt(request))
+                return resp.body.workload_access_token
+            elif user_id:
+                self.logger.info(f"Fetching workload access token for {workload_name} using user id.")
+                request = GetWorkloadAccessTokenForUserIdRequest(workload_identity_name=workload_name, user_id=user_id)
+                resp = self._call_data_api("GetWorkloadAccessTokenForUserId",
+                                           lambda: self.data_client.get_workload_access_token_for_user_id(request))
+                return resp.body.workload_access_token
+            else:
+                self.logger.info(f"Fetching workload access token for {workload_name} without end user information.")
+                request = GetWorkloadAccessTokenRequest(workload_identity_name=workload_name)
+                resp = self._call_data_api("GetWorkloadAccessToken",
+                                           lambda: self.data_client.get_workload_access_token(request))
+                return resp.body.workload_access_token
+        except Exception as e:
+            self.logger.error(f"Error occurred when fetching workload access token for {workload_name}: %s", e)
+            raise e
+
+
+    @instrumented("get_workload_access_token")
+    async def get_workload_access_token_async(
+        self, workload_name: str, user_token: Optional[str] = None, user_id: Optional[str] = None
+    ) -> str:
+
+        """
+        Non-blocking variant of get_workload_access_token, backed by the asynchronous data API client.
+
+        The same priority order for authentication applies as for get_workload_access_token.
+        """
+        try:
+            if user_token:
+                self.logger.info(f"Fetching workload access token for {workload_name} using user token.")
+                request = GetWorkloadAccessTokenForJWTRequest(workload_identity_name=workload_name,
+                                                              user_token=user_token)
+                resp = await self._call_data_api_async(
+                    "GetWorkloadAccessTokenForJWT", lambda: self.data_client.get_workload_access_token_for_jwt_async(request))
                 return resp.body.workload_access_token
             elif user_id:
                 self.logger.info(f"Fetching workload access token for {workload_name} using user id.")
                 request = GetWorkloadAccessTokenForUserIdRequest(workload_identity_name=workload_name, user_id=user_id)
-                resp = self.data_client.get_workload_access_token_for_user_id(request)
+                resp = await self._call_data_api_async(
+                    "GetWorkloadAccessTokenForUserId", lambda: self.data_client.get_workload_access_token_for_user_id_async(request))
                 return resp.body.workload_access_token
             else:
                 self.logger.info(f"Fetching workload access token for {workload_name} without end user information.")
                 request = GetWorkloadAccessTokenRequest(workload_identity_name=workload_name)
-                resp = self.data_client.get_workload_access_token(request)
+                resp = await self._call_data_api_async(
+                    "GetWorkloadAccessToken", lambda: self.data_client.get_workload_access_token_async(request))
                 return resp.body.workload_access_token
         except Exception as e:
             self.logger.error(f"Error occurred when fetching workload access token for {workload_name}: %s", e)
             raise e
 
 
+    @instrumented("confirm_user_auth")
     def confirm_user_auth(
         self, session_uri: str, user_id: Optional[str] = None, user_token: Optional[str] = None
     ):
@@ -150,7 +393,8 @@ class IdentityClient:
 
         This function is used by applications to confirm user OAuth2 authorization. After confirmation,
         Agent Identity will start calling the OAuth2 Credential Provider's token endpoint to obtain
-        the access token.
+        the access token. Pollers waiting for the token of this session in the same process, or
+        subscribed through the channel set with set_auth_completion_channel, are woken up immediately.
 
         Args:
             session_uri: The session identifier returned from the GetResourceOAuth2Token call.
@@ -163,11 +407,42 @@ class IdentityClient:
         identifier = CompleteResourceTokenAuthRequestUserIdentifier(user_id=user_id, user_jwt=user_token)
         request = CompleteResourceTokenAuthRequest(user_identifier=identifier, session_uri=session_uri)
         try:
-            return self.data_client.complete_resource_token_auth(request)
+            response = self._call_data_api("CompleteResourceTokenAuth",
+                                           lambda: self.data_client.complete_resource_token_auth(request))
         except Exception as e:
             self.logger.error("Error occurred when confirming authorization: %s", e)
             raise e
+        notify_auth_completed(session_uri)
+        return response
+
+    @instrumented("confirm_user_auth")
+    async def confirm_user_auth_async(
+        self, session_uri: str, user_id: Optional[str] = None, user_token: Optional[str] = None
+    ):
 
+        """
+        Non-blocking variant of confirm_user_auth, backed by the asynchronous data API client.
+
+        Args:
+            session_uri: The session identifier returned from the GetResourceOAuth2Token call.
+
+            user_id: End-user ID. Required if workload access token was obtained using user ID.
+
+            user_token: End-user token (JWT). Required if workload access token was obtained using JWT.
+        """
+
+        identifier = CompleteResourceTokenAuthRequestUserIdentifier(user_id=user_id, user_jwt=user_token)
+        request = CompleteResourceTokenAuthRequest(user_identifier=identifier, session_uri=session_uri)
+        try:
+            response = await self._call_data_api_async(
+                "CompleteResourceTokenAuth", lambda: self.data_client.complete_resource_token_auth_async(request))
+        except Exception as e:
+            self.logger.error("Error occurred when confirming authorization: %s", e)
+            raise e
+        notify_auth_completed(session_uri)
+        return response
+
+    @instrumented("get_token")
     async def get_token(
         self,
         *,
@@ -192,7 +467,8 @@ class IdentityClient:
 
             workload_identity_token: Workload identity access token
 
-            on_auth_url: Callback function for handling authorization URLs when they are obtained
+            on_auth_url: Callback function for handling authorization URLs when they are obtained. A synchronous
+                         callback of a synchronous caller runs on a worker thread
 
             auth_flow: Authentication flow type ("USER_FEDERATION")
 
@@ -218,13 +494,7 @@ class IdentityClient:
             Exception: Various other exceptions for error conditions
         """
 
-        client = self.data_client
-        if self.use_sts:
-            client = DataClient(config=open_api_models.Config(
-                credential=credential,
-                region_id=self.region_id,
-                endpoint=self.data_api_endpoint or f"agentidentitydata.{self.region_id}.aliyuncs.com"
-            ))
+        client = self._get_data_client(credential)
 
         request = GetResourceOAuth2TokenRequest(
             resource_credential_provider_name=credential_provider_name,
@@ -236,12 +506,16 @@ class IdentityClient:
             custom_state=custom_state,
             custom_parameters=custom_parameters,
         )
-        try:
-            response = client.get_resource_oauth2_token(request)
-        except Exception as e:
-            self.logger.error("Failed to get OAuth2 token: %s", str(e))
-            raise
-        response_body = response.body
+        with start_span("agentidentity.get_resource_oauth2_token",
+                        {"agentidentity.credential_provider_name": credential_provider_name}) as span:
+            try:
+                response = await self._call_data_api_async(
+                    "GetResourceOAuth2Token", lambda: client.get_resource_oauth2_token_async(request))
+            except Exception as e:
+                self.logger.error("Failed to get OAuth2 token: %s", str(e))
+                raise
+            response_body = response.body
+            span.set_attribute("agentidentity.authorization_required", not response_body.access_token)
 
         if response_body.access_token:
             return response_body.access_token
@@ -250,6 +524,10 @@ class IdentityClient:
             if on_auth_url:
                 if asyncio.iscoroutinefunction(on_auth_url):
                     await on_auth_url(response_body.authorization_url)
+                elif in_background_loop():
+                    # The callback of a synchronous caller may block, for example to open a browser,
+                    # and must not stall the background loop shared by all synchronous callers
+                    await asyncio.to_thread(on_auth_url, response_body.authorization_url)
                 else:
                     on_auth_url(response_body.authorization_url)
 
@@ -266,34 +544,60 @@ class IdentityClient:
 
         raise RuntimeError("Failed to obtain OAuth2 token for current workload identity: Agent Identity service did not return a token or an authorization URL.")
 
+    @instrumented("get_api_key")
     async def get_api_key(self, *, credential_provider_name: str, agent_identity_token: str, credential: Optional[CredentialClient] = None) -> str:
         self.logger.info("Getting API key...")
         req = GetResourceAPIKeyRequest(resource_credential_provider_name=credential_provider_name, workload_access_token=agent_identity_token)
 
-        client = self.data_client
-        if self.use_sts:
-            client = DataClient(config=open_api_models.Config(
-                credential=credential,
-                region_id=self.region_id,
-                endpoint=self.data_api_endpoint or f"agentidentitydata.{self.region_id}.aliyuncs.com"
-            ))
+        client = self._get_data_client(credential)
 
-        response = client.get_resource_apikey(req)
+        with start_span("agentidentity.get_resource_api_key",
+                        {"agentidentity.credential_provider_name": credential_provider_name}):
+            response = await self._call_data_api_async("GetResourceAPIKey",
+                                                       lambda: client.get_resource_apikey_async(req))
         if response.body.apikey:
             return response.body.apikey
         raise RuntimeError("Agent identity service did not return an API key.")
 
     @staticmethod
-    def _convert_to_credential(sts_credential: STSCredential) -> CredentialClient:
+    def _convert_to_credential(sts_credential: Union[STSCredential, CompactSTSCredential]) -> CredentialClient:
+        _import_lazily("CredentialClient", "CredentialConfig")
         credentials_config = CredentialConfig(
             type='sts',
             access_key_id=sts_credential.access_key_id,
             access_key_secret=sts_credential.access_key_secret,
             security_token=sts_credential.security_token
         )
-        return CredentialClient(credentials_config)
+        credential_client = CredentialClient(credentials_config)
+        expires_at = _get_expires_at(sts_credential)
+        if expires_at is not None:
+            _sts_credential_identities[credential_client] = (sts_credential.access_key_id, expires_at)
+        return credential_client
 
+    def _get_credential_client(self, sts_credential: Union[STSCredential, CompactSTSCredential]) -> CredentialClient:
+        """Get the credential client of an STS credential.
 
+        The client built for a credential is reused by every call with that credential until it expires,
+        instead of building a new client on every cache hit. This saves object construction only.
+        """
+        expires_at = _get_expires_at(sts_credential)
+        pool_key = f"{sts_credential.access_key_id}:{expires_at}"
+        pooled = self._credential_client_pool.get(pool_key)
+        if pooled is not None:
+            pooled_credential, credential_client = pooled
+            # Cache backends that serialize credentials return an equal copy rather than the same object
+            if pooled_credential is sts_credential or pooled_credential == sts_credential:
+                return credential_client
+
+        credential_client = self._convert_to_credential(sts_credential)
+        if expires_at is not None:
+            ttl = expires_at - time.time()
+            if ttl > 0:
+                self._credential_client_pool.set(pool_key, (sts_credential, credential_client), ttl)
+        return credential_client
+
+
+    @instrumented("get_sts_credential_client")
     async def get_sts_credential_client(self, workload_token: str, user_id: Optional[str], user_token: Optional[str]) -> CredentialClient:
         """Get a STS credential client for the specified workload identity.
 
@@ -311,18 +615,49 @@ class IdentityClient:
             Exception: Various other exceptions for error conditions
         """
 
-        cache_key = _get_sts_cache_key(workload_token, user_id, user_token)
-        cached_credential = get_cached_credential(cache_key)
-        if cached_credential:
-            return self._convert_to_credential(cached_credential)
-        sts_credential = await self.assume_role_for_workload_identity(
+        with start_span("agentidentity.sts_credential_client") as span:
+            cache_key = _get_sts_cache_key(workload_token, user_id, user_token)
+            cached_credential = await call_cache(_get_cached_compact_credential, cache_key)
+            span.set_attribute("agentidentity.cache_hit", cached_credential is not None)
+            if cached_credential:
+                if await call_cache(claim_credential_refresh, cache_key):
+                    self._refresh_sts_credential_in_background(cache_key, workload_token)
+                return self._get_credential_client(cached_credential)
+
+            async def _fetch() -> CompactSTSCredential:
+                # Another caller, possibly of another process, may fill the cache while this one waits to lead the fetch
+                return await call_cache_compute(_get_or_compute_compact_credential, cache_key,
+                                                lambda: self._assume_role(workload_token))
+
+            sts_credential = await _sts_credential_flight.do(cache_key, _fetch)
+            return self._get_credential_client(sts_credential)
+
+    async def _assume_role(self, workload_token: str) -> CompactSTSCredential:
+        return CompactSTSCredential.from_sts_credential(await self.assume_role_for_workload_identity(
             workload_token=workload_token,
             role_session_name=f'AgentIdentitySessionRole-{uuid.uuid4()}'
-        )
-        store_credential_in_cache(cache_key, sts_credential)
-        return self._convert_to_credential(sts_credential)
+        ))
+
+    async def _assume_role_and_cache(self, cache_key: str, workload_token: str) -> CompactSTSCredential:
+        credential = await self._assume_role(workload_token)
+        await call_cache(store_credential_in_cache, cache_key, credential)
+        return credential
 
+    def _refresh_sts_credential_in_background(self, cache_key: str, workload_token: str):
+        """Replace a cached STS credential that is close to expiry, while callers keep using the cached one."""
 
+        async def _refresh():
+            try:
+                await _sts_credential_flight.do(cache_key, lambda: self._assume_role_and_cache(cache_key, workload_token))
+            except Exception as e:
+                await call_cache(release_credential_refresh, cache_key)
+                self.logger.warning("Failed to refresh STS credential ahead of expiration: %s", e)
+
+        # Run on the background loop so the refresh outlives short-lived event loops of synchronous callers
+        submit(_refresh())
+
+
+    @instrumented("assume_role_for_workload_identity")
     async def assume_role_for_workload_identity(self, *, workload_token: str, role_session_name: str,
                                                            duration_seconds: Optional[int] = 3600,
                                                            policy: Optional[str] = None) -> STSCredential:
@@ -351,11 +686,14 @@ class IdentityClient:
             duration_seconds=duration_seconds,
             policy=policy
         )
-        try:
-            response = self.data_client.assume_role_for_workload_identity(request)
-        except Exception as e:
-            self.logger.error("Failed to assume role for workload identity: %s", str(e))
-            raise
+        with start_span("agentidentity.assume_role_for_workload_identity"):
+            try:
+                response = await self._call_data_api_async(
+                    "AssumeRoleForWorkloadIdentity",
+                    lambda: self.data_client.assume_role_for_workload_identity_async(request))
+            except Exception as e:
+                self.logger.error("Failed to assume role for workload identity: %s", str(e))
+                raise
         credential = response.body.credentials
         return STSCredential(
             access_key_id=credential.access_key_id,
@@ -365,46 +703,97 @@ class IdentityClient:
         )
 
 
-    async def poll_for_oauth2_token(self, request: GetResourceOAuth2TokenRequest, max_retries: int = 20, delay_sec: float = 3.0, credential: Optional[CredentialClient] = None) -> str:
+    @instrumented("poll_for_oauth2_token")
+    async def poll_for_oauth2_token(self, request: GetResourceOAuth2TokenRequest, max_retries: Optional[int] = None,
+                                    delay_sec: Optional[float] = None, credential: Optional[CredentialClient] = None,
+                                    timeout: Optional[float] = None, backoff: Optional[BackoffStrategy] = None) -> str:
 
         """
-        Poll the GetResourceOAuth2Token endpoint until a token is obtained or maximum retries are reached
+        Poll the GetResourceOAuth2Token endpoint until a token is obtained, the deadline passes or maximum retries are reached
 
         Args:
             request: GetResourceOAuth2TokenRequest object
 
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts, unlimited within the deadline if not specified
 
-            delay_sec: Delay in seconds between each retry
+            delay_sec: Fixed delay in seconds between each attempt, overrides backoff
 
             credential: Optional credential for fetching the token. Used when use_sts is enabled.
 
+            timeout: Overall deadline in seconds, defaults to the AGENT_IDENTITY_OAUTH2_POLL_TIMEOUT
+                     environment variable or 60 seconds
+
+            backoff: Strategy for the delays between attempts, defaults to exponential backoff with jitter
+                     starting at 0.5 seconds and capped at 5 seconds
+
+        Failed attempts are only retried on errors the retry policy deems retryable, within its retry
+        budget, other errors are raised immediately.
+
+        When the request carries a session URI, a confirmation of that session through confirm_user_auth
+        or notify_auth_completed ends the current delay early, so the token is fetched right away.
+
         Returns:
             Returns the access token on success, throws an exception on failure
         """
-        client = self.data_client
-        if self.use_sts:
-            client = DataClient(config=open_api_models.Config(
-                credential=credential,
-                region_id=self.region_id,
-                endpoint=self.data_api_endpoint or f"agentidentitydata.{self.region_id}.aliyuncs.com"
-            ))
-
-        for attempt in range(max_retries):
+        client = self._get_data_client(credential)
+
+        if timeout is None:
+            timeout = float(os.getenv("AGENT_IDENTITY_OAUTH2_POLL_TIMEOUT", DEFAULT_OAUTH2_POLL_TIMEOUT))
+        if delay_sec is not None:
+            backoff = FixedBackoff(delay_sec)
+        elif backoff is None:
+            backoff = ExponentialBackoff()
+        delays = backoff.delays()
+        deadline = time.monotonic() + timeout
+        # Wait for a confirmation of the session instead of sleeping, until it has been notified once
+        session_uri = getattr(request, "session_uri", None)
+        retry_policy = get_retry_policy()
+
+        attempt = 0
+        add_oauth2_polls_in_flight(1)
+        with start_span("agentidentity.poll_oauth2_token") as span:
             try:
-                response = client.get_resource_oauth2_token(request)
-                access_token = response.body.access_token
-
-                if access_token:
-                    return access_token
-
-                self.logger.info(f"Polling for OAuth2 token, attempt {attempt + 1}")
-
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed to get OAuth2 token: {str(e)}")
-                
-            if attempt < max_retries - 1:
-                await asyncio.sleep(delay_sec)
-        
-        raise RuntimeError(f"Failed to get OAuth2 token after {max_retries} attempts")
+                while True:
+                    attempt += 1
+                    try:
+                        # Bound each call by the deadline too; cancellation of the caller propagates immediately
+                        remaining = deadline - time.monotonic()
+                        response = await asyncio.wait_for(
+                            self._call_data_api_async("GetResourceOAuth2Token",
+                                                      lambda: client.get_resource_oauth2_token_async(request),
+                                                      retry=False),
+                            timeout=max(remaining, 0))
+                        access_token = response.body.access_token
+
+                        if access_token:
+                            return access_token
+
+                        self.logger.info(f"Polling for OAuth2 token, attempt {attempt}")
+
+                    except asyncio.TimeoutError:
+                        self.logger.warning(f"Attempt {attempt} to get OAuth2 token did not complete before the deadline")
+                    except Exception as e:
+                        # Polling only outlasts transient errors, within the retry budget
+                        if not retry_policy.allow_retry("GetResourceOAuth2Token", e):
+                            self.logger.error(f"Attempt {attempt} failed to get OAuth2 token: {str(e)}")
+                            raise
+                        self.logger.warning(f"Attempt {attempt} failed to get OAuth2 token: {str(e)}")
+
+                    if max_retries is not None and attempt >= max_retries:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    delay = min(next(delays), remaining)
+                    if session_uri:
+                        if await wait_for_auth_completion(session_uri, delay):
+                            self.logger.info("Authorization confirmed, fetching OAuth2 token")
+                            session_uri = None
+                    else:
+                        await asyncio.sleep(delay)
+
+                raise RuntimeError(f"Failed to get OAuth2 token after {attempt} attempts")
+            finally:
+                span.set_attribute("agentidentity.poll_attempts", attempt)
+                add_oauth2_polls_in_flight(-1)
 
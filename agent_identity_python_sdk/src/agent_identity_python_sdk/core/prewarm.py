@@ -0,0 +1,100 @@
+"""Bulk credential prewarming for agent identity service."""
+
+import asyncio
+import logging
+from typing import Iterable, List, Optional
+
+from ..context import AgentIdentityContext
+from ..model.prewarm import PrewarmResult, PrewarmSpec
+from ..utils.event_loop import run_sync
+from ..utils.tracing import start_span
+from .decorators import (
+    _resolve_access_token,
+    _resolve_api_key,
+    _resolve_sts_credential_client,
+    _resolve_workload_access_token
+)
+
+logger = logging.getLogger("agentidentity.core.prewarm")
+
+# Number of credentials fetched at once by default
+DEFAULT_PREWARM_CONCURRENCY = 8
+
+
+async def prewarm_credentials_async(specs: Iterable[PrewarmSpec], *,
+                                    max_concurrency: int = DEFAULT_PREWARM_CONCURRENCY) -> List[PrewarmResult]:
+    """
+    Fetch credentials ahead of the requests that need them, filling the caches read by the decorators.
+
+    Credentials are resolved exactly as the decorators resolve them for a request of the spec's user,
+    with the workload access token and the custom state of the calling context. If the calling context
+    carries a workload access token, it is used for every spec instead of a token of the spec's user,
+    and a warning is logged when specs name users. Call this outside of request handling, for example
+    at startup. A failure is reported in the result of its spec and does not stop the other fetches.
+
+    Args:
+        specs: The credentials to fetch
+        max_concurrency: Maximum number of credentials fetched at once
+
+    Returns:
+        The result of every spec, in the order of the specs
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    specs = list(specs)
+    if AgentIdentityContext.get_workload_access_token() and any(spec.user_id or spec.user_token for spec in specs):
+        logger.warning("Prewarming with the workload access token of the calling context, "
+                       "it is used for the credentials of every user of the specs")
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _prewarm(spec: PrewarmSpec) -> PrewarmResult:
+        async with semaphore:
+            # Each task runs in a copy of the calling context, so the user set here is private to it
+            AgentIdentityContext.set_user_id(spec.user_id)
+            AgentIdentityContext.set_user_token(spec.user_token)
+            try:
+                with start_span("agentidentity.prewarm", {"agentidentity.prewarm_kind": spec.kind}):
+                    await _fetch(spec)
+            except Exception as e:
+                logger.warning("Failed to prewarm %s credential %s: %s", spec.kind, spec.credential_provider_name or "", e)
+                return PrewarmResult(spec=spec, error=e)
+            return PrewarmResult(spec=spec)
+
+    results = await asyncio.gather(*(asyncio.create_task(_prewarm(spec)) for spec in specs))
+    failed = sum(1 for result in results if not result.succeeded)
+    logger.info("Prewarmed %d credentials, %d failed", len(results) - failed, failed)
+    return list(results)
+
+
+def prewarm_credentials(specs: Iterable[PrewarmSpec], *, max_concurrency: int = DEFAULT_PREWARM_CONCURRENCY,
+                        timeout: Optional[float] = None) -> List[PrewarmResult]:
+    """
+    Fetch credentials ahead of the requests that need them, for synchronous callers.
+
+    See prewarm_credentials_async.
+
+    Args:
+        specs: The credentials to fetch
+        max_concurrency: Maximum number of credentials fetched at once
+        timeout: Seconds to wait for all fetches, the timeout set with set_sync_timeout if not specified
+
+    Returns:
+        The result of every spec, in the order of the specs
+    """
+    return run_sync(prewarm_credentials_async(specs, max_concurrency=max_concurrency), timeout=timeout)
+
+
+async def _fetch(spec: PrewarmSpec):
+    if spec.kind == "workload_access_token":
+        await _resolve_workload_access_token()
+    elif spec.kind == "sts":
+        await _resolve_sts_credential_client()
+    elif spec.kind == "api_key":
+        await _resolve_api_key(spec.credential_provider_name)
+    else:
+        # Prewarming runs unattended: nobody is prompted and the token is not polled for, so a token that requires
+        # authorization is a failure. Agent Identity still opens an authorization session for it
+        await _resolve_access_token(spec.credential_provider_name, scopes=spec.scopes,
+                                    custom_parameters=spec.custom_parameters, poll_for_token=False)
@@ -1,11 +1,37 @@
 # -*- coding: utf-8 -*-
 """Model module for Agent Identity SDK."""
 
-from .stscredential import STSCredential
+import importlib
+from typing import Any
+
+# Submodule of every exported name, imported on first access since building pydantic models takes time
+_LAZY_EXPORTS = {
+    "STSCredential": ".stscredential",
+    "CompactSTSCredential": ".stscredential",
+    "PrewarmSpec": ".prewarm",
+    "PrewarmResult": ".prewarm",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __all__ = [
     # Credential model
     "STSCredential",
+    "CompactSTSCredential",
+    # Credential prewarming models
+    "PrewarmSpec",
+    "PrewarmResult",
 ]
 
 
@@ -0,0 +1,50 @@
+"""Credential prewarming models
+"""
+from typing import Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, model_validator
+
+# Kinds of credential that can be prewarmed
+PrewarmKind = Literal["workload_access_token", "sts", "api_key", "oauth2"]
+
+
+class PrewarmSpec(BaseModel):
+    """Credential to fetch ahead of the first request that needs it
+
+    The kind selects the credential and the caches that are filled:
+
+    - workload_access_token: the workload access token of the user
+    - sts: the workload access token and the STS credential used to call the data API for the user
+    - api_key: the API key of the credential provider, along with the credentials used to fetch it
+    - oauth2: the OAuth2 access token of the user for the credential provider, if the user already
+      granted access. Nobody is prompted and the token is not polled for, a token that requires
+      authorization is reported as a failure. Agent Identity still opens an authorization session for it,
+      as it does for any request of a token that is not granted yet
+
+    Users are only taken into account if the calling context carries no workload access token.
+    """
+    kind: PrewarmKind
+    credential_provider_name: Optional[str] = None
+    user_id: Optional[str] = None
+    user_token: Optional[str] = None
+    scopes: Optional[List[str]] = None
+    custom_parameters: Optional[Dict[str, str]] = None
+
+    @model_validator(mode="after")
+    def _check_credential_provider_name(self) -> "PrewarmSpec":
+        if self.kind in ("api_key", "oauth2") and not self.credential_provider_name:
+            raise ValueError(f"credential_provider_name is required to prewarm a credential of kind {self.kind}")
+        return self
+
+
+class PrewarmResult(BaseModel):
+    """Outcome of prewarming the credential of a spec
+    """
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    spec: PrewarmSpec
+    error: Optional[Exception] = None
+
+    @property
+    def succeeded(self) -> bool:
+        return self.error is None
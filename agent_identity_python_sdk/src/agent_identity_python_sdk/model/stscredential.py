@@ -1,5 +1,9 @@
 """STS Credential model
 """
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -10,3 +14,59 @@ class STSCredential(BaseModel):
     access_key_secret: str
     security_token: str
     expiration: str
+
+
+@dataclass(frozen=True, slots=True)
+class CompactSTSCredential:
+    """Immutable STS credential with its expiration parsed once
+
+    Used by the SDK to cache STS credentials: it takes a fraction of the memory of an STSCredential,
+    is built without validation, and checking its expiry does not parse a timestamp. The expiration
+    string returned by the service is kept as is, so converting back to an STSCredential is lossless.
+    """
+    access_key_id: str
+    access_key_secret: str
+    security_token: str
+    # Expiration as a UNIX timestamp, None if the service returned an expiration that cannot be parsed
+    expires_at: Optional[float]
+    # Expiration as returned by the service, formatted from expires_at in UTC if not given
+    expiration: Optional[str] = None
+
+    def __post_init__(self):
+        if self.expiration is None:
+            expiration = ""
+            if self.expires_at is not None:
+                expiration = datetime.fromtimestamp(self.expires_at, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            object.__setattr__(self, "expiration", expiration)
+
+    @classmethod
+    def from_sts_credential(cls, credential: STSCredential) -> "CompactSTSCredential":
+        return cls(credential.access_key_id, credential.access_key_secret, credential.security_token,
+                   parse_expiration(credential.expiration), credential.expiration)
+
+    def to_sts_credential(self) -> STSCredential:
+        return STSCredential.model_construct(access_key_id=self.access_key_id,
+                                             access_key_secret=self.access_key_secret,
+                                             security_token=self.security_token,
+                                             expiration=self.expiration)
+
+
+def parse_expiration(expiration: Optional[str]) -> Optional[float]:
+    """
+    Parse an ISO 8601 credential expiration such as ``2025-12-31T23:59:59Z``
+
+    Args:
+        expiration: Expiration string, timestamps without an offset are treated as UTC
+
+    Returns:
+        The expiration as a UNIX timestamp, or None if it cannot be parsed
+    """
+    if not expiration:
+        return None
+    try:
+        parsed = datetime.fromisoformat(expiration.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -0,0 +1,5 @@
+"""Agent identity testing package."""
+
+from .emulator import DataApiEmulator, EmulatorError, LatencyDistribution
+
+__all__ = ["DataApiEmulator", "EmulatorError", "LatencyDistribution"]
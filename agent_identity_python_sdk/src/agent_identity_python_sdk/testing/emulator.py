@@ -0,0 +1,477 @@
+"""
+Local HTTP emulator of the Agent Identity data API.
+
+The emulator answers the data API operations used by the SDK, so that the real SDK stack can be
+load-tested without reaching the service. Point an IdentityClient at it with
+``IdentityClient(region_id, data_api_endpoint=emulator.endpoint)``. Request signatures are not
+verified, any access key works.
+
+Run it standalone with ``python -m agent_identity_python_sdk.testing.emulator --help``.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("agentidentity.testing.emulator")
+
+# Lifetime in seconds of the workload access tokens issued by the emulator
+DEFAULT_TOKEN_TTL = 3600
+
+# Lifetime in seconds of the STS credentials issued when the request does not specify one
+DEFAULT_CREDENTIAL_DURATION = 3600
+
+# Seconds a throttled client is asked to wait before retrying
+DEFAULT_RETRY_AFTER = 1
+
+ACTIONS = (
+    "GetWorkloadAccessToken",
+    "GetWorkloadAccessTokenForJWT",
+    "GetWorkloadAccessTokenForUserId",
+    "AssumeRoleForWorkloadIdentity",
+    "GetResourceAPIKey",
+    "GetResourceOAuth2Token",
+    "CompleteResourceTokenAuth",
+)
+
+
+class EmulatorError(Exception):
+    """Error returned by the emulator in the error format of the data API."""
+
+    def __init__(self, status: int, code: str, message: str):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class LatencyDistribution:
+    """Distribution of the simulated processing time of a request, in seconds."""
+
+    def __init__(self, sample: Callable[[random.Random], float], description: str):
+        self._sample = sample
+        self.description = description
+
+    @classmethod
+    def constant(cls, seconds: float) -> "LatencyDistribution":
+        return cls(lambda rng: seconds, f"constant:{seconds}")
+
+    @classmethod
+    def uniform(cls, low: float, high: float) -> "LatencyDistribution":
+        return cls(lambda rng: rng.uniform(low, high), f"uniform:{low}:{high}")
+
+    @classmethod
+    def normal(cls, mean: float, stddev: float) -> "LatencyDistribution":
+        return cls(lambda rng: rng.gauss(mean, stddev), f"normal:{mean}:{stddev}")
+
+    @classmethod
+    def lognormal(cls, median: float, sigma: float) -> "LatencyDistribution":
+        """Long-tailed latency, typical of network services: half of the requests take less than the median."""
+        return cls(lambda rng: rng.lognormvariate(math.log(median), sigma), f"lognormal:{median}:{sigma}")
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a distribution from a specification
+
+        Args:
+            spec: ``SECONDS``, ``constant:SECONDS``, ``uniform:LOW:HIGH``, ``normal:MEAN:STDDEV``
+                  or ``lognormal:MEDIAN:SIGMA``
+
+        Returns:
+            LatencyDistribution: The distribution
+        """
+        name, _, arguments = spec.partition(":")
+        try:
+            if not arguments:
+                return cls.constant(float(name))
+            values = [float(value) for value in arguments.split(":")]
+            factories = {"constant": (cls.constant, 1), "uniform": (cls.uniform, 2),
+                         "normal": (cls.normal, 2), "lognormal": (cls.lognormal, 2)}
+            factory, count = factories[name]
+            if len(values) != count:
+                raise ValueError
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid latency distribution: {spec}") from None
+        return factory(*values)
+
+    def sample(self, rng: random.Random) -> float:
+        return max(self._sample(rng), 0.0)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self._rate = rate
+        self._burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class _Session:
+    __slots__ = ("grant", "created", "completed")
+
+    def __init__(self, grant: Tuple[str, str, str]):
+        self.grant = grant
+        self.created = time.monotonic()
+        self.completed = False
+
+
+class DataApiEmulator:
+    """
+    Local HTTP server emulating the Agent Identity data API.
+
+    Workload access tokens are unsigned JWTs with an ``exp`` claim, so the SDK caches them like real
+    ones. GetResourceOAuth2Token requires authorization for a share of the grants, returning an
+    authorization URL and a session URI; the session is completed with CompleteResourceTokenAuth,
+    with complete_session, or automatically after a delay. Once authorized, a grant of a workload
+    identity, provider and scopes returns tokens right away.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: Optional[LatencyDistribution] = None,
+                 latencies: Optional[Dict[str, LatencyDistribution]] = None,
+                 error_rate: float = 0.0, error_rates: Optional[Dict[str, float]] = None,
+                 throttle_rate: Optional[float] = None, throttle_burst: Optional[float] = None,
+                 authorization_rate: float = 0.0, auto_complete_after: Optional[float] = None,
+                 token_ttl: float = DEFAULT_TOKEN_TTL, seed: Optional[int] = None):
+        """
+        Args:
+            host: Address to listen on
+            port: Port to listen on, 0 picks a free port
+            latency: Processing time of every request, none by default
+            latencies: Processing time by action, overriding latency
+            error_rate: Fraction of requests failing with an internal error
+            error_rates: Fraction of failing requests by action, overriding error_rate
+            throttle_rate: Requests per second accepted over all actions, unlimited by default.
+                           Requests above the rate fail with a throttling error
+            throttle_burst: Requests accepted at once before throttling starts, defaults to throttle_rate
+            authorization_rate: Fraction of OAuth2 grants that require the user to authorize first
+            auto_complete_after: Seconds after which authorization sessions complete on their own,
+                                 never by default
+            token_ttl: Lifetime in seconds of issued workload access tokens
+            seed: Seed of the random generator, for reproducible latencies and errors
+        """
+        self.latency = latency
+        self.latencies = dict(latencies or {})
+        self.error_rate = error_rate
+        self.error_rates = dict(error_rates or {})
+        self.authorization_rate = authorization_rate
+        self.auto_complete_after = auto_complete_after
+        self.token_ttl = token_ttl
+        self._bucket = _TokenBucket(throttle_rate, throttle_burst or throttle_rate) if throttle_rate else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, _Session] = {}
+        self._authorized: set = set()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+        handler = type("_EmulatorRequestHandler", (_RequestHandler,), {"emulator": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def endpoint(self) -> str:
+        """URL to use as data_api_endpoint of an IdentityClient."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "DataApiEmulator":
+        """Serve requests on a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._server.serve_forever, name="agentidentity-emulator",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and release the port."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self):
+        """Serve requests on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> "DataApiEmulator":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get the number of requests by action
+
+        Returns:
+            For each action, the number of ``requests``, ``errors`` and ``throttled`` requests
+        """
+        with self._lock:
+            return {action: dict(counts) for action, counts in self._stats.items()}
+
+    def complete_session(self, session_uri: str) -> bool:
+        """
+        Complete an authorization session, as if the user had authorized
+
+        Args:
+            session_uri: The session URI returned by GetResourceOAuth2Token
+
+        Returns:
+            False if the session is unknown
+        """
+        with self._lock:
+            session = self._sessions.get(session_uri)
+            if session is None:
+                return False
+            session.completed = True
+            self._authorized.add(session.grant)
+            return True
+
+    def handle(self, action: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Handle a request as the HTTP server does, including simulated latency, errors and throttling
+
+        Args:
+            action: Name of the data API operation
+            params: Request parameters
+
+        Returns:
+            The response body
+
+        Raises:
+            EmulatorError: For simulated and validation errors
+        """
+        self._count(action, "requests")
+        try:
+            if self._bucket is not None and not self._bucket.take():
+                self._count(action, "throttled")
+                raise EmulatorError(429, "Throttling.User", "Request was denied due to user flow control.")
+            with self._lock:
+                latency = self.latencies.get(action, self.latency)
+                delay = latency.sample(self._rng) if latency is not None else 0.0
+                failed = self._rng.random() < self.error_rates.get(action, self.error_rate)
+            if delay > 0:
+                time.sleep(delay)
+            if failed:
+                raise EmulatorError(503, "ServiceUnavailable", "The request has failed due to a temporary failure.")
+            handler = getattr(self, f"_handle_{action}", None)
+            if action not in ACTIONS or handler is None:
+                raise EmulatorError(404, "InvalidAction.NotFound", f"Specified action {action} is not found.")
+            body = handler(params)
+        except EmulatorError as e:
+            if e.code != "Throttling.User":
+                self._count(action, "errors")
+            raise
+        body["RequestId"] = str(uuid.uuid4()).upper()
+        return body
+
+    def _count(self, action: str, name: str):
+        with self._lock:
+            counts = self._stats.setdefault(action, {"requests": 0, "errors": 0, "throttled": 0})
+            counts[name] += 1
+
+    def _workload_access_token(self, workload_identity_name: str, subject: Optional[str]) -> Dict[str, Any]:
+        _require(workload_identity_name, "WorkloadIdentityName")
+        claims = {
+            "iss": "agentidentity-emulator",
+            "aud": workload_identity_name,
+            "sub": subject or workload_identity_name,
+            "exp": int(time.time() + self.token_ttl),
+            "jti": uuid.uuid4().hex,
+        }
+        return {"WorkloadAccessToken": _unsigned_jwt(claims)}
+
+    def _handle_GetWorkloadAccessToken(self, params: Dict[str, str]) -> Dict[str, Any]:
+        return self._workload_access_token(params.get("WorkloadIdentityName"), None)
+
+    def _handle_GetWorkloadAccessTokenForJWT(self, params: Dict[str, str]) -> Dict[str, Any]:
+        _require(params.get("UserToken"), "UserToken")
+        return self._workload_access_token(params.get("WorkloadIdentityName"), "jwt-user")
+
+    def _handle_GetWorkloadAccessTokenForUserId(self, params: Dict[str, str]) -> Dict[str, Any]:
+        _require(params.get("UserId"), "UserId")
+        return self._workload_access_token(params.get("WorkloadIdentityName"), params["UserId"])
+
+    def _handle_AssumeRoleForWorkloadIdentity(self, params: Dict[str, str]) -> Dict[str, Any]:
+        _require(params.get("WorkloadAccessToken"), "WorkloadAccessToken")
+        duration = int(params.get("DurationSeconds") or DEFAULT_CREDENTIAL_DURATION)
+        expiration = datetime.fromtimestamp(time.time() + duration, tz=timezone.utc)
+        return {"Credentials": {
+            "AccessKeyId": f"STS.emulator{uuid.uuid4().hex[:16]}",
+            "AccessKeySecret": uuid.uuid4().hex,
+            "SecurityToken": uuid.uuid4().hex,
+            "Expiration": expiration.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        }}
+
+    def _handle_GetResourceAPIKey(self, params: Dict[str, str]) -> Dict[str, Any]:
+        _require(params.get("WorkloadAccessToken"), "WorkloadAccessToken")
+        provider = _require(params.get("ResourceCredentialProviderName"), "ResourceCredentialProviderName")
+        return {"APIKey": f"emulator-api-key-{provider}"}
+
+    def _handle_GetResourceOAuth2Token(self, params: Dict[str, str]) -> Dict[str, Any]:
+        workload_access_token = _require(params.get("WorkloadAccessToken"), "WorkloadAccessToken")
+        provider = _require(params.get("ResourceCredentialProviderName"), "ResourceCredentialProviderName")
+        grant = (_subject(workload_access_token), provider, params.get("Scopes") or "")
+        session_uri = params.get("SessionURI")
+
+        with self._lock:
+            if session_uri:
+                session = self._sessions.get(session_uri)
+                if session is None or session.grant != grant:
+                    raise EmulatorError(400, "InvalidParameter.SessionURI", "The specified session does not exist.")
+                if (not session.completed and self.auto_complete_after is not None
+                        and time.monotonic() - session.created >= self.auto_complete_after):
+                    session.completed = True
+                    self._authorized.add(grant)
+                if not session.completed:
+                    return {"SessionStatus": "IN_PROGRESS"}
+            elif str(params.get("ForceAuthentication")).lower() == "true" or (
+                    grant not in self._authorized and self._rng.random() < self.authorization_rate):
+                session_uri = f"urn:agentidentity:emulator:session:{uuid.uuid4().hex}"
+                self._sessions[session_uri] = _Session(grant)
+                return {
+                    "AuthorizationURL": f"https://emulator.invalid/oauth2/authorize?session={session_uri}",
+                    "SessionURI": session_uri,
+                    "SessionStatus": "IN_PROGRESS",
+                }
+        return {"AccessToken": _unsigned_jwt({"sub": grant[0], "aud": provider, "exp": int(time.time() + 3600),
+                                              "jti": uuid.uuid4().hex})}
+
+    def _handle_CompleteResourceTokenAuth(self, params: Dict[str, str]) -> Dict[str, Any]:
+        session_uri = _require(params.get("SessionURI"), "SessionURI")
+        if not self.complete_session(session_uri):
+            raise EmulatorError(400, "InvalidParameter.SessionURI", "The specified session does not exist.")
+        return {}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    emulator: DataApiEmulator
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = self.rfile.read(length).decode("utf-8") if length else ""
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        params.update({key: values[0] for key, values in parse_qs(form).items()})
+        action = params.get("Action") or self.headers.get("x-acs-action", "")
+        headers = {}
+        try:
+            status, body = 200, self.emulator.handle(action, params)
+        except EmulatorError as e:
+            status = e.status
+            body = {"Code": e.code, "Message": e.message, "RequestId": str(uuid.uuid4()).upper()}
+            if status == 429:
+                headers["x-acs-retry-after"] = str(DEFAULT_RETRY_AFTER * 1000)
+        except Exception as e:
+            logger.exception("Emulator failed to handle %s", action)
+            status, body = 500, {"Code": "InternalError", "Message": str(e)}
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format: str, *args: Any):
+        logger.debug(format, *args)
+
+
+def _require(value: Optional[str], name: str) -> str:
+    if not value:
+        raise EmulatorError(400, f"MissingParameter.{name}", f"{name} is mandatory for this action.")
+    return value
+
+
+def _unsigned_jwt(claims: Dict[str, Any]) -> str:
+    def encode(data: Dict[str, Any]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).decode("ascii").rstrip("=")
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}."
+
+
+def _subject(token: str) -> str:
+    # Grants are per workload identity and user, which the emulator encodes in the token subject
+    parts = token.split(".")
+    if len(parts) == 3:
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+            return f"{claims.get('aud')}:{claims.get('sub')}"
+        except (ValueError, AttributeError):
+            pass
+    return token
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local emulator of the Agent Identity data API.")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default 8765)")
+    parser.add_argument("--latency", type=LatencyDistribution.parse,
+                        help="Processing time of every request, e.g. 0.02, uniform:0.01:0.03 or lognormal:0.02:0.5")
+    parser.add_argument("--action-latency", action="append", default=[], metavar="ACTION=SPEC",
+                        help="Processing time of one action, may be repeated")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with HTTP 503")
+    parser.add_argument("--action-error-rate", action="append", default=[], metavar="ACTION=RATE",
+                        help="Fraction of failing requests of one action, may be repeated")
+    parser.add_argument("--throttle-rate", type=float, help="Requests per second accepted before throttling")
+    parser.add_argument("--throttle-burst", type=float, help="Requests accepted at once before throttling")
+    parser.add_argument("--authorization-rate", type=float, default=0.0,
+                        help="Fraction of OAuth2 grants requiring user authorization")
+    parser.add_argument("--auto-complete-after", type=float,
+                        help="Seconds after which authorization sessions complete on their own")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible latencies and errors")
+    args = parser.parse_args(argv)
+
+    def split(option: str, convert: Callable[[str], Any]) -> Dict[str, Any]:
+        result = {}
+        for item in getattr(args, option):
+            action, _, value = item.partition("=")
+            if action not in ACTIONS or not value:
+                parser.error(f"Invalid --{option.replace('_', '-')}: {item}")
+            result[action] = convert(value)
+        return result
+
+    emulator = DataApiEmulator(
+        host=args.host, port=args.port, latency=args.latency,
+        latencies=split("action_latency", LatencyDistribution.parse),
+        error_rate=args.error_rate, error_rates=split("action_error_rate", float),
+        throttle_rate=args.throttle_rate, throttle_burst=args.throttle_burst,
+        authorization_rate=args.authorization_rate, auto_complete_after=args.auto_complete_after, seed=args.seed
+    )
+    print(f"Agent Identity data API emulator listening on {emulator.endpoint}", flush=True)
+    try:
+        emulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
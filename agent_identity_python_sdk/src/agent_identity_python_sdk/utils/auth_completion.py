@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .cache import TTLCache
+
+# Seconds during which a completed authorization session is remembered for pollers that start waiting late
+DEFAULT_COMPLETION_TTL = 60
+
+# Maximum number of remembered completed authorization sessions
+DEFAULT_MAX_COMPLETED_SESSIONS = 1000
+
+logger = logging.getLogger("agentidentity.utils.auth_completion")
+
+
+class AuthCompletionChannel(ABC):
+    """
+    Pluggable publish/subscribe transport for authorization completion notifications.
+
+    Implement it on top of a local message bus, for example Redis pub/sub or a socket shared
+    by the processes of one host, when the callback that confirms the authorization does not
+    run in the process that polls for the token.
+    """
+
+    @abstractmethod
+    def publish(self, session_uri: str):
+        """
+        Publish that the authorization session has been confirmed
+
+        Args:
+            session_uri: The session identifier returned from the GetResourceOAuth2Token call
+        """
+
+    @abstractmethod
+    def subscribe(self, callback: Callable[[str], None]):
+        """
+        Register a callback invoked, from any thread, with the session URI of each published notification
+
+        Args:
+            callback: Function to call with the session URI
+        """
+
+    def unsubscribe(self, callback: Callable[[str], None]):
+        """
+        Stop invoking a callback registered with subscribe, and release what the subscription holds,
+        for example a connection or a listener thread. Called when the channel is replaced.
+
+        Args:
+            callback: Function registered with subscribe
+        """
+
+
+class AuthCompletionNotifier:
+    """
+    Wakes up tasks waiting for an OAuth2 authorization session to be confirmed.
+
+    Waiters may run on different event loops and threads. A completion that arrives before a
+    waiter starts waiting is remembered for a short time, so the waiter returns immediately.
+    """
+
+    def __init__(self, completion_ttl: float = DEFAULT_COMPLETION_TTL,
+                 max_completed_sessions: int = DEFAULT_MAX_COMPLETED_SESSIONS):
+        self._lock = threading.Lock()
+        self._waiters: Dict[str, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._completed = TTLCache(max_size=max_completed_sessions, name="auth_completion")
+        self._completion_ttl = completion_ttl
+        self._channel: Optional[AuthCompletionChannel] = None
+
+    def set_channel(self, channel: Optional[AuthCompletionChannel]):
+        """
+        Set the channel used to exchange notifications with other processes
+
+        The previous channel, if any, is unsubscribed first, so its notifications stop waking waiters.
+
+        Args:
+            channel: The channel, or None to only notify waiters in this process
+        """
+        with self._lock:
+            previous, self._channel = self._channel, channel
+        if previous is not None:
+            try:
+                previous.unsubscribe(self._wake)
+            except Exception as e:
+                logger.warning("Failed to unsubscribe from the previous authorization completion channel: %s", e)
+        if channel is not None:
+            channel.subscribe(self._wake)
+
+    def notify(self, session_uri: str):
+        """
+        Notify waiters in this process, and through the channel in other processes, that a session was confirmed
+
+        Args:
+            session_uri: The session identifier returned from the GetResourceOAuth2Token call
+        """
+        self._wake(session_uri)
+        channel = self._channel
+        if channel is not None:
+            try:
+                channel.publish(session_uri)
+            except Exception as e:
+                logger.warning("Failed to publish authorization completion: %s", e)
+
+    async def wait(self, session_uri: str, timeout: float) -> bool:
+        """
+        Wait until the session is confirmed or the timeout passes
+
+        Args:
+            session_uri: The session identifier returned from the GetResourceOAuth2Token call
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            True if the session was confirmed, False on timeout
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if self._completed.get(session_uri):
+                return True
+            self._waiters.setdefault(session_uri, set()).add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                waiters = self._waiters.get(session_uri)
+                if waiters is not None:
+                    waiters.discard(waiter)
+                    if not waiters:
+                        del self._waiters[session_uri]
+
+    def _wake(self, session_uri: str):
+        with self._lock:
+            self._completed.set(session_uri, True, self._completion_ttl)
+            waiters = self._waiters.pop(session_uri, set())
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # The waiter's loop has been closed meanwhile
+                pass
+
+
+_notifier = AuthCompletionNotifier()
+
+
+def notify_auth_completed(session_uri: str):
+    """
+    Wake up pollers waiting for the OAuth2 token of a confirmed authorization session
+
+    IdentityClient.confirm_user_auth calls this automatically. Call it yourself when the
+    authorization is confirmed by other means.
+
+    Args:
+        session_uri: The session identifier returned from the GetResourceOAuth2Token call
+    """
+    _notifier.notify(session_uri)
+
+
+async def wait_for_auth_completion(session_uri: str, timeout: float) -> bool:
+    """
+    Wait until an authorization session is confirmed or the timeout passes
+
+    Args:
+        session_uri: The session identifier returned from the GetResourceOAuth2Token call
+        timeout: Maximum time to wait in seconds
+
+    Returns:
+        True if the session was confirmed, False on timeout
+    """
+    return await _notifier.wait(session_uri, timeout)
+
+
+def set_auth_completion_channel(channel: Optional[AuthCompletionChannel]):
+    """
+    Set the channel over which authorization completions are exchanged with other processes
+
+    Args:
+        channel: The channel, or None to only notify pollers in this process
+    """
+    _notifier.set_channel(channel)
@@ -0,0 +1,73 @@
+import random
+from abc import ABC, abstractmethod
+from typing import Iterator
+
+
+class BackoffStrategy(ABC):
+    """
+    Produces the delays to wait between consecutive attempts of an operation.
+    """
+
+    @abstractmethod
+    def delays(self) -> Iterator[float]:
+        """
+        Iterate over the delays between attempts
+
+        Returns:
+            An iterator yielding the delay in seconds before each retry, without end
+        """
+
+
+class FixedBackoff(BackoffStrategy):
+    """
+    Waits the same interval between all attempts.
+    """
+
+    def __init__(self, interval: float):
+        """
+        Args:
+            interval: Delay in seconds between attempts
+        """
+        if interval < 0:
+            raise ValueError("Interval must not be negative")
+        self.interval = interval
+
+    def delays(self) -> Iterator[float]:
+        while True:
+            yield self.interval
+
+
+class ExponentialBackoff(BackoffStrategy):
+    """
+    Starts with short delays that grow exponentially up to a cap, with random jitter.
+
+    The first attempts follow each other quickly, so that an operation that completes soon
+    is noticed soon, while long waits settle at the capped interval. Jitter spreads the
+    attempts of many concurrent callers over time.
+    """
+
+    def __init__(self, initial_interval: float = 0.5, multiplier: float = 1.5,
+                 max_interval: float = 5.0, jitter: float = 0.2):
+        """
+        Args:
+            initial_interval: Delay in seconds before the first retry
+            multiplier: Factor applied to the delay after each attempt
+            max_interval: Upper bound of the delay in seconds
+            jitter: Fraction between 0 and 1 by which each delay is randomly shortened
+        """
+        if initial_interval < 0 or max_interval < 0:
+            raise ValueError("Intervals must not be negative")
+        if multiplier < 1:
+            raise ValueError("Multiplier must be at least 1")
+        if not 0 <= jitter <= 1:
+            raise ValueError("Jitter must be in the range [0, 1]")
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+    def delays(self) -> Iterator[float]:
+        interval = min(self.initial_interval, self.max_interval)
+        while True:
+            yield interval * (1 - self.jitter * random.random())
+            interval = min(interval * self.multiplier, self.max_interval)
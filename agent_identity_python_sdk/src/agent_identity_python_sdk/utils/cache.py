@@ -1,67 +1,803 @@
+import asyncio
+import concurrent.futures
+import contextvars
 import threading
 import time
-from typing import Dict, Tuple, Optional
+from typing import Any, Awaitable, Callable, Optional, Tuple, TypeVar, Union
 from collections import OrderedDict
 
-from ..model.stscredential import STSCredential
+from ..model.stscredential import CompactSTSCredential, STSCredential
+from .cache_backends import CacheBackend
+from .metrics import CACHE_EVICTIONS, CACHE_EXPIRATIONS, CACHE_HITS, CACHE_MISSES, record_cache_event
+from .token import get_jwt_expiration
+
+T = TypeVar("T")
 
 # Default maximum number of cache entries
 DEFAULT_MAX_CACHE_SIZE = 100
 
-_sts_credential_cache: OrderedDict[str, Tuple[STSCredential, float]] = OrderedDict()
-_cache_lock = threading.RLock()
-_max_cache_size: int = DEFAULT_MAX_CACHE_SIZE
+# Seconds subtracted from a token's own expiry before it is considered stale
+DEFAULT_TOKEN_EXPIRY_MARGIN = 60
+
+# Time to live used for STS credentials whose expiration cannot be parsed
+DEFAULT_CREDENTIAL_TTL = 600
+
+# Seconds subtracted from an STS credential's expiration before it is considered stale
+DEFAULT_CREDENTIAL_EXPIRY_SKEW = 60
+
+# Fraction of an STS credential's cached lifetime, at the end of it, during which it is refreshed ahead of expiry
+DEFAULT_REFRESH_AHEAD_RATIO = 0.2
+
+# Time to live of cached API keys
+DEFAULT_API_KEY_TTL = 600
+
+# Time to live of cached OAuth2 access tokens whose expiry cannot be read from the token itself
+DEFAULT_OAUTH2_TOKEN_TTL = 300
+
+# Number of locks that serialize get_or_compute calls of an in-memory cache by key
+_COMPUTE_LOCK_STRIPES = 16
+
+# Seconds between checks that the event loop of a caller waiting for a computed cache entry is still running
+_LOOP_CHECK_INTERVAL = 1.0
+
+# Default number of independently locked segments of a ShardedTTLCache
+DEFAULT_CACHE_SEGMENTS = 16
+
+
+class _CacheEntry:
+    __slots__ = ("value", "expire_time", "refresh_time", "refreshing", "referenced")
+
+    def __init__(self, value: Any, expire_time: float, refresh_time: Optional[float]):
+        self.value = value
+        self.expire_time = expire_time
+        self.refresh_time = refresh_time
+        self.refreshing = False
+        self.referenced = False
+
+
+class TTLCache(CacheBackend):
+    """
+    Thread-safe LRU cache whose entries expire after a per-entry time to live.
+
+    This is the in-memory cache backend, used by default for all SDK credential caches.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_CACHE_SIZE, name: str = "default"):
+        """
+        Args:
+            max_size: Maximum number of cache entries
+            name: Name of the cache in metrics
+        """
+        self.name = name
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._lock = threading.RLock()
+        self._max_size = max_size
+        self._compute_locks = [threading.Lock() for _ in range(_COMPUTE_LOCK_STRIPES)]
+
+    def set_max_size(self, max_size: int):
+        """
+        Set the maximum number of entries, evicting least recently used entries if needed
+
+        Args:
+            max_size: Maximum number of cache entries
+        """
+        with self._lock:
+            self._max_size = max_size
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                record_cache_event(CACHE_EVICTIONS, self.name)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the cache
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value or None (if not found or expired)
+        """
+        with self._lock:
+            if key in self._entries:
+                entry = self._entries[key]
+                if time.time() < entry.expire_time:
+                    # Move to end (mark as recently used)
+                    self._entries.move_to_end(key)
+                    record_cache_event(CACHE_HITS, self.name)
+                    return entry.value
+                else:
+                    # Remove expired entry
+                    del self._entries[key]
+                    record_cache_event(CACHE_EXPIRATIONS, self.name)
+            record_cache_event(CACHE_MISSES, self.name)
+            return None
+
+    def set(self, key: str, value: Any, ttl: float, refresh_after: Optional[float] = None):
+        """
+        Store a value in the cache
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live (in seconds)
+            refresh_after: Seconds after which the entry is due for a refresh ahead of its expiry,
+                           or None to never refresh it ahead
+        """
+        with self._lock:
+            now = time.time()
+            refresh_time = now + refresh_after if refresh_after is not None else None
+            self._entries[key] = _CacheEntry(value, now + ttl, refresh_time)
+            self._entries.move_to_end(key)  # Mark as recently used
+
+            # If cache exceeds maximum size, remove least recently used entry
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                record_cache_event(CACHE_EVICTIONS, self.name)
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Claim the refresh of an entry that is due for a refresh ahead of its expiry
+
+        Only the first caller after the entry becomes due gets True, so a single refresh
+        runs while the still valid entry keeps being served. The claim is dropped once the
+        entry is replaced, or explicitly with release_refresh.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the caller should refresh the entry
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refreshing or entry.refresh_time is None:
+                return False
+            now = time.time()
+            if now < entry.refresh_time or now >= entry.expire_time:
+                return False
+            entry.refreshing = True
+            return True
+
+    def release_refresh(self, key: str):
+        """
+        Release a refresh claimed with claim_refresh that did not replace the entry
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def delete(self, key: str):
+        """
+        Remove a value from the cache, if present
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def namespace(self, name: str) -> "TTLCache":
+        """
+        Get a separate in-memory cache with the same maximum size
+
+        Args:
+            name: Namespace name, also used as the name of the cache in metrics
+
+        Returns:
+            TTLCache: A new, empty cache
+        """
+        return TTLCache(max_size=self._max_size, name=name)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple]) -> Any:
+        """
+        Get a value from the cache, or compute and store it if missing
+
+        Concurrent callers missing the same key wait for a single computation, without
+        blocking readers of other keys.
+
+        Args:
+            key: Cache key
+            compute: Function returning the value, its time to live in seconds and optionally
+                     the seconds after which it is due for a refresh ahead of its expiry
+
+        Returns:
+            The cached or computed value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._compute_locks[hash(key) % _COMPUTE_LOCK_STRIPES]:
+            value = self.get(key)
+            if value is None:
+                value = self._store_computed(key, compute())
+            return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _CacheSegment:
+    __slots__ = ("entries", "lock", "compute_lock", "max_size")
+
+    def __init__(self, max_size: int):
+        self.entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self.lock = threading.Lock()
+        self.compute_lock = threading.Lock()
+        self.max_size = max_size
+
+    def evict(self, name: str):
+        # Second-chance eviction: entries read since they were last considered are kept once more
+        while len(self.entries) > self.max_size:
+            key, entry = self.entries.popitem(last=False)
+            if entry.referenced and time.time() < entry.expire_time:
+                entry.referenced = False
+                self.entries[key] = entry
+            else:
+                record_cache_event(CACHE_EVICTIONS, name)
+
+
+class ShardedTTLCache(CacheBackend):
+    """
+    In-memory cache split into independently locked segments, for many threads reading concurrently.
+
+    Keys are spread over the segments by hash, each segment evicts its own least recently used
+    entries, so the maximum size is enforced approximately. Cache hits take no lock: instead of
+    reordering the segment, they mark the entry as referenced, and eviction gives referenced
+    entries a second chance.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_CACHE_SIZE, segments: int = DEFAULT_CACHE_SEGMENTS,
+                 name: str = "default"):
+        """
+        Args:
+            max_size: Maximum number of cache entries over all segments
+            segments: Number of segments, more segments reduce lock contention of writers
+            name: Name of the cache in metrics
+        """
+        if segments < 1:
+            raise ValueError("Number of segments must be at least 1")
+        self.name = name
+        self._max_size = max_size
+        self._segments = [_CacheSegment(self._segment_max_size(max_size, segments)) for _ in range(segments)]
+
+    @staticmethod
+    def _segment_max_size(max_size: int, segments: int) -> int:
+        return max(1, -(-max_size // segments))
+
+    def _segment(self, key: str) -> _CacheSegment:
+        return self._segments[hash(key) % len(self._segments)]
+
+    def set_max_size(self, max_size: int):
+        """
+        Set the maximum number of entries, evicting entries if needed
+
+        Args:
+            max_size: Maximum number of cache entries over all segments
+        """
+        self._max_size = max_size
+        segment_max_size = self._segment_max_size(max_size, len(self._segments))
+        for segment in self._segments:
+            with segment.lock:
+                segment.max_size = segment_max_size
+                segment.evict(self.name)
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the cache
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value or None (if not found or expired)
+        """
+        segment = self._segment(key)
+        entry = segment.entries.get(key)
+        if entry is None:
+            record_cache_event(CACHE_MISSES, self.name)
+            return None
+        if time.time() < entry.expire_time:
+            entry.referenced = True
+            record_cache_event(CACHE_HITS, self.name)
+            return entry.value
+        with segment.lock:
+            # Only remove the expired entry if it has not been replaced meanwhile
+            if segment.entries.get(key) is entry:
+                del segment.entries[key]
+                record_cache_event(CACHE_EXPIRATIONS, self.name)
+        record_cache_event(CACHE_MISSES, self.name)
+        return None
+
+    def set(self, key: str, value: Any, ttl: float, refresh_after: Optional[float] = None):
+        """
+        Store a value in the cache
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live (in seconds)
+            refresh_after: Seconds after which the entry is due for a refresh ahead of its expiry,
+                           or None to never refresh it ahead
+        """
+        now = time.time()
+        refresh_time = now + refresh_after if refresh_after is not None else None
+        entry = _CacheEntry(value, now + ttl, refresh_time)
+        segment = self._segment(key)
+        with segment.lock:
+            segment.entries[key] = entry
+            segment.entries.move_to_end(key)
+            segment.evict(self.name)
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Claim the refresh of an entry that is due for a refresh ahead of its expiry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the caller should refresh the entry
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            entry = segment.entries.get(key)
+            if entry is None or entry.refreshing or entry.refresh_time is None:
+                return False
+            now = time.time()
+            if now < entry.refresh_time or now >= entry.expire_time:
+                return False
+            entry.refreshing = True
+            return True
+
+    def release_refresh(self, key: str):
+        """
+        Release a refresh claimed with claim_refresh that did not replace the entry
+
+        Args:
+            key: Cache key
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            entry = segment.entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+
+    def delete(self, key: str):
+        """
+        Remove a value from the cache, if present
+
+        Args:
+            key: Cache key
+        """
+        segment = self._segment(key)
+        with segment.lock:
+            segment.entries.pop(key, None)
+
+    def clear(self):
+        """Remove all entries from the cache."""
+        for segment in self._segments:
+            with segment.lock:
+                segment.entries.clear()
+
+    def namespace(self, name: str) -> "ShardedTTLCache":
+        """
+        Get a separate sharded cache with the same maximum size and number of segments
+
+        Args:
+            name: Namespace name, also used as the name of the cache in metrics
+
+        Returns:
+            ShardedTTLCache: A new, empty cache
+        """
+        return ShardedTTLCache(max_size=self._max_size, segments=len(self._segments), name=name)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple]) -> Any:
+        """
+        Get a value from the cache, or compute and store it if missing
+
+        Concurrent callers missing the same key wait for a single computation, without
+        blocking readers.
+
+        Args:
+            key: Cache key
+            compute: Function returning the value, its time to live in seconds and optionally
+                     the seconds after which it is due for a refresh ahead of its expiry
+
+        Returns:
+            The cached or computed value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self._segment(key).compute_lock:
+            value = self.get(key)
+            if value is None:
+                value = self._store_computed(key, compute())
+            return value
+
+    def __len__(self) -> int:
+        return sum(len(segment.entries) for segment in self._segments)
+
+_sts_cache: CacheBackend = TTLCache(name="sts")
+_credential_expiry_skew: float = DEFAULT_CREDENTIAL_EXPIRY_SKEW
+_refresh_ahead_ratio: float = DEFAULT_REFRESH_AHEAD_RATIO
+
+_workload_access_token_cache: CacheBackend = TTLCache(name="workload")
+
+_api_key_cache: CacheBackend = TTLCache(name="apikey")
+_api_key_ttl: float = DEFAULT_API_KEY_TTL
+
+_oauth2_token_cache: CacheBackend = TTLCache(name="oauth2")
+_oauth2_token_ttl: float = DEFAULT_OAUTH2_TOKEN_TTL
+
+
+def set_cache_backend(backend: Optional[CacheBackend]):
+    """
+    Set the backend used by all SDK credential caches
+
+    Each kind of credential is stored in its own namespace of the backend. Entries cached
+    before the switch are not carried over.
+
+    Args:
+        backend: The cache backend, for example a ShardedTTLCache for many threads,
+                 a RedisCacheBackend shared by worker processes, or None to restore the default in-memory caches
+    """
+    global _sts_cache
+    global _workload_access_token_cache, _api_key_cache, _oauth2_token_cache
+    if backend is None:
+        backend = TTLCache()
+    _sts_cache = backend.namespace("sts")
+    _workload_access_token_cache = backend.namespace("workload")
+    _api_key_cache = backend.namespace("apikey")
+    _oauth2_token_cache = backend.namespace("oauth2")
+
+
+async def call_cache(func: Callable[..., T], *args: Any) -> T:
+    """
+    Call one of the cache functions of this module from a coroutine
+
+    Backends that wait on network I/O are called on a worker thread, so the event loop is not blocked.
+
+    Args:
+        func: Cache function, for example get_cached_api_key
+        *args: Arguments of the function
+
+    Returns:
+        The result of the function
+    """
+    if _sts_cache.blocking:
+        return await asyncio.to_thread(func, *args)
+    return func(*args)
+
+
+async def call_cache_compute(func: Callable[[str, Callable[[], T]], T], cache_key: str,
+                             fetch: Callable[[], Awaitable[T]]) -> T:
+    """
+    Call one of the get_or_compute functions of this module from a coroutine
+
+    With a backend shared by several processes, the backend's get_or_compute runs on its own thread
+    while the fetch runs on the caller's event loop, so that processes missing the same key fetch it once
+    and lock waits do not block the event loop. With an in-process backend, concurrent fetches are
+    already deduplicated by the callers, the credential is fetched and stored directly.
+
+    Args:
+        func: get_or_compute function, for example get_or_compute_api_key
+        cache_key: Cache key
+        fetch: Coroutine function fetching the credential if it is missing from the cache
+
+    Returns:
+        The cached or fetched credential
+    """
+    if not _sts_cache.shared:
+        value = await fetch()
+        return await call_cache(func, cache_key, lambda: value)
+
+    loop = asyncio.get_running_loop()
+    result = loop.create_future()
+    context = contextvars.copy_context()
+
+    def compute() -> T:
+        future = asyncio.run_coroutine_threadsafe(fetch(), loop)
+        # Give up if the caller's event loop is closed before running the fetch, rather than hold the lock forever
+        while not concurrent.futures.wait([future], timeout=_LOOP_CHECK_INTERVAL).done:
+            if loop.is_closed():
+                future.cancel()
+                raise RuntimeError("Event loop closed while fetching a credential")
+        return future.result()
+
+    def resolve(value: Any, error: Optional[BaseException]):
+        if not result.done():
+            if error is not None:
+                result.set_exception(error)
+            else:
+                result.set_result(value)
+
+    def run():
+        value, error = None, None
+        try:
+            value = context.run(func, cache_key, compute)
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(resolve, value, error)
+        except RuntimeError:
+            # The caller's event loop has been closed meanwhile
+            pass
+
+    # A thread per miss rather than a pool: computations wait on each other's fetches, which could exhaust a pool
+    threading.Thread(target=run, name="agentidentity-cache-compute", daemon=True).start()
+    return await result
+
 
 def set_max_cache_size(max_size: int):
     """
     Set the maximum size of the cache
-    
+
     Args:
         max_size: Maximum number of cache entries
     """
-    global _max_cache_size
-    with _cache_lock:
-        _max_cache_size = max_size
-        # If current cache exceeds the newly set maximum, remove excess entries
-        while len(_sts_credential_cache) > _max_cache_size:
-            _sts_credential_cache.popitem(last=False)
+    _sts_cache.set_max_size(max_size)
+
+def set_credential_expiry_skew(skew: float):
+    """
+    Set how long before its expiration an STS credential stops being served from the cache
+
+    Args:
+        skew: Skew in seconds
+    """
+    global _credential_expiry_skew
+    _credential_expiry_skew = skew
+
+def set_refresh_ahead_ratio(ratio: float):
+    """
+    Set the fraction of an STS credential's cached lifetime during which it is refreshed ahead of expiry
+
+    Args:
+        ratio: Ratio between 0 and 1, 0 disables refresh-ahead
+    """
+    global _refresh_ahead_ratio
+    if not 0 <= ratio < 1:
+        raise ValueError("Refresh-ahead ratio must be in the range [0, 1)")
+    _refresh_ahead_ratio = ratio
+
+def _credential_entry(credential: Union[STSCredential, CompactSTSCredential],
+                      ttl: Optional[float] = None) -> Tuple[CompactSTSCredential, float, Optional[float]]:
+    """Get a credential in its compact form, with its time to live and refresh-ahead delay in the cache."""
+    if isinstance(credential, STSCredential):
+        credential = CompactSTSCredential.from_sts_credential(credential)
+    if ttl is None:
+        expires_at = credential.expires_at
+        if expires_at is None:
+            ttl = DEFAULT_CREDENTIAL_TTL
+        else:
+            ttl = expires_at - _credential_expiry_skew - time.time()
+    refresh_after = ttl * (1 - _refresh_ahead_ratio) if _refresh_ahead_ratio > 0 else None
+    return credential, ttl, refresh_after
 
 def get_cached_credential(cache_key: str) -> Optional[STSCredential]:
     """
     Get credential from cache
-    
+
     Args:
         cache_key: Cache key
-        
+
     Returns:
         STSCredential object or None (if not found or expired)
     """
-    with _cache_lock:
-        if cache_key in _sts_credential_cache:
-            cached_credential, expire_time = _sts_credential_cache[cache_key]
-            if time.time() < expire_time:
-                # Move to end (mark as recently used)
-                _sts_credential_cache.move_to_end(cache_key)
-                return cached_credential
-            else:
-                # Remove expired entry
-                del _sts_credential_cache[cache_key]
-        return None
+    credential = _get_cached_compact_credential(cache_key)
+    return credential.to_sts_credential() if credential is not None else None
+
+def _get_cached_compact_credential(cache_key: str) -> Optional[CompactSTSCredential]:
+    """Get a credential from cache in the compact form it is stored in, without building an STSCredential."""
+    return _sts_cache.get(cache_key)
 
-def store_credential_in_cache(cache_key: str, credential: STSCredential, ttl: float = 600):
+def store_credential_in_cache(cache_key: str, credential: Union[STSCredential, CompactSTSCredential],
+                              ttl: Optional[float] = None):
     """
-    Store credential in cache
-    
+    Store credential in cache, in its compact form
+
     Args:
         cache_key: Cache key
         credential: Credential to cache
-        ttl: Time to live (in seconds), default is 600 seconds
-    """
-    with _cache_lock:
-        expire_time = time.time() + ttl
-        _sts_credential_cache[cache_key] = (credential, expire_time)
-        _sts_credential_cache.move_to_end(cache_key)  # Mark as recently used
-        
-        # If cache exceeds maximum size, remove least recently used entry
-        if len(_sts_credential_cache) > _max_cache_size:
-            _sts_credential_cache.popitem(last=False)
\ No newline at end of file
+        ttl: Time to live (in seconds). By default it is derived from the credential's expiration
+             minus the configured skew, or 600 seconds if the expiration cannot be parsed
+    """
+    credential, ttl, refresh_after = _credential_entry(credential, ttl)
+    if ttl > 0:
+        _sts_cache.set(cache_key, credential, ttl, refresh_after=refresh_after)
+
+def _get_or_compute_compact_credential(cache_key: str,
+                                       compute: Callable[[], Union[STSCredential, CompactSTSCredential]]
+                                       ) -> CompactSTSCredential:
+    """Get a credential from cache in its compact form, or fetch it with compute and store it if missing."""
+    return _sts_cache.get_or_compute(cache_key, lambda: _credential_entry(compute()))
+
+def claim_credential_refresh(cache_key: str) -> bool:
+    """
+    Claim the background refresh of a cached credential that is close to its expiration
+
+    Args:
+        cache_key: Cache key
+
+    Returns:
+        True if the caller should refresh the credential, the still valid credential keeps being served meanwhile
+    """
+    return _sts_cache.claim_refresh(cache_key)
+
+def release_credential_refresh(cache_key: str):
+    """
+    Release a refresh claimed with claim_credential_refresh that failed
+
+    Args:
+        cache_key: Cache key
+    """
+    _sts_cache.release_refresh(cache_key)
+
+def get_cached_workload_access_token(cache_key: str) -> Optional[str]:
+    """
+    Get workload access token from cache
+
+    Args:
+        cache_key: Cache key
+
+    Returns:
+        Workload access token or None (if not found or no longer fresh)
+    """
+    return _workload_access_token_cache.get(cache_key)
+
+def store_workload_access_token_in_cache(cache_key: str, token: str, expires_at: float,
+                                         margin: float = DEFAULT_TOKEN_EXPIRY_MARGIN):
+    """
+    Store workload access token in cache until shortly before it expires
+
+    Args:
+        cache_key: Cache key
+        token: Workload access token to cache
+        expires_at: Expiry of the token as a UNIX timestamp (the JWT ``exp`` claim)
+        margin: Seconds before expiry at which the token stops being served, default is 60 seconds
+    """
+    ttl = expires_at - margin - time.time()
+    if ttl > 0:
+        _workload_access_token_cache.set(cache_key, token, ttl)
+
+def get_or_compute_workload_access_token(cache_key: str, compute: Callable[[], str],
+                                         margin: float = DEFAULT_TOKEN_EXPIRY_MARGIN) -> str:
+    """
+    Get workload access token from cache, or fetch it and store it until shortly before it expires
+
+    Args:
+        cache_key: Cache key
+        compute: Function fetching the token, called once by concurrent callers missing the key
+        margin: Seconds before expiry at which the token stops being served, default is 60 seconds
+
+    Returns:
+        Workload access token, tokens without a readable expiry are not cached
+    """
+    def _compute() -> Tuple[str, float]:
+        token = compute()
+        expires_at = get_jwt_expiration(token)
+        return token, expires_at - margin - time.time() if expires_at is not None else 0
+
+    return _workload_access_token_cache.get_or_compute(cache_key, _compute)
+
+def set_api_key_cache_ttl(ttl: float):
+    """
+    Set how long API keys are served from the cache
+
+    Cached API keys are dropped when the time to live changes, so none is served longer than configured.
+
+    Args:
+        ttl: Time to live (in seconds), 0 disables API key caching
+    """
+    global _api_key_ttl
+    if ttl != _api_key_ttl:
+        _api_key_cache.clear()
+    _api_key_ttl = ttl
+
+def get_cached_api_key(cache_key: str) -> Optional[str]:
+    """
+    Get API key from cache
+
+    Args:
+        cache_key: Cache key
+
+    Returns:
+        API key or None (if not found or expired)
+    """
+    return _api_key_cache.get(cache_key)
+
+def store_api_key_in_cache(cache_key: str, api_key: str):
+    """
+    Store API key in cache for the configured time to live
+
+    Args:
+        cache_key: Cache key
+        api_key: API key to cache
+    """
+    if _api_key_ttl > 0:
+        _api_key_cache.set(cache_key, api_key, _api_key_ttl)
+
+def get_or_compute_api_key(cache_key: str, compute: Callable[[], str]) -> str:
+    """
+    Get API key from cache, or fetch it and store it for the configured time to live
+
+    Args:
+        cache_key: Cache key
+        compute: Function fetching the API key, called once by concurrent callers missing the key
+
+    Returns:
+        API key
+    """
+    return _api_key_cache.get_or_compute(cache_key, lambda: (compute(), _api_key_ttl))
+
+def invalidate_cached_api_key(cache_key: str):
+    """
+    Remove API key from cache, for example after the downstream service rejected it
+
+    Args:
+        cache_key: Cache key
+    """
+    _api_key_cache.delete(cache_key)
+
+def set_oauth2_token_cache_ttl(ttl: float):
+    """
+    Set how long OAuth2 access tokens without a readable expiry are served from the cache
+
+    Cached access tokens are dropped when the time to live changes, so none is served longer than configured.
+
+    Args:
+        ttl: Time to live (in seconds), 0 disables caching of such tokens
+    """
+    global _oauth2_token_ttl
+    if ttl != _oauth2_token_ttl:
+        _oauth2_token_cache.clear()
+    _oauth2_token_ttl = ttl
+
+def get_cached_oauth2_token(cache_key: str) -> Optional[str]:
+    """
+    Get OAuth2 access token from cache
+
+    Args:
+        cache_key: Cache key
+
+    Returns:
+        Access token or None (if not found or no longer fresh)
+    """
+    return _oauth2_token_cache.get(cache_key)
+
+def store_oauth2_token_in_cache(cache_key: str, access_token: str, expires_at: Optional[float] = None,
+                                margin: float = DEFAULT_TOKEN_EXPIRY_MARGIN):
+    """
+    Store OAuth2 access token in cache
+
+    Args:
+        cache_key: Cache key
+        access_token: Access token to cache
+        expires_at: Expiry of the token as a UNIX timestamp if known (the JWT ``exp`` claim),
+                    otherwise the configured time to live is used
+        margin: Seconds before expiry at which the token stops being served, default is 60 seconds
+    """
+    if expires_at is not None:
+        ttl = expires_at - margin - time.time()
+    else:
+        ttl = _oauth2_token_ttl
+    if ttl > 0:
+        _oauth2_token_cache.set(cache_key, access_token, ttl)
+
+def invalidate_cached_oauth2_token(cache_key: str):
+    """
+    Remove OAuth2 access token from cache, for example after the resource server rejected it
+
+    Args:
+        cache_key: Cache key
+    """
+    _oauth2_token_cache.delete(cache_key)
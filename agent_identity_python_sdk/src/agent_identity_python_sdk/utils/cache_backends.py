@@ -0,0 +1,330 @@
+import hashlib
+import json
+import logging
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Optional, Tuple
+
+from ..model.stscredential import CompactSTSCredential, STSCredential
+from .metrics import CACHE_HITS, CACHE_MISSES, record_cache_event
+
+logger = logging.getLogger("agentidentity.utils.cache_backends")
+
+
+class CacheBackend(ABC):
+    """
+    Storage for the SDK credential caches.
+
+    Values expire after a per-entry time to live. Implementations must be thread-safe.
+    """
+
+    # Name of the cache in metrics, set to the namespace name by namespace()
+    name: str = "default"
+
+    # True if operations wait on network I/O, asynchronous SDK code then calls them on a worker thread
+    blocking: bool = False
+
+    # True if entries are shared by several processes, credentials missing from the cache are then
+    # fetched through get_or_compute so that the processes fetch each of them once
+    shared: bool = False
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a value from the cache
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached value or None (if not found or expired)
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float, refresh_after: Optional[float] = None):
+        """
+        Store a value in the cache
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time to live (in seconds)
+            refresh_after: Seconds after which the entry is due for a refresh ahead of its expiry,
+                           or None to never refresh it ahead
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        """
+        Remove a value from the cache, if present
+
+        Args:
+            key: Cache key
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def clear(self):
+        """Remove all entries from the cache."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def namespace(self, name: str) -> "CacheBackend":
+        """
+        Get a backend for one kind of credential, whose keys do not collide with those of other namespaces
+
+        Args:
+            name: Namespace name
+
+        Returns:
+            CacheBackend: A backend storing its entries separately, possibly in the same underlying store
+        """
+        raise NotImplementedError
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple]) -> Any:
+        """
+        Get a value from the cache, or compute and store it if missing
+
+        Implementations make sure that concurrent callers missing the same key compute it once,
+        across processes for backends shared by several processes. This default implementation
+        does not, and should be overridden.
+
+        Args:
+            key: Cache key
+            compute: Function returning the value, its time to live in seconds and optionally
+                     the seconds after which it is due for a refresh ahead of its expiry
+
+        Returns:
+            The cached or computed value
+        """
+        value = self.get(key)
+        if value is None:
+            value = self._store_computed(key, compute())
+        return value
+
+    def _store_computed(self, key: str, computed: Tuple) -> Any:
+        value, ttl, *refresh_after = computed
+        if ttl > 0:
+            self.set(key, value, ttl, refresh_after=refresh_after[0] if refresh_after else None)
+        return value
+
+    def claim_refresh(self, key: str) -> bool:
+        """
+        Claim the refresh of an entry that is due for a refresh ahead of its expiry
+
+        Args:
+            key: Cache key
+
+        Returns:
+            True if the caller should refresh the entry, backends without refresh-ahead support return False
+        """
+        return False
+
+    def release_refresh(self, key: str):
+        """
+        Release a refresh claimed with claim_refresh that did not replace the entry
+
+        Args:
+            key: Cache key
+        """
+
+    def set_max_size(self, max_size: int):
+        """
+        Set the maximum number of entries, if the backend is bounded by the SDK
+
+        Args:
+            max_size: Maximum number of cache entries
+        """
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Cache backend storing entries in a server speaking the Redis protocol.
+
+    Worker processes pointed at the same server share fetched credentials. Any client with the
+    ``get``, ``set(name, value, px=..., nx=...)``, ``delete`` and ``scan_iter`` methods of redis-py
+    can be used, for example ``redis.Redis`` connected to Redis, Valkey or a local stand-in.
+    Errors of the server are logged and treated as cache misses, so credentials can still be fetched.
+
+    Cache keys are derived from workload access tokens and user tokens, so they are stored as SHA-256
+    digests: the key names on the server reveal no token. The client is synchronous, asynchronous SDK
+    code calls the backend on a worker thread so that the event loop is not blocked.
+
+    get_or_compute takes a lock key on the server, so workers missing the same key fetch it once.
+    """
+
+    blocking = True
+    shared = True
+
+    def __init__(self, client: Any, prefix: str = "agentidentity:", lock_timeout: float = 10.0,
+                 poll_interval: float = 0.05):
+        """
+        Args:
+            client: Redis client
+            prefix: Prefix of all keys written by the SDK
+            lock_timeout: Seconds after which a lock of get_or_compute is considered abandoned
+            poll_interval: Seconds between checks while another process computes a value
+        """
+        self._client = client
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisCacheBackend":
+        """
+        Create a backend connected with redis-py, which must be installed (``pip install agent-identity-python-sdk[redis]``)
+
+        Args:
+            url: Server URL, for example ``redis://localhost:6379/0``
+            **kwargs: Arguments of RedisCacheBackend
+
+        Returns:
+            RedisCacheBackend: The backend
+        """
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RedisCacheBackend.from_url requires the redis package, "
+                              "install it with: pip install agent-identity-python-sdk[redis]") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._get_entry(key)
+        record_cache_event(CACHE_HITS if entry is not None else CACHE_MISSES, self.name)
+        return entry[0] if entry is not None else None
+
+    def set(self, key: str, value: Any, ttl: float, refresh_after: Optional[float] = None):
+        ttl_ms = int(ttl * 1000)
+        if ttl_ms <= 0:
+            return
+        refresh_time = time.time() + refresh_after if refresh_after is not None else None
+        payload = json.dumps({"v": _encode(value), "r": refresh_time, "e": time.time() + ttl})
+        try:
+            self._client.set(self._key(key), payload, px=ttl_ms)
+            self._client.delete(self._key(key) + ":refresh")
+        except Exception as e:
+            logger.warning("Failed to store cache entry: %s", e)
+
+    def delete(self, key: str):
+        try:
+            self._client.delete(self._key(key))
+        except Exception as e:
+            logger.warning("Failed to delete cache entry: %s", e)
+
+    def clear(self):
+        try:
+            keys = list(self._client.scan_iter(match=self.prefix + "*"))
+            if keys:
+                self._client.delete(*keys)
+        except Exception as e:
+            logger.warning("Failed to clear cache: %s", e)
+
+    def namespace(self, name: str) -> "RedisCacheBackend":
+        backend = RedisCacheBackend(self._client, prefix=f"{self.prefix}{name}:", lock_timeout=self.lock_timeout,
+                                    poll_interval=self.poll_interval)
+        backend.name = name
+        return backend
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        lock_key = self._key(key) + ":lock"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_timeout
+        while True:
+            try:
+                acquired = self._client.set(lock_key, token, px=int(self.lock_timeout * 1000), nx=True)
+            except Exception as e:
+                logger.warning("Failed to lock cache entry: %s", e)
+                acquired = True
+                lock_key = None
+            if acquired:
+                try:
+                    value = self.get(key)
+                    if value is None:
+                        value = self._store_computed(key, compute())
+                    return value
+                finally:
+                    if lock_key is not None:
+                        self._unlock(lock_key, token)
+
+            # Another process computes the value, wait for it unless its lock has been abandoned
+            time.sleep(self.poll_interval)
+            entry = self._get_entry(key)
+            if entry is not None:
+                record_cache_event(CACHE_HITS, self.name)
+                return entry[0]
+            if time.monotonic() >= deadline:
+                return self._store_computed(key, compute())
+
+    def claim_refresh(self, key: str) -> bool:
+        entry = self._get_entry(key)
+        if entry is None:
+            return False
+        _, refresh_time, expire_time = entry
+        now = time.time()
+        if refresh_time is None or now < refresh_time or now >= expire_time:
+            return False
+        try:
+            return bool(self._client.set(self._key(key) + ":refresh", "1",
+                                         px=max(int((expire_time - now) * 1000), 1), nx=True))
+        except Exception as e:
+            logger.warning("Failed to claim cache entry refresh: %s", e)
+            return False
+
+    def release_refresh(self, key: str):
+        try:
+            self._client.delete(self._key(key) + ":refresh")
+        except Exception as e:
+            logger.warning("Failed to release cache entry refresh: %s", e)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def _get_entry(self, key: str) -> Optional[Tuple[Any, Optional[float], float]]:
+        try:
+            payload = self._client.get(self._key(key))
+        except Exception as e:
+            logger.warning("Failed to read cache entry: %s", e)
+            return None
+        if payload is None:
+            return None
+        try:
+            entry = json.loads(payload)
+            return _decode(entry["v"]), entry.get("r"), entry["e"]
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring malformed cache entry: %s", e)
+            return None
+
+    def _unlock(self, lock_key: str, token: str):
+        try:
+            # Only release the lock if it still belongs to this caller, it may have expired and been taken over
+            current = self._client.get(lock_key)
+            if current is not None and (current.decode() if isinstance(current, bytes) else current) == token:
+                self._client.delete(lock_key)
+        except Exception as e:
+            logger.warning("Failed to unlock cache entry: %s", e)
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, CompactSTSCredential):
+        return {"__compact_sts_credential__": [value.access_key_id, value.access_key_secret,
+                                               value.security_token, value.expires_at, value.expiration]}
+    if isinstance(value, STSCredential):
+        return {"__sts_credential__": value.model_dump()}
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "__compact_sts_credential__" in value:
+            return CompactSTSCredential(*value["__compact_sts_credential__"])
+        if "__sts_credential__" in value:
+            return STSCredential(**value["__sts_credential__"])
+    return value
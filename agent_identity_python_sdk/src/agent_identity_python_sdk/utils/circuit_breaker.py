@@ -0,0 +1,256 @@
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from .metrics import record_circuit_rejection, record_circuit_transition
+
+# Default number of consecutive failures that opens a circuit
+DEFAULT_FAILURE_THRESHOLD = 5
+
+# Default seconds a circuit stays open before letting a trial call through
+DEFAULT_RECOVERY_TIMEOUT = 30.0
+
+# Default number of trial calls let through at once while a circuit is half-open
+DEFAULT_HALF_OPEN_MAX_CALLS = 1
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an operation of the data API whose circuit is open.
+    """
+
+    # Error code, as reported in the metrics of the failed call
+    code = "CircuitOpen"
+
+    def __init__(self, endpoint: str, operation: str, retry_after: float):
+        """
+        Args:
+            endpoint: Endpoint of the data API
+            operation: Name of the operation
+            retry_after: Seconds until the circuit lets a trial call through
+        """
+        super().__init__(f"Circuit for {operation} on {endpoint} is open, "
+                         f"failing fast for another {retry_after:.1f} seconds")
+        self.endpoint = endpoint
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+def is_service_failure(error: BaseException) -> bool:
+    """
+    Tell whether an error indicates that the service is degraded
+
+    Args:
+        error: Error raised by a call of the data API
+
+    Returns:
+        True for server errors, throttling and errors without a response such as timeouts and connection
+        failures, False for client errors such as invalid parameters, which a healthy service also returns
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        data = getattr(error, "data", None)
+        status_code = data.get("statusCode") if isinstance(data, dict) else None
+    if status_code is None:
+        return True
+    return status_code >= 500 or status_code == 429
+
+
+class _Circuit:
+    __slots__ = ("state", "failures", "opened_at", "trials", "generation")
+
+    def __init__(self):
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trials = 0
+        # Incremented on every state change, so calls can tell whether the state they were admitted in still holds
+        self.generation = 0
+
+
+class CircuitBreaker:
+    """
+    Fails calls of the data API fast while an operation keeps failing, instead of letting every caller
+    wait for its own timeout.
+
+    Each endpoint and operation has its own circuit. A circuit opens after consecutive failures and
+    then rejects calls with CircuitOpenError. Once the recovery timeout has passed it becomes half-open
+    and lets trial calls through: a successful trial closes it, a failed one opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 recovery_timeout: float = DEFAULT_RECOVERY_TIMEOUT,
+                 half_open_max_calls: int = DEFAULT_HALF_OPEN_MAX_CALLS,
+                 is_failure: Callable[[BaseException], bool] = is_service_failure):
+        """
+        Args:
+            failure_threshold: Number of consecutive failures that opens a circuit
+            recovery_timeout: Seconds a circuit stays open before letting a trial call through
+            half_open_max_calls: Number of trial calls let through at once while a circuit is half-open
+            is_failure: Tells whether an error counts as a failure, other errors count as successes
+        """
+        if failure_threshold < 1 or half_open_max_calls < 1:
+            raise ValueError("Failure threshold and half-open calls must be at least 1")
+        if recovery_timeout < 0:
+            raise ValueError("Recovery timeout must not be negative")
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.is_failure = is_failure
+        self._lock = threading.Lock()
+        self._circuits: Dict[Tuple[str, str], _Circuit] = {}
+
+    def state(self, endpoint: str, operation: str) -> str:
+        """
+        Get the state of a circuit
+
+        Args:
+            endpoint: Endpoint of the data API
+            operation: Name of the operation
+
+        Returns:
+            One of "closed", "open" and "half_open"
+        """
+        with self._lock:
+            circuit = self._circuits.get((endpoint, operation))
+            return circuit.state if circuit is not None else CLOSED
+
+    def call(self, endpoint: str, operation: str, func: Callable[[], T]) -> T:
+        """
+        Call an operation through its circuit
+
+        Args:
+            endpoint: Endpoint of the data API
+            operation: Name of the operation
+            func: Function making the call
+
+        Returns:
+            The result of the function
+
+        Raises:
+            CircuitOpenError: If the circuit is open, the function is not called
+        """
+        generation = self._acquire(endpoint, operation)
+        try:
+            result = func()
+        except Exception as e:
+            self._release(endpoint, operation, generation, self.is_failure(e))
+            raise
+        except BaseException:
+            self._release(endpoint, operation, generation, None)
+            raise
+        self._release(endpoint, operation, generation, False)
+        return result
+
+    async def call_async(self, endpoint: str, operation: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call an asynchronous operation through its circuit
+
+        Args:
+            endpoint: Endpoint of the data API
+            operation: Name of the operation
+            func: Function returning the awaitable making the call
+
+        Returns:
+            The result of the call
+
+        Raises:
+            CircuitOpenError: If the circuit is open, the function is not called
+        """
+        generation = self._acquire(endpoint, operation)
+        try:
+            result = await func()
+        except Exception as e:
+            self._release(endpoint, operation, generation, self.is_failure(e))
+            raise
+        except BaseException:
+            # A cancelled call says nothing about the health of the service
+            self._release(endpoint, operation, generation, None)
+            raise
+        self._release(endpoint, operation, generation, False)
+        return result
+
+    def _acquire(self, endpoint: str, operation: str) -> int:
+        """Admit a call, returning the generation of the circuit state it was admitted in."""
+        with self._lock:
+            circuit = self._circuits.get((endpoint, operation))
+            if circuit is None:
+                circuit = self._circuits[(endpoint, operation)] = _Circuit()
+            if circuit.state == CLOSED:
+                return circuit.generation
+            if circuit.state == OPEN:
+                retry_after = circuit.opened_at + self.recovery_timeout - time.monotonic()
+                if retry_after > 0:
+                    record_circuit_rejection(endpoint, operation)
+                    raise CircuitOpenError(endpoint, operation, retry_after)
+                self._transition(circuit, endpoint, operation, HALF_OPEN)
+            if circuit.trials >= self.half_open_max_calls:
+                record_circuit_rejection(endpoint, operation)
+                raise CircuitOpenError(endpoint, operation, 0)
+            circuit.trials += 1
+            return circuit.generation
+
+    def _release(self, endpoint: str, operation: str, generation: int, failed: Optional[bool]):
+        with self._lock:
+            circuit = self._circuits[(endpoint, operation)]
+            if circuit.generation != generation:
+                # Calls admitted in an earlier state, for example while closed before the circuit opened
+                # and became half-open, are not trials of the current state and do not change it
+                return
+            if circuit.state == HALF_OPEN:
+                circuit.trials -= 1
+                if failed:
+                    self._open(circuit, endpoint, operation)
+                elif failed is not None:
+                    circuit.failures = 0
+                    self._transition(circuit, endpoint, operation, CLOSED)
+            elif circuit.state == CLOSED:
+                if failed:
+                    circuit.failures += 1
+                    if circuit.failures >= self.failure_threshold:
+                        self._open(circuit, endpoint, operation)
+                elif failed is not None:
+                    circuit.failures = 0
+
+    def _open(self, circuit: _Circuit, endpoint: str, operation: str):
+        circuit.opened_at = time.monotonic()
+        self._transition(circuit, endpoint, operation, OPEN)
+
+    @staticmethod
+    def _transition(circuit: _Circuit, endpoint: str, operation: str, state: str):
+        previous = circuit.state
+        circuit.state = state
+        circuit.generation += 1
+        if state != HALF_OPEN:
+            circuit.trials = 0
+        record_circuit_transition(endpoint, operation, previous, state)
+
+
+_circuit_breaker: Optional[CircuitBreaker] = None
+
+
+def set_circuit_breaker(circuit_breaker: Optional[CircuitBreaker]):
+    """
+    Set the circuit breaker guarding the calls of IdentityClient to the data API
+
+    Args:
+        circuit_breaker: The circuit breaker, or None to disable it (default)
+    """
+    global _circuit_breaker
+    _circuit_breaker = circuit_breaker
+
+
+def get_circuit_breaker() -> Optional[CircuitBreaker]:
+    """
+    Get the circuit breaker guarding the calls of IdentityClient to the data API
+
+    Returns:
+        The circuit breaker, or None if it is disabled
+    """
+    return _circuit_breaker
@@ -1,6 +1,9 @@
 import json
 import logging
-from pathlib import Path
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Tuple
 
 local_config_file = '.config.json'
 
@@ -9,40 +12,144 @@ logger.setLevel("INFO")
 if not logger.handlers:
     logger.addHandler(logging.StreamHandler())
 
+
+class LocalConfigStore:
+    """
+    In-memory view of a local JSON configuration file.
+
+    The file is parsed once and kept in memory. It is only read again when its modification
+    time, size or inode change, for example after another process rewrote it. Writes only
+    touch the file when a value actually changes, and replace it atomically, so concurrent
+    readers never observe a partially written file.
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._stamp: Optional[Tuple[int, int, int]] = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get a configuration value
+
+        Args:
+            key: The configuration key
+
+        Returns:
+            The configuration value, or None if the file or key does not exist
+        """
+        with self._lock:
+            self._reload_if_changed()
+            return self._data.get(key, None)
+
+    def set(self, key: str, value: Any):
+        """
+        Set a configuration value, writing the file only if the value changes
+
+        Args:
+            key: The configuration key
+            value: The configuration value
+        """
+        with self._lock:
+            self._reload_if_changed()
+            if key in self._data and self._data[key] == value:
+                return
+            data = dict(self._data)
+            data[key] = value
+            self._write(data)
+            self._data = data
+        logger.info(f"Wrote {key}: {value} to {self.file_path}")
+
+    def _reload_if_changed(self):
+        stamp = self._get_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+        self._stamp = stamp
+        self._data = self._load() if stamp is not None else {}
+
+    def _get_stamp(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+        except FileNotFoundError:
+            return {}
+        if not content:
+            return {}
+        try:
+            config_data = json.loads(content)
+        except json.JSONDecodeError:
+            return {}
+        return config_data if isinstance(config_data, dict) else {}
+
+    def _write(self, data: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.config.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            # mkstemp creates the file readable by the owner only, keep the permissions of the replaced file
+            try:
+                mode = os.stat(self.file_path).st_mode & 0o777
+            except FileNotFoundError:
+                mode = 0o644
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, self.file_path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._stamp = self._get_stamp()
+
+
+_stores: Dict[str, LocalConfigStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_local_config_store(file_path: str = local_config_file) -> LocalConfigStore:
+    """
+    Get the shared store of a local configuration file
+
+    Args:
+        file_path (str, optional): The path to the configuration file.
+                                  Defaults to local_config_file ('.config.json').
+
+    Returns:
+        LocalConfigStore: The store, shared by all callers using the same absolute path
+    """
+    path = os.path.abspath(file_path)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.setdefault(path, LocalConfigStore(path))
+    return store
+
+
 def write_local_config(key: str, value: str, file_path: str = local_config_file):
     """
     Write a key-value pair to the local configuration file.
-    
+
     Args:
         key (str): The configuration key to write
         value (str): The configuration value to write
-        file_path (str, optional): The path to the configuration file. 
+        file_path (str, optional): The path to the configuration file.
                                   Defaults to local_config_file ('.config.json').
-    
-    This function reads the existing configuration file (if it exists),
-    updates or adds the specified key-value pair, and writes the updated
-    configuration back to the file. If the file doesn't exist or is empty,
-    it creates a new configuration dictionary.
-    """
-    if Path(file_path).exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                content = f.read().strip()
-                if content:  # 检查文件是否为空
-                    config_data = json.loads(content)
-                else:
-                    config_data = {}
-            except json.JSONDecodeError:
-                config_data = {}
-    else:
-        config_data = {}
-
-    config_data[key] = value
-
-    with open(file_path, 'w', encoding='utf-8') as f:
-        json.dump(config_data, f, indent=2, ensure_ascii=False)
 
-    logger.info(f"Wrote {key}: {value} to {file_path}")
+    This function updates or adds the specified key-value pair in the configuration
+    and atomically replaces the file with the updated configuration. If the file doesn't
+    exist, is empty or invalid, it starts from an empty configuration. Nothing is written
+    if the key already has the given value.
+    """
+    get_local_config_store(file_path).set(key, value)
 
 
 def read_local_config(key: str, file_path: str = local_config_file):
@@ -54,17 +161,8 @@ def read_local_config(key: str, file_path: str = local_config_file):
         file_path (str, optional): The path to the configuration file.
                                   Defaults to local_config_file ('.config.json').
 
-    This function reads the configuration file and returns the value associated
-    with the specified key. If the file doesn't exist or the key doesn't exist,
-    it returns None.
+    This function returns the value associated with the specified key from the
+    in-memory configuration, which is loaded again only when the file changes.
+    If the file doesn't exist or the key doesn't exist, it returns None.
     """
-    if not Path(file_path).exists():
-        return None
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        try:
-            config_data = json.load(f)
-        except json.JSONDecodeError:
-            return None
-
-    return config_data.get(key, None)
+    return get_local_config_store(file_path).get(key)
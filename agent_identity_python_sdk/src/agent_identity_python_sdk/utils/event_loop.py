@@ -0,0 +1,167 @@
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import os
+import threading
+from typing import Any, Coroutine, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Seconds to wait for the background loop to finish pending work when shutting down
+DEFAULT_SHUTDOWN_TIMEOUT = 5
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_thread: Optional[threading.Thread] = None
+_lock = threading.Lock()
+_sync_timeout: Optional[float] = None
+
+
+def set_sync_timeout(timeout: Optional[float]):
+    """
+    Set how long synchronous callers wait for a coroutine run on the background loop
+
+    Args:
+        timeout: Timeout in seconds, None waits without limit (default)
+    """
+    global _sync_timeout
+    _sync_timeout = timeout
+
+
+def submit(coro: Coroutine[Any, Any, T]) -> "concurrent.futures.Future[T]":
+    """
+    Schedule a coroutine on the background event loop without waiting for it
+
+    The coroutine runs in a copy of the caller's context, so context variables such as
+    those of AgentIdentityContext are visible to it.
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        A future resolving to the result of the coroutine
+    """
+    # call_soon_threadsafe, used by run_coroutine_threadsafe, copies the calling thread's context
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop())
+
+
+def run_sync(coro: Coroutine[Any, Any, T], timeout: Optional[float] = None) -> T:
+    """
+    Run a coroutine on the background event loop and wait for its result
+
+    Synchronous callers share one long-lived loop thread instead of creating an event loop,
+    and possibly a thread, for every call.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Timeout in seconds, defaults to the value set with set_sync_timeout
+
+    Returns:
+        The result of the coroutine
+
+    Raises:
+        TimeoutError: If the coroutine did not finish in time, it is cancelled
+    """
+    if timeout is None:
+        timeout = _sync_timeout
+
+    if in_background_loop():
+        # Blocking the background loop on itself would deadlock, so run on a dedicated thread instead
+        ctx = contextvars.copy_context()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(ctx.run, asyncio.run, coro).result(timeout)
+
+    future = submit(coro)
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        if future.done():
+            # The coroutine itself raised a timeout
+            raise
+        future.cancel()
+        raise TimeoutError(f"Coroutine did not finish within {timeout} seconds") from None
+    except BaseException:
+        # For example KeyboardInterrupt while waiting, do not leave the coroutine running
+        future.cancel()
+        raise
+
+
+def in_background_loop() -> bool:
+    """
+    Check whether the caller runs on the background event loop thread
+
+    Blocking work done there stalls every synchronous caller, so it must be run on another thread.
+
+    Returns:
+        True if called from the background loop thread
+    """
+    return _thread is not None and threading.current_thread() is _thread
+
+
+def shutdown(timeout: float = DEFAULT_SHUTDOWN_TIMEOUT):
+    """
+    Cancel pending coroutines and stop the background event loop
+
+    The loop is started again by the next call to submit or run_sync.
+
+    Args:
+        timeout: Seconds to wait for the loop thread to finish
+    """
+    global _loop, _thread
+    with _lock:
+        loop, thread = _loop, _thread
+        _loop = _thread = None
+    if loop is None or loop.is_closed():
+        return
+
+    async def _cancel_pending():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    try:
+        asyncio.run_coroutine_threadsafe(_cancel_pending(), loop).result(timeout)
+    except (concurrent.futures.TimeoutError, RuntimeError):
+        pass
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout)
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop, _thread
+    loop = _loop
+    if loop is not None:
+        return loop
+    with _lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            thread = threading.Thread(target=_run_loop, args=(loop, started),
+                                      name="agentidentity-event-loop", daemon=True)
+            thread.start()
+            started.wait()
+            _loop, _thread = loop, thread
+        return _loop
+
+
+def _run_loop(loop: asyncio.AbstractEventLoop, started: threading.Event):
+    asyncio.set_event_loop(loop)
+    loop.call_soon(started.set)
+    try:
+        loop.run_forever()
+    finally:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+
+
+def _reset_after_fork():
+    # The loop thread does not exist in a forked child, start a new one on first use
+    global _loop, _thread, _lock
+    _loop = _thread = None
+    _lock = threading.Lock()
+
+
+atexit.register(shutdown)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
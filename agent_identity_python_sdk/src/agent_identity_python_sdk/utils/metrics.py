@@ -0,0 +1,369 @@
+import asyncio
+import functools
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+# Default upper bounds in seconds of the latency histogram buckets
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+API_CALLS = "agentidentity_api_calls_total"
+API_ERRORS = "agentidentity_api_errors_total"
+API_CANCELLATIONS = "agentidentity_api_cancellations_total"
+API_LATENCY = "agentidentity_api_latency_seconds"
+CACHE_HITS = "agentidentity_cache_hits_total"
+CACHE_MISSES = "agentidentity_cache_misses_total"
+CACHE_EVICTIONS = "agentidentity_cache_evictions_total"
+CACHE_EXPIRATIONS = "agentidentity_cache_expirations_total"
+OAUTH2_POLLS_IN_FLIGHT = "agentidentity_oauth2_polls_in_flight"
+CIRCUIT_BREAKER_OPEN = "agentidentity_circuit_breaker_open"
+CIRCUIT_BREAKER_TRANSITIONS = "agentidentity_circuit_breaker_transitions_total"
+CIRCUIT_BREAKER_REJECTIONS = "agentidentity_circuit_breaker_rejections_total"
+API_RETRIES = "agentidentity_api_retries_total"
+RETRY_BUDGET_EXHAUSTED = "agentidentity_retry_budget_exhausted_total"
+
+_HELP = {
+    API_CALLS: "Calls of IdentityClient API methods",
+    API_ERRORS: "Failed calls of IdentityClient API methods, by error code",
+    API_CANCELLATIONS: "Calls of IdentityClient API methods cancelled before they completed",
+    API_LATENCY: "Latency of IdentityClient API methods",
+    CACHE_HITS: "Lookups served from a credential cache",
+    CACHE_MISSES: "Lookups not served from a credential cache",
+    CACHE_EVICTIONS: "Entries removed from a credential cache to make room for new ones",
+    CACHE_EXPIRATIONS: "Entries removed from a credential cache after their time to live",
+    OAUTH2_POLLS_IN_FLIGHT: "OAuth2 token polls waiting for the user to authorize",
+    CIRCUIT_BREAKER_OPEN: "Whether the circuit of a data API operation is open (1) or not (0)",
+    CIRCUIT_BREAKER_TRANSITIONS: "State changes of data API circuits, by new state",
+    CIRCUIT_BREAKER_REJECTIONS: "Data API calls failed fast by an open circuit",
+    API_RETRIES: "Retries of failed data API calls",
+    RETRY_BUDGET_EXHAUSTED: "Failed data API calls not retried because the retry budget was exhausted",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable)
+
+
+class MetricsSink(ABC):
+    """
+    Receiver of the metrics recorded by the SDK.
+
+    Implement it to forward metrics to a monitoring system. Methods are called from any thread,
+    on the path of credential calls, so they should be fast and must not raise.
+    """
+
+    @abstractmethod
+    def increment(self, name: str, labels: Dict[str, str], value: float = 1):
+        """
+        Increase a counter
+
+        Args:
+            name: Metric name
+            labels: Label names and values
+            value: Amount to add
+        """
+
+    @abstractmethod
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        """
+        Record a sample of a histogram
+
+        Args:
+            name: Metric name
+            labels: Label names and values
+            value: Observed value, latencies are in seconds
+        """
+
+    @abstractmethod
+    def add(self, name: str, labels: Dict[str, str], value: float):
+        """
+        Add to a gauge, a negative value decreases it
+
+        Args:
+            name: Metric name
+            labels: Label names and values
+            value: Amount to add
+        """
+
+
+class PrometheusMetricsSink(MetricsSink):
+    """
+    Metrics sink keeping the metrics in memory, for exposition in the Prometheus text format.
+
+    Serve the output of ``expose()`` from a ``/metrics`` endpoint of the application.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        """
+        Args:
+            buckets: Upper bounds of the histogram buckets, in increasing order
+        """
+        self._buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._gauges: Dict[str, Dict[Labels, float]] = {}
+        # Per label set: count of each bucket (not cumulative), sum and count of the samples
+        self._histograms: Dict[str, Dict[Labels, List[float]]] = {}
+
+    def increment(self, name: str, labels: Dict[str, str], value: float = 1):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, labels: Dict[str, str], value: float):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = [0] * (len(self._buckets) + 1) + [0.0, 0]
+            index = len(self._buckets)
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    index = i
+                    break
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def add(self, name: str, labels: Dict[str, str], value: float):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._gauges.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def get(self, name: str, labels: Optional[Dict[str, str]] = None) -> float:
+        """
+        Get the current value of a counter or gauge, or the number of samples of a histogram
+
+        Args:
+            name: Metric name
+            labels: Label names and values
+
+        Returns:
+            The value, 0 if nothing was recorded
+        """
+        key = _label_key(labels or {})
+        with self._lock:
+            for metrics in (self._counters, self._gauges):
+                if name in metrics:
+                    return metrics[name].get(key, 0)
+            histogram = self._histograms.get(name, {}).get(key)
+            return histogram[-1] if histogram is not None else 0
+
+    def expose(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Returns:
+            The metrics, ending with a newline
+        """
+        lines = []
+        with self._lock:
+            for kind, metrics in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(metrics):
+                    _append_header(lines, name, kind)
+                    for key, value in sorted(metrics[name].items()):
+                        lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+            for name in sorted(self._histograms):
+                _append_header(lines, name, "histogram")
+                for key, histogram in sorted(self._histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self._buckets + (float("inf"),), histogram):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(histogram[-2])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram[-1]}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def _label_key(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _append_header(lines: List[str], name: str, kind: str):
+    if name in _HELP:
+        lines.append(f"# HELP {name} {_HELP[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _format_labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in key)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+_sink: Optional[MetricsSink] = None
+
+
+def set_metrics_sink(sink: Optional[MetricsSink]):
+    """
+    Set the sink receiving the metrics recorded by the SDK
+
+    Args:
+        sink: The metrics sink, or None to disable metrics (default)
+    """
+    global _sink
+    _sink = sink
+
+
+def get_metrics_sink() -> Optional[MetricsSink]:
+    """
+    Get the sink receiving the metrics recorded by the SDK
+
+    Returns:
+        The metrics sink, or None if metrics are disabled
+    """
+    return _sink
+
+
+def record_cache_event(name: str, cache: str):
+    """
+    Count an event of a cache, if metrics are enabled
+
+    Args:
+        name: Metric name, one of the CACHE_* constants
+        cache: Name of the cache
+    """
+    sink = _sink
+    if sink is not None:
+        sink.increment(name, {"cache": cache})
+
+
+def add_oauth2_polls_in_flight(value: int):
+    """
+    Adjust the number of OAuth2 token polls in flight, if metrics are enabled
+
+    Args:
+        value: 1 when a poll starts, -1 when it ends
+    """
+    sink = _sink
+    if sink is not None:
+        sink.add(OAUTH2_POLLS_IN_FLIGHT, {}, value)
+
+
+def record_circuit_transition(endpoint: str, operation: str, previous: str, state: str):
+    """
+    Record a state change of a circuit, if metrics are enabled
+
+    Args:
+        endpoint: Endpoint of the data API
+        operation: Name of the operation
+        previous: State the circuit leaves
+        state: State the circuit enters
+    """
+    sink = _sink
+    if sink is not None:
+        labels = {"endpoint": endpoint, "operation": operation}
+        sink.increment(CIRCUIT_BREAKER_TRANSITIONS, dict(labels, state=state))
+        if (previous == "open") != (state == "open"):
+            sink.add(CIRCUIT_BREAKER_OPEN, labels, 1 if state == "open" else -1)
+
+
+def record_circuit_rejection(endpoint: str, operation: str):
+    """
+    Count a call failed fast by an open circuit, if metrics are enabled
+
+    Args:
+        endpoint: Endpoint of the data API
+        operation: Name of the operation
+    """
+    sink = _sink
+    if sink is not None:
+        sink.increment(CIRCUIT_BREAKER_REJECTIONS, {"endpoint": endpoint, "operation": operation})
+
+
+def record_retry(operation: str):
+    """
+    Count a retry of a failed call, if metrics are enabled
+
+    Args:
+        operation: Name of the operation
+    """
+    sink = _sink
+    if sink is not None:
+        sink.increment(API_RETRIES, {"operation": operation})
+
+
+def record_retry_budget_exhausted(operation: str):
+    """
+    Count a failed call not retried because the retry budget was exhausted, if metrics are enabled
+
+    Args:
+        operation: Name of the operation
+    """
+    sink = _sink
+    if sink is not None:
+        sink.increment(RETRY_BUDGET_EXHAUSTED, {"operation": operation})
+
+
+def _error_code(error: BaseException) -> str:
+    # Errors of the Alibaba Cloud SDKs carry the error code of the service
+    code = getattr(error, "code", None)
+    return str(code) if code else type(error).__name__
+
+
+def _record_call(sink: MetricsSink, operation: str, start: float, error: Optional[BaseException]):
+    labels = {"operation": operation}
+    sink.increment(API_CALLS, labels)
+    if isinstance(error, asyncio.CancelledError):
+        # The caller gave up, for example on a timeout: neither a failure of the service nor a complete latency
+        sink.increment(API_CANCELLATIONS, labels)
+        return
+    sink.observe(API_LATENCY, labels, time.perf_counter() - start)
+    if error is not None:
+        sink.increment(API_ERRORS, {"operation": operation, "code": _error_code(error)})
+
+
+def instrumented(operation: str) -> Callable[[F], F]:
+    """
+    Record calls, errors and latency of an API method, synchronous or asynchronous
+
+    When metrics are disabled the method is called directly, after a single check.
+
+    Args:
+        operation: Name of the operation, used as the ``operation`` label
+    """
+
+    def decorator(func: F) -> F:
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                sink = _sink
+                if sink is None:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException as e:
+                    _record_call(sink, operation, start, e)
+                    raise
+                _record_call(sink, operation, start, None)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            sink = _sink
+            if sink is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                _record_call(sink, operation, start, e)
+                raise
+            _record_call(sink, operation, start, None)
+            return result
+
+        return sync_wrapper
+
+    return decorator
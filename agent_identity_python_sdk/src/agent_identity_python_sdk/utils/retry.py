@@ -0,0 +1,256 @@
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Collection, Iterator, Optional, TypeVar
+
+from .backoff import BackoffStrategy, ExponentialBackoff
+from .metrics import record_retry, record_retry_budget_exhausted
+
+# Error codes of the service worth retrying: throttling and transient server errors
+DEFAULT_RETRYABLE_CODES = frozenset({
+    "Throttling",
+    "Throttling.Api",
+    "Throttling.User",
+    "ServiceUnavailable",
+    "InternalError",
+    "RequestTimeout",
+})
+
+# HTTP status codes worth retrying whatever the error code, such as errors of gateways in front of the service
+DEFAULT_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+# Default number of attempts of a call, the first one included
+DEFAULT_MAX_ATTEMPTS = 3
+
+# Default longest delay in seconds before a retry, including delays asked for by throttling errors
+DEFAULT_MAX_DELAY = 5.0
+
+T = TypeVar("T")
+
+
+class RetryBudget:
+    """
+    Caps the retries of the process to a fraction of its calls, so that retries cannot amplify an outage.
+
+    Every call deposits ``ratio`` tokens and every retry withdraws one. Tokens also accrue at
+    ``min_retries_per_second``, so that a process making few calls can still retry them. The
+    balance is capped at ``max_tokens``, which bounds the burst of retries when an outage starts.
+    """
+
+    def __init__(self, ratio: float = 0.1, min_retries_per_second: float = 1.0, max_tokens: float = 10.0):
+        """
+        Args:
+            ratio: Retries allowed per call, between 0 and 1
+            min_retries_per_second: Retries allowed per second regardless of the number of calls
+            max_tokens: Largest number of retries that can be saved up
+        """
+        if not 0 <= ratio <= 1:
+            raise ValueError("Ratio must be in the range [0, 1]")
+        if min_retries_per_second < 0 or max_tokens < 0:
+            raise ValueError("Retries per second and maximum tokens must not be negative")
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.max_tokens = max_tokens
+        self._lock = threading.Lock()
+        self._tokens = max_tokens
+        self._updated_at = time.monotonic()
+
+    def record_call(self):
+        """Deposit the share of retries earned by a call."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self._tokens + self.ratio, self.max_tokens)
+
+    def try_spend(self) -> bool:
+        """
+        Withdraw a retry from the budget
+
+        Returns:
+            True if the retry may be made, False if the budget is exhausted
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._updated_at) * self.min_retries_per_second, self.max_tokens)
+        self._updated_at = now
+
+
+class RetryPolicy:
+    """
+    Declares which failed calls of the data API are retried, how long to wait before each retry and
+    how many retries the process may make.
+
+    A call is retried when it fails with a retryable error code or HTTP status code, or without a
+    response, such as on a timeout or connection failure, while attempts remain and the retry budget
+    allows it. Throttling errors are retried no sooner than the service asks for.
+    """
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                 retryable_codes: Collection[str] = DEFAULT_RETRYABLE_CODES,
+                 retryable_status_codes: Collection[int] = DEFAULT_RETRYABLE_STATUS_CODES,
+                 retry_network_errors: bool = True,
+                 backoff: Optional[BackoffStrategy] = None,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 budget: Optional[RetryBudget] = None):
+        """
+        Args:
+            max_attempts: Number of attempts of a call, the first one included, 1 disables retries
+            retryable_codes: Error codes of the service that are retried
+            retryable_status_codes: HTTP status codes that are retried whatever the error code
+            retry_network_errors: Whether calls failing without a response are retried
+            backoff: Strategy for the delays between attempts, defaults to exponential backoff with jitter
+                     starting at 0.2 seconds and capped at 2 seconds
+            max_delay: Longest delay in seconds before a retry, errors asking to wait longer are not retried
+            budget: Retry budget shared by the calls using this policy, defaults to a budget allowing
+                    retries of 10% of the calls
+        """
+        if max_attempts < 1:
+            raise ValueError("Maximum attempts must be at least 1")
+        if max_delay < 0:
+            raise ValueError("Maximum delay must not be negative")
+        self.max_attempts = max_attempts
+        self.retryable_codes = frozenset(retryable_codes)
+        self.retryable_status_codes = frozenset(retryable_status_codes)
+        self.retry_network_errors = retry_network_errors
+        self.backoff = backoff or ExponentialBackoff(initial_interval=0.2, multiplier=2, max_interval=2, jitter=0.5)
+        self.max_delay = max_delay
+        self.budget = budget or RetryBudget()
+
+    def is_retryable(self, error: BaseException) -> bool:
+        """
+        Tell whether an error is worth retrying, regardless of attempts and budget
+
+        Args:
+            error: Error raised by a call of the data API
+
+        Returns:
+            True if the error is retryable
+        """
+        if getattr(error, "code", None) in self.retryable_codes:
+            return True
+        if getattr(error, "status_code", None) in self.retryable_status_codes:
+            return True
+        return self.retry_network_errors and _is_network_error(error)
+
+    def allow_retry(self, operation: str, error: BaseException) -> bool:
+        """
+        Tell whether a failed call may be retried, withdrawing the retry from the budget if so
+
+        Args:
+            operation: Name of the operation, used in metrics
+            error: Error raised by the call
+
+        Returns:
+            True if the error is retryable and the budget allows a retry
+        """
+        if not self.is_retryable(error):
+            return False
+        if not self.budget.try_spend():
+            record_retry_budget_exhausted(operation)
+            return False
+        record_retry(operation)
+        return True
+
+    def call(self, operation: str, func: Callable[[], T]) -> T:
+        """
+        Call an operation, retrying it according to the policy
+
+        Args:
+            operation: Name of the operation, used in metrics
+            func: Function making the call
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            Exception: The error of the last attempt
+        """
+        self.budget.record_call()
+        delays = self.backoff.delays()
+        attempt = 1
+        while True:
+            try:
+                return func()
+            except Exception as e:
+                delay = self._retry_delay(operation, e, attempt, delays)
+                if delay is None:
+                    raise
+            time.sleep(delay)
+            attempt += 1
+
+    async def call_async(self, operation: str, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Call an asynchronous operation, retrying it according to the policy
+
+        Args:
+            operation: Name of the operation, used in metrics
+            func: Function returning the awaitable making the call
+
+        Returns:
+            The result of the first successful attempt
+
+        Raises:
+            Exception: The error of the last attempt
+        """
+        self.budget.record_call()
+        delays = self.backoff.delays()
+        attempt = 1
+        while True:
+            try:
+                return await func()
+            except Exception as e:
+                delay = self._retry_delay(operation, e, attempt, delays)
+                if delay is None:
+                    raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _retry_delay(self, operation: str, error: Exception, attempt: int, delays: Iterator[float]) -> Optional[float]:
+        if attempt >= self.max_attempts or not self.is_retryable(error):
+            return None
+        delay = next(delays)
+        retry_after = getattr(error, "retry_after", None)
+        if retry_after and getattr(error, "status_code", None) == 429:
+            # Throttling errors of the Alibaba Cloud SDKs carry the time left in milliseconds
+            delay = max(delay, retry_after / 1000)
+        if delay > self.max_delay or not self.allow_retry(operation, error):
+            return None
+        return delay
+
+
+def _is_network_error(error: BaseException) -> bool:
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    # The Alibaba Cloud SDKs wrap errors raised before a response was received, such as
+    # connection failures and read timeouts, in UnretryableException once their own retries are exhausted
+    return any(cls.__name__ == "UnretryableException" for cls in type(error).__mro__)
+
+
+_retry_policy = RetryPolicy()
+
+
+def set_retry_policy(retry_policy: RetryPolicy):
+    """
+    Set the policy for retrying the calls of IdentityClient to the data API
+
+    Args:
+        retry_policy: The retry policy, RetryPolicy(max_attempts=1) disables retries
+    """
+    global _retry_policy
+    _retry_policy = retry_policy
+
+
+def get_retry_policy() -> RetryPolicy:
+    """
+    Get the policy for retrying the calls of IdentityClient to the data API
+
+    Returns:
+        The retry policy
+    """
+    return _retry_policy
@@ -0,0 +1,454 @@
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+from .cache_backends import CacheBackend, _decode, _encode
+from .metrics import CACHE_EVICTIONS, CACHE_EXPIRATIONS, CACHE_HITS, CACHE_MISSES, record_cache_event
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger("agentidentity.utils.shared_memory_cache")
+
+# Default number of slots, each holding one cache entry
+DEFAULT_SLOT_COUNT = 1024
+
+# Default size in bytes of a slot, large enough for an STS credential
+DEFAULT_SLOT_SIZE = 4096
+
+# Number of slots examined for a key before the entry closest to expiry is evicted
+_PROBES = 8
+
+# Number of times a reader retries a slot that is being written
+_READ_RETRIES = 100
+
+# Number of locks serializing the writers of this process, by slot
+_LOCK_STRIPES = 64
+
+_MAGIC = b"AIDCACHE"
+_VERSION = 1
+_FILE_HEADER = struct.Struct("<8sIII")
+_FILE_HEADER_SIZE = 64
+# seq, key hash, expire time, refresh time (NaN if none), refresh claimed until, payload length, payload CRC32
+_SLOT_HEADER = struct.Struct("<QQdddII")
+
+
+def _default_path() -> str:
+    """Path of the backing file in a directory only the current user can access.
+
+    The per-user runtime directory is used when there is one, otherwise a private directory is
+    created in the temporary directory. A directory created by another user is refused.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "agentidentity-cache")
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    directory = os.path.join(tempfile.gettempdir(), f"agentidentity-{uid}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or (hasattr(os, "getuid") and info.st_uid != uid) or info.st_mode & 0o077:
+        raise PermissionError(f"{directory} is not a private directory of the current user, refusing to use it")
+    return os.path.join(directory, "cache")
+
+
+def _check_private(fd: int, path: str):
+    """Refuse a backing file another user could have created, read or written."""
+    info = os.fstat(fd)
+    if not stat.S_ISREG(info.st_mode):
+        raise PermissionError(f"{path} is not a regular file, refusing to use it")
+    if hasattr(os, "getuid") and info.st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user, refusing to use it")
+    if os.name == "posix" and info.st_mode & 0o077:
+        raise PermissionError(f"{path} is accessible by other users, refusing to use it")
+
+
+def _pread(fd: int, length: int, offset: int) -> bytes:
+    if hasattr(os, "pread"):
+        return os.pread(fd, length, offset)
+    os.lseek(fd, offset, os.SEEK_SET)
+    return os.read(fd, length)
+
+
+def _pwrite(fd: int, data: bytes, offset: int):
+    if hasattr(os, "pwrite"):
+        os.pwrite(fd, data, offset)
+    else:
+        os.lseek(fd, offset, os.SEEK_SET)
+        os.write(fd, data)
+
+
+class _SharedRegion:
+    """Memory-mapped file holding the slots, shared by all processes that open it."""
+
+    def __init__(self, path: str, slot_count: int, slot_size: int):
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"Slot size must be larger than {_SLOT_HEADER.size} bytes")
+        self.path = path
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        size = _FILE_HEADER_SIZE + slot_count * slot_size
+
+        # Credentials are stored in the file, only the owner may read it. A symbolic link or a file
+        # planted by another user at the path is refused rather than followed or trusted.
+        flags = os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_BINARY", 0)
+        self._fd = os.open(path, flags, 0o600)
+        try:
+            _check_private(self._fd, path)
+            self._lock_range(0, 1)
+            try:
+                if os.fstat(self._fd).st_size == 0:
+                    os.ftruncate(self._fd, size)
+                    _pwrite(self._fd, _FILE_HEADER.pack(_MAGIC, _VERSION, slot_count, slot_size), 0)
+                header = _pread(self._fd, _FILE_HEADER.size, 0)
+            finally:
+                self._unlock_range(0, 1)
+            magic, version, existing_count, existing_size = _FILE_HEADER.unpack(header)
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f"{path} is not a shared memory credential cache")
+            if (existing_count, existing_size) != (slot_count, slot_size):
+                raise ValueError(f"{path} was created with {existing_count} slots of {existing_size} bytes, "
+                                 f"not {slot_count} slots of {slot_size} bytes")
+            self.mm = mmap.mmap(self._fd, size)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._reset_locks()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_locks)
+
+    def _reset_locks(self):
+        # Locks held by other threads at fork time would never be released in the child
+        self._thread_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+        self._compute_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+    def close(self):
+        self.mm.close()
+        os.close(self._fd)
+
+    def slot_offset(self, index: int) -> int:
+        return _FILE_HEADER_SIZE + index * self.slot_size
+
+    @contextmanager
+    def write_lock(self, index: int) -> Iterator[None]:
+        """Exclusive lock of a slot against writers of this and other processes."""
+        with self._thread_locks[index % _LOCK_STRIPES]:
+            offset = self.slot_offset(index)
+            self._lock_range(offset, 1)
+            try:
+                yield
+            finally:
+                self._unlock_range(offset, 1)
+
+    @contextmanager
+    def compute_lock(self, index: int) -> Iterator[None]:
+        """Exclusive lock serializing get_or_compute for keys whose first slot is index."""
+        with self._compute_locks[index % _LOCK_STRIPES]:
+            # Lock a byte past the end of the file, so computing does not block writers of the slot
+            offset = _FILE_HEADER_SIZE + self.slot_count * self.slot_size + index
+            self._lock_range(offset, 1)
+            try:
+                yield
+            finally:
+                self._unlock_range(offset, 1)
+
+    def _lock_range(self, offset: int, length: int):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, length, offset)
+
+    def _unlock_range(self, offset: int, length: int):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, offset)
+
+
+class _Slot:
+    __slots__ = ("index", "key_hash", "expire_time", "refresh_time", "claim_until", "key_digest", "namespace", "value")
+
+    def __init__(self, index, key_hash, expire_time, refresh_time, claim_until, key_digest, namespace, value):
+        self.index = index
+        self.key_hash = key_hash
+        self.expire_time = expire_time
+        self.refresh_time = refresh_time
+        self.claim_until = claim_until
+        self.key_digest = key_digest
+        self.namespace = namespace
+        self.value = value
+
+
+class SharedMemoryCacheBackend(CacheBackend):
+    """
+    Cache backend storing entries in a memory-mapped file shared by the processes of one host.
+
+    A credential fetched by one worker process is visible to the others immediately, without an
+    external service. Entries live in fixed-size slots. Readers never lock: every slot carries a
+    sequence number that writers make odd while they write, so readers retry instead of reading a
+    partially written entry. Writers of a slot exclude each other with a thread lock and a file
+    range lock. On platforms without ``fcntl`` only threads of one process are excluded.
+
+    A slot left mid-write by a writer that died is cleared by the next reader or writer of the slot.
+    Cache keys are derived from workload access tokens and user tokens, so slots only hold a digest of them.
+    get_or_compute holds a file range lock while computing, so processes missing the same key fetch it once.
+    """
+
+    shared = True
+
+    def __init__(self, path: Optional[str] = None, slot_count: int = DEFAULT_SLOT_COUNT,
+                 slot_size: int = DEFAULT_SLOT_SIZE, *, _region: Optional[_SharedRegion] = None,
+                 _prefix: str = ""):
+        """
+        Args:
+            path: Path of the backing file, created if missing. All processes sharing the cache must
+                  use the same path, slot count and slot size. The file must belong to the current user
+                  and be inaccessible to others. Defaults to a file in $XDG_RUNTIME_DIR, or else in a
+                  private directory of the current user in the temporary directory.
+            slot_count: Maximum number of entries
+            slot_size: Size in bytes of a slot, larger entries are not cached
+        """
+        if _region is None:
+            if path is None:
+                path = _default_path()
+            _region = _SharedRegion(path, slot_count, slot_size)
+        self._region = _region
+        self._prefix = _prefix
+
+    def close(self):
+        """Unmap the backing file, the cache must not be used afterwards."""
+        self._region.close()
+
+    def get(self, key: str) -> Optional[Any]:
+        slot = self._find(self._prefix + key)
+        record_cache_event(CACHE_HITS if slot is not None else CACHE_MISSES, self.name)
+        return slot.value if slot is not None else None
+
+    def set(self, key: str, value: Any, ttl: float, refresh_after: Optional[float] = None):
+        if ttl <= 0:
+            return
+        full_key = self._prefix + key
+        digest = _digest(full_key)
+        payload = json.dumps({"k": digest, "n": self._prefix, "v": _encode(value)}).encode("utf-8")
+        if len(payload) > self._region.slot_size - _SLOT_HEADER.size:
+            logger.debug("Entry of %d bytes does not fit in a cache slot", len(payload))
+            return
+        now = time.time()
+        refresh_time = now + refresh_after if refresh_after is not None else math.nan
+        key_hash = _hash(full_key)
+
+        index = self._choose_slot(digest, key_hash, now)
+        with self._region.write_lock(index):
+            self._write(index, key_hash, now + ttl, refresh_time, 0.0, payload)
+        # Another process may have written the same key to another slot meanwhile, keep only this one
+        for slot in self._scan(full_key):
+            if slot.index != index:
+                self._clear_slot(slot.index, digest)
+
+    def delete(self, key: str):
+        full_key = self._prefix + key
+        for slot in self._scan(full_key):
+            self._clear_slot(slot.index, slot.key_digest)
+
+    def clear(self):
+        for index in range(self._region.slot_count):
+            slot = self._read(index)
+            if slot is not None and slot.namespace.startswith(self._prefix):
+                self._clear_slot(index, slot.key_digest)
+
+    def namespace(self, name: str) -> "SharedMemoryCacheBackend":
+        backend = SharedMemoryCacheBackend(_region=self._region, _prefix=f"{self._prefix}{name}:")
+        backend.name = name
+        return backend
+
+    def get_or_compute(self, key: str, compute: Callable[[], Tuple]) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+        full_key = self._prefix + key
+        with self._region.compute_lock(_hash(full_key) % self._region.slot_count):
+            value = self.get(key)
+            if value is None:
+                value = self._store_computed(key, compute())
+            return value
+
+    def claim_refresh(self, key: str) -> bool:
+        full_key = self._prefix + key
+        found = self._find(full_key)
+        if found is None:
+            return False
+        with self._region.write_lock(found.index):
+            slot = self._read(found.index, locked=True)
+            now = time.time()
+            if slot is None or slot.key_digest != found.key_digest or now >= slot.expire_time:
+                return False
+            if math.isnan(slot.refresh_time) or now < slot.refresh_time or now < slot.claim_until:
+                return False
+            self._write_claim(slot.index, slot.expire_time)
+            return True
+
+    def release_refresh(self, key: str):
+        full_key = self._prefix + key
+        found = self._find(full_key)
+        if found is None:
+            return
+        with self._region.write_lock(found.index):
+            slot = self._read(found.index, locked=True)
+            if slot is not None and slot.key_digest == found.key_digest:
+                self._write_claim(slot.index, 0.0)
+
+    def _probe(self, key_hash: int) -> List[int]:
+        count = self._region.slot_count
+        return [(key_hash + i) % count for i in range(min(_PROBES, count))]
+
+    def _scan(self, full_key: str) -> List[_Slot]:
+        key_hash = _hash(full_key)
+        digest = _digest(full_key)
+        slots = []
+        for index in self._probe(key_hash):
+            slot = self._read(index, key_hash)
+            if slot is not None and slot.key_digest == digest:
+                slots.append(slot)
+        return slots
+
+    def _find(self, full_key: str) -> Optional[_Slot]:
+        now = time.time()
+        found = None
+        for slot in self._scan(full_key):
+            if now < slot.expire_time:
+                found = found or slot
+            elif self._clear_slot(slot.index, slot.key_digest, expired_at=now):
+                # Whichever process clears the expired slot first reports the expiration, once
+                record_cache_event(CACHE_EXPIRATIONS, self.name)
+        return found
+
+    def _choose_slot(self, digest: str, key_hash: int, now: float) -> int:
+        free = None
+        oldest = None
+        for index in self._probe(key_hash):
+            slot = self._read(index)
+            if slot is not None and slot.key_digest == digest:
+                return index
+            if slot is None or now >= slot.expire_time:
+                if free is None:
+                    free = index
+            elif oldest is None or slot.expire_time < oldest[1]:
+                oldest = (index, slot.expire_time)
+        if free is not None:
+            return free
+        record_cache_event(CACHE_EVICTIONS, self.name)
+        return oldest[0]
+
+    def _read(self, index: int, key_hash: Optional[int] = None, locked: bool = False) -> Optional[_Slot]:
+        mm = self._region.mm
+        offset = self._region.slot_offset(index)
+        for _ in range(_READ_RETRIES):
+            seq, slot_hash, expire_time, refresh_time, claim_until, length, crc = _SLOT_HEADER.unpack_from(mm, offset)
+            if seq & 1:
+                if locked:
+                    # No writer can be active while the write lock is held, the last one died mid-write
+                    return None
+                # A writer is updating the slot
+                time.sleep(0)
+                continue
+            if slot_hash == 0 or (key_hash is not None and slot_hash != key_hash):
+                return None
+            start = offset + _SLOT_HEADER.size
+            payload = mm[start:start + length]
+            if _SLOT_HEADER.unpack_from(mm, offset)[0] != seq:
+                continue
+            if zlib.crc32(payload) != crc:
+                continue
+            try:
+                entry = json.loads(payload)
+                value = _decode(entry["v"])
+            except (ValueError, KeyError, TypeError):
+                return None
+            return _Slot(index, slot_hash, expire_time, refresh_time, claim_until, entry["k"], entry.get("n", ""), value)
+        if not locked and self._recover(index):
+            return self._read(index, key_hash)
+        return None
+
+    def _recover(self, index: int) -> bool:
+        """Clear a slot whose writer died mid-write, leaving its sequence number odd.
+
+        A live writer holds the write lock of the slot, and the range lock of a process is released
+        when it dies, so a slot still being written once the lock is acquired was abandoned.
+        """
+        with self._region.write_lock(index):
+            offset = self._region.slot_offset(index)
+            if not _SLOT_HEADER.unpack_from(self._region.mm, offset)[0] & 1:
+                return False
+            logger.warning("Clearing cache slot %d left partially written", index)
+            seq = self._begin_write(offset)
+            _SLOT_HEADER.pack_into(self._region.mm, offset, seq, 0, 0.0, math.nan, 0.0, 0, 0)
+            struct.pack_into("<Q", self._region.mm, offset, seq + 1)
+            return True
+
+    def _begin_write(self, offset: int) -> int:
+        """Mark a slot as being written, returning the odd sequence number to write its header with."""
+        mm = self._region.mm
+        seq = _SLOT_HEADER.unpack_from(mm, offset)[0]
+        # An odd sequence number under the write lock was left by a writer that died mid-write
+        seq += seq & 1
+        struct.pack_into("<Q", mm, offset, seq + 1)
+        return seq + 1
+
+    def _write(self, index: int, key_hash: int, expire_time: float, refresh_time: float, claim_until: float,
+               payload: bytes):
+        mm = self._region.mm
+        offset = self._region.slot_offset(index)
+        seq = self._begin_write(offset)
+        mm[offset + _SLOT_HEADER.size:offset + _SLOT_HEADER.size + len(payload)] = payload
+        _SLOT_HEADER.pack_into(mm, offset, seq, key_hash, expire_time, refresh_time, claim_until,
+                               len(payload), zlib.crc32(payload))
+        struct.pack_into("<Q", mm, offset, seq + 1)
+
+    def _write_claim(self, index: int, claim_until: float):
+        mm = self._region.mm
+        offset = self._region.slot_offset(index)
+        header = list(_SLOT_HEADER.unpack_from(mm, offset))
+        seq = self._begin_write(offset)
+        header[0] = seq
+        header[4] = claim_until
+        _SLOT_HEADER.pack_into(mm, offset, *header)
+        struct.pack_into("<Q", mm, offset, seq + 1)
+
+    def _clear_slot(self, index: int, digest: str, expired_at: Optional[float] = None) -> bool:
+        """Clear the slot of a key, only if it has expired at the given time if one is given.
+
+        Returns True if the slot was cleared, False if it holds another key or has been replaced meanwhile.
+        """
+        with self._region.write_lock(index):
+            slot = self._read(index, locked=True)
+            if slot is None or slot.key_digest != digest:
+                return False
+            if expired_at is not None and expired_at < slot.expire_time:
+                return False
+            mm = self._region.mm
+            offset = self._region.slot_offset(index)
+            seq = self._begin_write(offset)
+            _SLOT_HEADER.pack_into(mm, offset, seq, 0, 0.0, math.nan, 0.0, 0, 0)
+            struct.pack_into("<Q", mm, offset, seq + 1)
+            return True
+
+
+def _digest(key: str) -> str:
+    # Stored in the slot to tell keys of equal hash apart, so the key itself is never written to the file
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _hash(key: str) -> int:
+    # Non-zero 64-bit hash, stable across processes unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
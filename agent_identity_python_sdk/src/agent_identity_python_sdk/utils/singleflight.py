@@ -0,0 +1,75 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Awaitable, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent fetches of the same key.
+
+    The first caller for a key runs the fetch; every caller that arrives while it is
+    in flight awaits the same result instead of calling the backend again. In-flight
+    calls are tracked with thread-safe futures, so callers running on different event
+    loops (for example synchronous functions driven by ``asyncio.run`` on worker threads)
+    share a fetch as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, concurrent.futures.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``fn`` unless a fetch for ``key`` is already in flight, and return its result
+
+        Args:
+            key: Key identifying the fetch
+            fn: Coroutine function performing the fetch
+
+        Returns:
+            The result of the (possibly shared) fetch
+        """
+        while True:
+            with self._lock:
+                future = self._calls.get(key)
+                leader = future is None
+                if leader:
+                    future = concurrent.futures.Future()
+                    self._calls[key] = future
+
+            if leader:
+                return await self._lead(key, future, fn)
+
+            try:
+                # Shield the shared future so that a cancelled follower does not cancel it for everyone
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except asyncio.CancelledError:
+                if future.cancelled():
+                    # The leader was cancelled, retry and possibly take over the fetch
+                    continue
+                raise
+
+    async def _lead(self, key: str, future: concurrent.futures.Future, fn: Callable[[], Awaitable[T]]) -> T:
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def in_flight(self) -> int:
+        """Return the number of fetches currently in flight."""
+        with self._lock:
+            return len(self._calls)
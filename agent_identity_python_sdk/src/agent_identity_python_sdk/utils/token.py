@@ -0,0 +1,48 @@
+import base64
+import binascii
+import json
+from typing import Any, Dict, Optional
+
+
+def decode_jwt_payload(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Decode the payload of a JWT without verifying its signature.
+
+    The result must only be used for local bookkeeping such as cache freshness,
+    never for authorization decisions.
+
+    Args:
+        token: The JWT in compact serialization
+
+    Returns:
+        The decoded claims, or None if the token is not a well-formed JWT
+    """
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    payload = parts[1]
+    payload += '=' * (-len(payload) % 4)
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (binascii.Error, ValueError):
+        return None
+    return claims if isinstance(claims, dict) else None
+
+
+def get_jwt_expiration(token: str) -> Optional[float]:
+    """
+    Get the expiry of a JWT from its ``exp`` claim.
+
+    Args:
+        token: The JWT in compact serialization
+
+    Returns:
+        The expiry as a UNIX timestamp, or None if it cannot be determined
+    """
+    claims = decode_jwt_payload(token)
+    if not claims:
+        return None
+    exp = claims.get('exp')
+    if isinstance(exp, bool) or not isinstance(exp, (int, float)):
+        return None
+    return float(exp)
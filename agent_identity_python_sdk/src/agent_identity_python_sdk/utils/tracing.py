@@ -0,0 +1,128 @@
+from abc import ABC, abstractmethod
+from typing import Any, ContextManager, Dict, Optional
+
+# Name of the instrumentation scope of the spans emitted by the SDK
+INSTRUMENTATION_NAME = "agent_identity_python_sdk"
+
+
+class Span(ABC):
+    """
+    Span of one stage of credential resolution.
+
+    Spans of the SDK are used as context managers by the tracer that created them.
+    """
+
+    @abstractmethod
+    def set_attribute(self, key: str, value: Any):
+        """
+        Set an attribute of the span
+
+        Args:
+            key: Attribute name
+            value: Attribute value, a string, boolean or number
+        """
+
+
+class Tracer(ABC):
+    """
+    Creates the spans emitted by the SDK.
+
+    Implement it to send spans to a tracing system other than OpenTelemetry. A span must become
+    the current span of the calling context while it is open, so that spans of later stages nest
+    under it, and must record exceptions raised while it is open.
+    """
+
+    @abstractmethod
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager[Span]:
+        """
+        Start a span as a child of the current span
+
+        Args:
+            name: Span name
+            attributes: Initial attributes of the span
+
+        Returns:
+            A context manager that yields the span and ends it on exit
+        """
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer emitting the spans of the SDK through the OpenTelemetry API.
+
+    Spans nest under the caller's current OpenTelemetry span, including when decorated synchronous
+    functions run the credential resolution on the SDK's background event loop.
+    """
+
+    def __init__(self, tracer: Any = None):
+        """
+        Args:
+            tracer: An OpenTelemetry tracer. If not specified, the tracer of the global tracer provider
+                    is used, which requires the opentelemetry-api package
+                    (``pip install agent-identity-python-sdk[opentelemetry]``)
+        """
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError("OpenTelemetryTracer requires the opentelemetry-api package, "
+                                  "install it with: pip install agent-identity-python-sdk[opentelemetry]") from e
+            tracer = trace.get_tracer(INSTRUMENTATION_NAME)
+        self._tracer = tracer
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager[Span]:
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+
+class _NoOpSpan(Span):
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self) -> "_NoOpSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """
+    Set the tracer creating the spans of the SDK
+
+    Args:
+        tracer: The tracer, for example an OpenTelemetryTracer, or None to disable tracing (default)
+    """
+    global _tracer
+    _tracer = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Get the tracer creating the spans of the SDK
+
+    Returns:
+        The tracer, or None if tracing is disabled
+    """
+    return _tracer
+
+
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> ContextManager[Span]:
+    """
+    Start a span of a credential resolution stage, or a shared no-op span if tracing is disabled
+
+    Args:
+        name: Span name
+        attributes: Initial attributes of the span
+
+    Returns:
+        A context manager that yields the span and ends it on exit
+    """
+    tracer = _tracer
+    if tracer is None:
+        return _NOOP_SPAN
+    return tracer.start_span(name, attributes)
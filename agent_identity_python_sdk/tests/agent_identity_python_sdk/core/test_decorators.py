@@ -1,5 +1,10 @@
 """Tests for the decorators module."""
+import asyncio
+import base64
+import json
 import os
+import threading
+import time
 from unittest.mock import Mock, patch, MagicMock, AsyncMock
 
 import pytest
@@ -12,9 +17,15 @@ from agent_identity_python_sdk.core.decorators import (
     requires_workload_access_token,
     _get_workload_access_token,
     _get_workload_access_token_local,
-    _has_running_loop
+    _get_workload_token_cache_key,
+    _get_api_key_cache_key,
+    _get_access_token_cache_key,
+    invalidate_api_key,
+    invalidate_access_token
 )
+from agent_identity_python_sdk.context import AgentIdentityContext
 from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.utils.cache import _api_key_cache, _oauth2_token_cache, _workload_access_token_cache
 
 os.environ.setdefault("AGENT_IDENTITY_REGION_ID", "cn-beijing")
 os.environ.setdefault("ALIBABA_CLOUD_ACCESS_KEY_ID", "mock-akid")
@@ -34,19 +45,55 @@ class TestGetRegion:
             assert get_region() == "cn-beijing"
 
 
-class TestHasRunningLoop:
-    """Test cases for _has_running_loop function."""
+class TestLazyIdentityClient:
+    """Test cases for resolving the shared IdentityClient on first call instead of at decoration time."""
 
-    def test_has_running_loop_false(self):
-        """Test _has_running_loop when no event loop is running."""
-        # This test runs in a thread without an event loop
-        assert _has_running_loop() is False
+    def test_decoration_does_not_create_client(self):
+        """Test that decorating functions does not create any IdentityClient."""
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_get_client:
+            @requires_access_token(credential_provider_name="test-provider")
+            def oauth_tool(access_token):
+                return access_token
+
+            @requires_api_key(credential_provider_name="test-provider")
+            def api_key_tool(api_key):
+                return api_key
+
+            @requires_sts_token()
+            def sts_tool(sts_credential):
+                return sts_credential
+
+            @requires_workload_access_token()
+            def workload_tool(workload_access_token):
+                return workload_access_token
+
+            mock_get_client.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_has_running_loop_true(self):
-        """Test _has_running_loop when event loop is running."""
-        # This test runs in an async context with an event loop
-        assert _has_running_loop() is True
+    async def test_decorated_functions_share_client(self):
+        """Test that functions decorated in the same region use the shared client for that region."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_REGION_ID": "cn-hangzhou"}), \
+             patch('agent_identity_python_sdk.core.decorators.get_identity_client',
+                   return_value=mock_identity_client) as mock_get_client, \
+             patch('agent_identity_python_sdk.core.decorators._get_workload_access_token',
+                   return_value="workload-token"), \
+             patch('agent_identity_python_sdk.core.decorators._get_api_key_cache_key', return_value=None):
+
+            @requires_api_key(credential_provider_name="provider-a")
+            async def tool_a(api_key):
+                return api_key
+
+            @requires_api_key(credential_provider_name="provider-b")
+            async def tool_b(api_key):
+                return api_key
+
+            assert await tool_a() == "api-key"
+            assert await tool_b() == "api-key"
+            assert mock_get_client.call_args_list == [(("cn-hangzhou",),), (("cn-hangzhou",),)]
 
 
 class TestRequiresAccessToken:
@@ -60,7 +107,7 @@ class TestRequiresAccessToken:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
             with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
@@ -91,27 +138,26 @@ class TestRequiresAccessToken:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_access_token(
-                        credential_provider_name="test-provider",
-                        inject_param_name="access_token",
-                        auth_flow="USER_FEDERATION"
-                    )
-                    def sample_function(access_token):
-                        return f"Token: {access_token}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="access_token",
+                    auth_flow="USER_FEDERATION"
+                )
+                def sample_function(access_token):
+                    return f"Token: {access_token}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Token: access-token"
-                    mock_identity_client.get_token.assert_called_once()
+                # Verify
+                assert result == "Token: access-token"
+                mock_identity_client.get_token.assert_called_once()
 
     def test_requires_access_token_with_scopes(self):
         """Test requires_access_token decorator with scopes."""
@@ -120,31 +166,30 @@ class TestRequiresAccessToken:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_access_token(
-                        credential_provider_name="test-provider",
-                        inject_param_name="access_token",
-                        scopes=["read", "write"],
-                        auth_flow="USER_FEDERATION"
-                    )
-                    def sample_function(access_token):
-                        return f"Token: {access_token}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="access_token",
+                    scopes=["read", "write"],
+                    auth_flow="USER_FEDERATION"
+                )
+                def sample_function(access_token):
+                    return f"Token: {access_token}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Token: access-token"
-                    mock_identity_client.get_token.assert_called_once()
-                    # Verify that scopes were passed to get_token
-                    call_args = mock_identity_client.get_token.call_args
-                    assert call_args.kwargs['scopes'] == ["read", "write"]
+                # Verify
+                assert result == "Token: access-token"
+                mock_identity_client.get_token.assert_called_once()
+                # Verify that scopes were passed to get_token
+                call_args = mock_identity_client.get_token.call_args
+                assert call_args.kwargs['scopes'] == ["read", "write"]
 
     def test_requires_access_token_with_custom_parameters(self):
         """Test requires_access_token decorator with custom parameters."""
@@ -153,65 +198,59 @@ class TestRequiresAccessToken:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_access_token(
-                        credential_provider_name="test-provider",
-                        inject_param_name="access_token",
-                        auth_flow="USER_FEDERATION",
-                        custom_parameters={"param1": "value1"}
-                    )
-                    def sample_function(access_token):
-                        return f"Token: {access_token}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="access_token",
+                    auth_flow="USER_FEDERATION",
+                    custom_parameters={"param1": "value1"}
+                )
+                def sample_function(access_token):
+                    return f"Token: {access_token}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Token: access-token"
-                    mock_identity_client.get_token.assert_called_once()
-                    # Verify that custom_parameters were passed to get_token
-                    call_args = mock_identity_client.get_token.call_args
-                    assert call_args.kwargs['custom_parameters'] == {"param1": "value1"}
+                # Verify
+                assert result == "Token: access-token"
+                mock_identity_client.get_token.assert_called_once()
+                # Verify that custom_parameters were passed to get_token
+                call_args = mock_identity_client.get_token.call_args
+                assert call_args.kwargs['custom_parameters'] == {"param1": "value1"}
 
-    def test_requires_access_token_async_in_async_env(self):
-        """Test requires_access_token decorator with sync function in async environment."""
+    @pytest.mark.asyncio
+    async def test_requires_access_token_async_in_async_env(self):
+        """Test requires_access_token decorator with sync function called while an event loop is running."""
         # Setup mocks
         mock_identity_client = Mock()
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=True):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
-
-                    with patch('concurrent.futures.ThreadPoolExecutor') as mock_executor:
-                        mock_future = MagicMock()
-                        mock_future.result.return_value = "access-token"
-                        mock_executor.return_value.__enter__.return_value.submit.return_value = mock_future
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                        @requires_access_token(
-                            credential_provider_name="test-provider",
-                            inject_param_name="access_token",
-                            auth_flow="USER_FEDERATION"
-                        )
-                        def sample_function(access_token):
-                            return f"Token: {access_token}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="access_token",
+                    auth_flow="USER_FEDERATION"
+                )
+                def sample_function(access_token):
+                    return f"Token: {access_token}"
 
-                        # Execute
-                        result = sample_function()
+                # Execute
+                result = sample_function()
 
-                        # Verify
-                        assert result == "Token: access-token"
-                        mock_executor.return_value.__enter__.return_value.submit.assert_called_once()
+                # Verify
+                assert result == "Token: access-token"
+                mock_identity_client.get_token.assert_called_once()
 
 
 class TestRequiresApiKey:
@@ -225,7 +264,7 @@ class TestRequiresApiKey:
         mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
             with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
@@ -252,59 +291,53 @@ class TestRequiresApiKey:
         mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_api_key(
-                        credential_provider_name="test-provider",
-                        inject_param_name="api_key"
-                    )
-                    def sample_function(api_key):
-                        return f"API Key: {api_key}"
+                @requires_api_key(
+                    credential_provider_name="test-provider",
+                    inject_param_name="api_key"
+                )
+                def sample_function(api_key):
+                    return f"API Key: {api_key}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "API Key: api-key"
-                    mock_identity_client.get_api_key.assert_called_once()
+                # Verify
+                assert result == "API Key: api-key"
+                mock_identity_client.get_api_key.assert_called_once()
 
-    def test_requires_api_key_async_in_async_env(self):
-        """Test requires_api_key decorator with sync function in async environment."""
+    @pytest.mark.asyncio
+    async def test_requires_api_key_async_in_async_env(self):
+        """Test requires_api_key decorator with sync function called while an event loop is running."""
         # Setup mocks
         mock_identity_client = Mock()
         mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=True):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
-
-                    with patch('concurrent.futures.ThreadPoolExecutor') as mock_executor:
-                        mock_future = MagicMock()
-                        mock_future.result.return_value = "api-key"
-                        mock_executor.return_value.__enter__.return_value.submit.return_value = mock_future
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                        @requires_api_key(
-                            credential_provider_name="test-provider",
-                            inject_param_name="api_key"
-                        )
-                        def sample_function(api_key):
-                            return f"API Key: {api_key}"
+                @requires_api_key(
+                    credential_provider_name="test-provider",
+                    inject_param_name="api_key"
+                )
+                def sample_function(api_key):
+                    return f"API Key: {api_key}"
 
-                        # Execute
-                        result = sample_function()
+                # Execute
+                result = sample_function()
 
-                        # Verify
-                        assert result == "API Key: api-key"
-                        mock_executor.return_value.__enter__.return_value.submit.assert_called_once()
+                # Verify
+                assert result == "API Key: api-key"
+                mock_identity_client.get_api_key.assert_called_once()
 
 
 class TestRequiresStsToken:
@@ -323,7 +356,7 @@ class TestRequiresStsToken:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
             with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
@@ -354,25 +387,24 @@ class TestRequiresStsToken:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="sts_credential"
-                    )
-                    def sample_function(sts_credential):
-                        return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential"
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "STS Credential: test-access-key-id"
-                    mock_identity_client.assume_role_for_workload_identity.assert_called_once()
+                # Verify
+                assert result == "STS Credential: test-access-key-id"
+                mock_identity_client.assume_role_for_workload_identity.assert_called_once()
 
     def test_requires_sts_token_with_session_duration(self):
         """Test requires_sts_token decorator with custom session duration."""
@@ -386,27 +418,26 @@ class TestRequiresStsToken:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="sts_credential",
-                        session_duration=7200  # 2 hours
-                    )
-                    def sample_function(sts_credential):
-                        return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential",
+                    session_duration=7200  # 2 hours
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "STS Credential: test-access-key-id"
-                    call_args = mock_identity_client.assume_role_for_workload_identity.call_args
-                    assert call_args.kwargs['duration_seconds'] == 7200
+                # Verify
+                assert result == "STS Credential: test-access-key-id"
+                call_args = mock_identity_client.assume_role_for_workload_identity.call_args
+                assert call_args.kwargs['duration_seconds'] == 7200
 
     def test_requires_sts_token_with_policy(self):
         """Test requires_sts_token decorator with custom policy."""
@@ -420,30 +451,30 @@ class TestRequiresStsToken:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="sts_credential",
-                        policy='{"Version": "1"}'
-                    )
-                    def sample_function(sts_credential):
-                        return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential",
+                    policy='{"Version": "1"}'
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "STS Credential: test-access-key-id"
-                    call_args = mock_identity_client.assume_role_for_workload_identity.call_args
-                    assert call_args.kwargs['policy'] == '{"Version": "1"}'
+                # Verify
+                assert result == "STS Credential: test-access-key-id"
+                call_args = mock_identity_client.assume_role_for_workload_identity.call_args
+                assert call_args.kwargs['policy'] == '{"Version": "1"}'
 
-    def test_requires_sts_token_async_in_async_env(self):
-        """Test requires_sts_token decorator with sync function in async environment."""
+    @pytest.mark.asyncio
+    async def test_requires_sts_token_async_in_async_env(self):
+        """Test requires_sts_token decorator with sync function called while an event loop is running."""
         # Setup mocks
         mock_identity_client = Mock()
         mock_sts_credential = STSCredential(
@@ -454,30 +485,24 @@ class TestRequiresStsToken:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=True):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
-
-                    with patch('concurrent.futures.ThreadPoolExecutor') as mock_executor:
-                        mock_future = MagicMock()
-                        mock_future.result.return_value = mock_sts_credential
-                        mock_executor.return_value.__enter__.return_value.submit.return_value = mock_future
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                        @requires_sts_token(
-                            inject_param_name="sts_credential"
-                        )
-                        def sample_function(sts_credential):
-                            return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential"
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                        # Execute
-                        result = sample_function()
+                # Execute
+                result = sample_function()
 
-                        # Verify
-                        assert result == "STS Credential: test-access-key-id"
-                        mock_executor.return_value.__enter__.return_value.submit.assert_called_once()
+                # Verify
+                assert result == "STS Credential: test-access-key-id"
+                mock_identity_client.assume_role_for_workload_identity.assert_called_once()
 
 
 class TestGetWorkloadAccessToken:
@@ -529,7 +554,7 @@ class TestRequriesWorkloadAccessToken:
         # Setup mocks
         mock_identity_client = Mock()
         
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
             
             with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
@@ -552,46 +577,44 @@ class TestRequriesWorkloadAccessToken:
         # Setup mocks
         mock_identity_client = Mock()
         
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
             
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-access-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-access-token"
 
-                    @requires_workload_access_token(inject_param_name="workload_token")
-                    def sample_function(workload_token):
-                        return f"Workload Token: {workload_token}"
+                @requires_workload_access_token(inject_param_name="workload_token")
+                def sample_function(workload_token):
+                    return f"Workload Token: {workload_token}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Workload Token: workload-access-token"
-                    mock_get_token.assert_called_once()
+                # Verify
+                assert result == "Workload Token: workload-access-token"
+                mock_get_token.assert_called_once()
 
     def test_requires_workload_access_token_default_param_name(self):
         """Test requires_workload_access_token decorator with default parameter name."""
         # Setup mocks
         mock_identity_client = Mock()
         
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
             
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-access-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-access-token"
 
-                    @requires_workload_access_token()
-                    def sample_function(workload_access_token):
-                        return f"Workload Token: {workload_access_token}"
+                @requires_workload_access_token()
+                def sample_function(workload_access_token):
+                    return f"Workload Token: {workload_access_token}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Workload Token: workload-access-token"
-                    mock_get_token.assert_called_once()
+                # Verify
+                assert result == "Workload Token: workload-access-token"
+                mock_get_token.assert_called_once()
 
     def test_requires_workload_access_token_async_in_async_env(self):
         """Test requires_workload_access_token decorator with sync function in async environment."""
@@ -608,30 +631,29 @@ class TestConcurrency:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_access_token(
-                        credential_provider_name="test-provider",
-                        inject_param_name="access_token",
-                        auth_flow="USER_FEDERATION"
-                    )
-                    def sample_function(access_token):
-                        return f"Token: {access_token}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="access_token",
+                    auth_flow="USER_FEDERATION"
+                )
+                def sample_function(access_token):
+                    return f"Token: {access_token}"
 
-                    # Execute multiple calls
-                    results = []
-                    for _ in range(3):
-                        result = sample_function()
-                        results.append(result)
+                # Execute multiple calls
+                results = []
+                for _ in range(3):
+                    result = sample_function()
+                    results.append(result)
 
-                    # Verify
-                    assert all(r == "Token: access-token" for r in results)
-                    assert mock_identity_client.get_token.call_count == 3
+                # Verify
+                assert all(r == "Token: access-token" for r in results)
+                assert mock_identity_client.get_token.call_count == 3
 
     def test_concurrent_requires_api_key_calls(self):
         """Test concurrent calls to requires_api_key decorated function."""
@@ -640,29 +662,28 @@ class TestConcurrency:
         mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_api_key(
-                        credential_provider_name="test-provider",
-                        inject_param_name="api_key"
-                    )
-                    def sample_function(api_key):
-                        return f"API Key: {api_key}"
+                @requires_api_key(
+                    credential_provider_name="test-provider",
+                    inject_param_name="api_key"
+                )
+                def sample_function(api_key):
+                    return f"API Key: {api_key}"
 
-                    # Execute multiple calls
-                    results = []
-                    for _ in range(3):
-                        result = sample_function()
-                        results.append(result)
+                # Execute multiple calls
+                results = []
+                for _ in range(3):
+                    result = sample_function()
+                    results.append(result)
 
-                    # Verify
-                    assert all(r == "API Key: api-key" for r in results)
-                    assert mock_identity_client.get_api_key.call_count == 3
+                # Verify
+                assert all(r == "API Key: api-key" for r in results)
+                assert mock_identity_client.get_api_key.call_count == 3
 
     def test_concurrent_requires_sts_token_calls(self):
         """Test concurrent calls to requires_sts_token decorated function."""
@@ -676,28 +697,27 @@ class TestConcurrency:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="sts_credential"
-                    )
-                    def sample_function(sts_credential):
-                        return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential"
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                    # Execute multiple calls
-                    results = []
-                    for _ in range(3):
-                        result = sample_function()
-                        results.append(result)
+                # Execute multiple calls
+                results = []
+                for _ in range(3):
+                    result = sample_function()
+                    results.append(result)
 
-                    # Verify
-                    assert all(r == "STS Credential: test-access-key-id" for r in results)
-                    assert mock_identity_client.assume_role_for_workload_identity.call_count == 3
+                # Verify
+                assert all(r == "STS Credential: test-access-key-id" for r in results)
+                assert mock_identity_client.assume_role_for_workload_identity.call_count == 3
 
 
 class TestEdgeCases:
@@ -710,26 +730,25 @@ class TestEdgeCases:
         mock_identity_client.get_token = AsyncMock(return_value="access-token")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_access_token(
-                        credential_provider_name="test-provider",
-                        inject_param_name="custom_token_name",
-                        auth_flow="USER_FEDERATION"
-                    )
-                    def sample_function(custom_token_name):
-                        return f"Token: {custom_token_name}"
+                @requires_access_token(
+                    credential_provider_name="test-provider",
+                    inject_param_name="custom_token_name",
+                    auth_flow="USER_FEDERATION"
+                )
+                def sample_function(custom_token_name):
+                    return f"Token: {custom_token_name}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "Token: access-token"
+                # Verify
+                assert result == "Token: access-token"
 
     def test_requires_api_key_with_different_into_parameter(self):
         """Test requires_api_key with different 'into' parameter."""
@@ -738,25 +757,24 @@ class TestEdgeCases:
         mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_api_key(
-                        credential_provider_name="test-provider",
-                        inject_param_name="custom_api_key_name"
-                    )
-                    def sample_function(custom_api_key_name):
-                        return f"API Key: {custom_api_key_name}"
+                @requires_api_key(
+                    credential_provider_name="test-provider",
+                    inject_param_name="custom_api_key_name"
+                )
+                def sample_function(custom_api_key_name):
+                    return f"API Key: {custom_api_key_name}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "API Key: api-key"
+                # Verify
+                assert result == "API Key: api-key"
 
     def test_requires_sts_token_with_different_into_parameter(self):
         """Test requires_sts_token with different 'into' parameter."""
@@ -770,24 +788,23 @@ class TestEdgeCases:
         )
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(return_value=mock_sts_credential)
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="custom_credential_name"
-                    )
-                    def sample_function(custom_credential_name):
-                        return f"STS Credential: {custom_credential_name.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="custom_credential_name"
+                )
+                def sample_function(custom_credential_name):
+                    return f"STS Credential: {custom_credential_name.access_key_id}"
 
-                    # Execute
-                    result = sample_function()
+                # Execute
+                result = sample_function()
 
-                    # Verify
-                    assert result == "STS Credential: test-access-key-id"
+                # Verify
+                assert result == "STS Credential: test-access-key-id"
 
 
 class TestErrorConditions:
@@ -801,7 +818,7 @@ class TestErrorConditions:
         mock_identity_client.get_token = AsyncMock(side_effect=Exception("API Error"))
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
             with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
@@ -826,23 +843,22 @@ class TestErrorConditions:
         mock_identity_client.get_api_key = AsyncMock(side_effect=Exception("API Error"))
         mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_api_key(
-                        credential_provider_name="test-provider",
-                        inject_param_name="api_key"
-                    )
-                    def sample_function(api_key):
-                        return f"API Key: {api_key}"
+                @requires_api_key(
+                    credential_provider_name="test-provider",
+                    inject_param_name="api_key"
+                )
+                def sample_function(api_key):
+                    return f"API Key: {api_key}"
 
-                    # Execute and expect exception
-                    with pytest.raises(Exception, match="API Error"):
-                        sample_function()
+                # Execute and expect exception
+                with pytest.raises(Exception, match="API Error"):
+                    sample_function()
 
     def test_requires_sts_token_exception_handling(self):
         """Test exception handling in requires_sts_token decorator."""
@@ -850,22 +866,21 @@ class TestErrorConditions:
         mock_identity_client = Mock()
         mock_identity_client.assume_role_for_workload_identity = AsyncMock(side_effect=Exception("API Error"))
 
-        with patch('agent_identity_python_sdk.core.decorators.IdentityClient') as mock_client_class:
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
             mock_client_class.return_value = mock_identity_client
 
-            with patch('agent_identity_python_sdk.core.decorators._has_running_loop', return_value=False):
-                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
-                    mock_get_token.return_value = "workload-token"
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token"
 
-                    @requires_sts_token(
-                        inject_param_name="sts_credential"
-                    )
-                    def sample_function(sts_credential):
-                        return f"STS Credential: {sts_credential.access_key_id}"
+                @requires_sts_token(
+                    inject_param_name="sts_credential"
+                )
+                def sample_function(sts_credential):
+                    return f"STS Credential: {sts_credential.access_key_id}"
 
-                    # Execute and expect exception
-                    with pytest.raises(Exception, match="API Error"):
-                        sample_function()
+                # Execute and expect exception
+                with pytest.raises(Exception, match="API Error"):
+                    sample_function()
 
 
 class TestCoverage:
@@ -881,23 +896,23 @@ class TestCoverage:
     async def test_get_workload_access_token_local_with_env_var(self):
         """Test _get_workload_access_token_local with environment variable set."""
         mock_client = Mock()
-        mock_client.get_workload_access_token.return_value = "mock-token"
+        mock_client.get_workload_access_token_async = AsyncMock(return_value="mock-token")
         
         with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
             with patch('agent_identity_python_sdk.core.decorators.write_local_config') as mock_write:
                 token = await _get_workload_access_token_local(mock_client, user_id="test-user", id_token="test-token")
                 
                 assert token == "mock-token"
-                mock_client.get_workload_access_token.assert_called_once_with(
+                mock_client.get_workload_access_token_async.assert_called_once_with(
                     "test-workload-identity", user_id="test-user", user_token="test-token"
                 )
-                mock_write.assert_called_once_with("workload_identity_name", "test-workload-identity")
+                mock_write.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_get_workload_access_token_local_with_config(self):
         """Test _get_workload_access_token_local with config file value."""
         mock_client = Mock()
-        mock_client.get_workload_access_token.return_value = "mock-token"
+        mock_client.get_workload_access_token_async = AsyncMock(return_value="mock-token")
         
         with patch.dict(os.environ, {}, clear=True):  # No env var
             with patch('agent_identity_python_sdk.core.decorators.read_local_config', return_value="config-workload-identity"):
@@ -905,16 +920,16 @@ class TestCoverage:
                     token = await _get_workload_access_token_local(mock_client, user_id="test-user", id_token="test-token")
                     
                     assert token == "mock-token"
-                    mock_client.get_workload_access_token.assert_called_once_with(
+                    mock_client.get_workload_access_token_async.assert_called_once_with(
                         "config-workload-identity", user_id="test-user", user_token="test-token"
                     )
-                    mock_write.assert_called_once_with("workload_identity_name", "config-workload-identity")
+                    mock_write.assert_not_called()
     
     @pytest.mark.asyncio
     async def test_get_workload_access_token_local_create_workload_identity(self):
         """Test _get_workload_access_token_local creating new workload identity."""
         mock_client = Mock()
-        mock_client.get_workload_access_token.return_value = "mock-token"
+        mock_client.get_workload_access_token_async = AsyncMock(return_value="mock-token")
         mock_client.create_workload_identity.return_value = "new-workload-identity"
         
         with patch.dict(os.environ, {}, clear=True):  # No env var
@@ -924,7 +939,471 @@ class TestCoverage:
                     
                     assert token == "mock-token"
                     mock_client.create_workload_identity.assert_called_once()
-                    mock_client.get_workload_access_token.assert_called_once_with(
+                    mock_client.get_workload_access_token_async.assert_called_once_with(
                         "new-workload-identity", user_id="test-user", user_token="test-token"
                     )
-                    mock_write.assert_called_once_with("workload_identity_name", "new-workload-identity")
\ No newline at end of file
+                    mock_write.assert_called_once_with("workload_identity_name", "new-workload-identity")
+
+
+def _make_jwt(claims) -> str:
+    """Build an unsigned JWT carrying the given claims."""
+    def encode(data) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class TestWorkloadAccessTokenCaching:
+    """Test cases for caching workload access tokens in the decorator pipeline."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _workload_access_token_cache.clear()
+
+    def test_cache_key_priority(self):
+        """Test that the cache key follows the user token/user ID/none priority."""
+        jwt_key = _get_workload_token_cache_key("workload", "user-1", "user-jwt")
+        assert jwt_key.startswith("workload:jwt:")
+        assert "user-jwt" not in jwt_key
+        assert _get_workload_token_cache_key("workload", "user-1", None) == "workload:user:user-1"
+        assert _get_workload_token_cache_key("workload", None, None) == "workload:"
+
+    @pytest.mark.asyncio
+    async def test_token_reused_until_expiry(self):
+        """Test that a fresh workload access token is fetched only once."""
+        token = _make_jwt({"exp": int(time.time()) + 3600})
+        mock_client = Mock()
+        mock_client.get_workload_access_token_async = AsyncMock(return_value=token)
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.write_local_config'):
+                for _ in range(5):
+                    assert await _get_workload_access_token_local(mock_client, user_id="test-user") == token
+
+        mock_client.get_workload_access_token_async.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_tokens_cached_per_user(self):
+        """Test that different users do not share cached tokens."""
+        mock_client = Mock()
+        mock_client.get_workload_access_token_async = AsyncMock(side_effect=[
+            _make_jwt({"sub": "user-1", "exp": int(time.time()) + 3600}),
+            _make_jwt({"sub": "user-2", "exp": int(time.time()) + 3600}),
+        ])
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.write_local_config'):
+                token1 = await _get_workload_access_token_local(mock_client, user_id="user-1")
+                token2 = await _get_workload_access_token_local(mock_client, user_id="user-2")
+
+        assert token1 != token2
+        assert mock_client.get_workload_access_token_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_expiring_token_not_reused(self):
+        """Test that a token close to its expiry is fetched again."""
+        token = _make_jwt({"exp": int(time.time()) + 10})
+        mock_client = Mock()
+        mock_client.get_workload_access_token_async = AsyncMock(return_value=token)
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.write_local_config'):
+                await _get_workload_access_token_local(mock_client, id_token="user-jwt")
+                await _get_workload_access_token_local(mock_client, id_token="user-jwt")
+
+        assert mock_client.get_workload_access_token_async.await_count == 2
+
+
+class TestSingleFlightDeduplication:
+    """Test cases for deduplicating concurrent credential fetches in the decorators."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requires_api_key_calls_share_one_fetch(self):
+        """Test that concurrent async calls fetch the API key once."""
+        async def slow_get_api_key(**kwargs):
+            await asyncio.sleep(0.05)
+            return "api-key"
+
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(side_effect=slow_get_api_key)
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+            mock_client_class.return_value = mock_identity_client
+
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token-singleflight"
+
+                @requires_api_key(credential_provider_name="test-provider")
+                async def sample_async_function(api_key):
+                    return api_key
+
+                results = await asyncio.gather(*(sample_async_function() for _ in range(10)))
+
+                assert results == ["api-key"] * 10
+                mock_identity_client.get_api_key.assert_awaited_once()
+
+    def test_concurrent_sync_requires_access_token_calls_share_one_fetch(self):
+        """Test that sync calls from several threads fetch the OAuth2 token once."""
+        async def slow_get_token(**kwargs):
+            await asyncio.sleep(0.1)
+            return "access-token"
+
+        mock_identity_client = Mock()
+        mock_identity_client.get_token = AsyncMock(side_effect=slow_get_token)
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+            mock_client_class.return_value = mock_identity_client
+
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token-singleflight"
+
+                @requires_access_token(credential_provider_name="test-provider", scopes=["read"])
+                def sample_function(access_token):
+                    return access_token
+
+                results = []
+                threads = [threading.Thread(target=lambda: results.append(sample_function())) for _ in range(5)]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+                assert results == ["access-token"] * 5
+                mock_identity_client.get_token.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_non_polling_fetch_not_shared_with_polling_caller(self):
+        """Test that a caller without polling, like a prewarm, does not capture a concurrent caller that polls."""
+        _oauth2_token_cache.clear()
+        auth_urls = []
+
+        async def get_token(**kwargs):
+            await asyncio.sleep(0.05)
+            if not kwargs["poll_for_token"]:
+                raise RuntimeError("authorization URL returned")
+            kwargs["on_auth_url"]("https://auth.example.com")
+            return "access-token"
+
+        mock_identity_client = Mock()
+        mock_identity_client.get_token = AsyncMock(side_effect=get_token)
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+            mock_client_class.return_value = mock_identity_client
+
+            with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                mock_get_token.return_value = "workload-token-singleflight"
+
+                @requires_access_token(credential_provider_name="test-provider", poll_for_token=False)
+                async def prewarm(access_token):
+                    return access_token
+
+                @requires_access_token(credential_provider_name="test-provider", on_auth_url=auth_urls.append)
+                async def user_call(access_token):
+                    return access_token
+
+                prewarm_result, user_result = await asyncio.gather(prewarm(), user_call(), return_exceptions=True)
+
+                assert isinstance(prewarm_result, RuntimeError)
+                assert user_result == "access-token"
+                assert auth_urls == ["https://auth.example.com"]
+                assert mock_identity_client.get_token.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_workload_token_fetches_share_one_call(self):
+        """Test that concurrent cache misses fetch the workload access token once."""
+        _workload_access_token_cache.clear()
+        token = _make_jwt({"exp": int(time.time()) + 3600})
+
+        async def slow_get_workload_access_token(*args, **kwargs):
+            await asyncio.sleep(0.05)
+            return token
+
+        mock_client = Mock()
+        mock_client.get_workload_access_token_async = AsyncMock(side_effect=slow_get_workload_access_token)
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.write_local_config'):
+                results = await asyncio.gather(*(
+                    _get_workload_access_token_local(mock_client, user_id="test-user") for _ in range(10)
+                ))
+
+        assert results == [token] * 10
+        mock_client.get_workload_access_token_async.assert_awaited_once()
+
+
+class TestApiKeyCaching:
+    """Test cases for caching API keys in requires_api_key."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _api_key_cache.clear()
+
+    def test_cache_key_uses_workload_identity_name(self):
+        """Test that the cache key combines provider and workload identity name."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            assert _get_api_key_cache_key("test-provider") == "test-provider:test-workload-identity"
+
+    def test_context_token_takes_precedence_over_configured_name(self):
+        """Test that workloads sharing a configured name but carrying different context tokens get different keys."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "wl"}):
+            with patch('agent_identity_python_sdk.core.decorators.AgentIdentityContext') as mock_context:
+                mock_context.get_workload_access_token.return_value = "alice-workload-token"
+                alice_key = _get_api_key_cache_key("test-provider")
+                mock_context.get_workload_access_token.return_value = "bob-workload-token"
+                bob_key = _get_api_key_cache_key("test-provider")
+
+        assert alice_key != bob_key
+        assert "alice-workload-token" not in alice_key
+
+    def test_cache_key_falls_back_to_context_token(self):
+        """Test that a workload access token from the context identifies the workload when its name is unknown."""
+        with patch.dict(os.environ, {}, clear=True):
+            with patch('agent_identity_python_sdk.core.decorators.read_local_config', return_value=None):
+                with patch('agent_identity_python_sdk.core.decorators.AgentIdentityContext') as mock_context:
+                    mock_context.get_workload_access_token.return_value = "context-token"
+                    key = _get_api_key_cache_key("test-provider")
+                    assert key.startswith("test-provider:token:")
+                    assert "context-token" not in key
+
+                    mock_context.get_workload_access_token.return_value = None
+                    assert _get_api_key_cache_key("test-provider") is None
+
+    @pytest.mark.asyncio
+    async def test_cached_api_key_skips_round_trips(self):
+        """Test that a cached API key is injected without fetching any credential."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+                mock_client_class.return_value = mock_identity_client
+
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_api_key(credential_provider_name="test-provider")
+                    async def sample_async_function(api_key):
+                        return api_key
+
+                    for _ in range(3):
+                        assert await sample_async_function() == "api-key"
+
+                    mock_get_token.assert_called_once()
+                    mock_identity_client.get_sts_credential_client.assert_awaited_once()
+                    mock_identity_client.get_api_key.assert_awaited_once()
+
+    def test_sync_cache_hit_served_on_caller_thread(self):
+        """Test that a synchronous function is given a cached API key without running on the event loop."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(return_value="api-key")
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+                mock_client_class.return_value = mock_identity_client
+
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_api_key(credential_provider_name="test-provider")
+                    def sample_function(api_key):
+                        return api_key
+
+                    assert sample_function() == "api-key"
+                    with patch('agent_identity_python_sdk.core.decorators.run_sync') as mock_run_sync:
+                        assert sample_function() == "api-key"
+                        mock_run_sync.assert_not_called()
+                    mock_identity_client.get_api_key.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_invalidate_api_key_forces_refetch(self):
+        """Test that invalidating an API key makes the next call fetch it again."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(side_effect=["old-api-key", "new-api-key"])
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+                mock_client_class.return_value = mock_identity_client
+
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_api_key(credential_provider_name="test-provider")
+                    async def sample_async_function(api_key):
+                        return api_key
+
+                    assert await sample_async_function() == "old-api-key"
+                    assert await sample_async_function() == "old-api-key"
+
+                    invalidate_api_key("test-provider")
+
+                    assert await sample_async_function() == "new-api-key"
+                    assert mock_identity_client.get_api_key.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_api_keys_cached_per_provider(self):
+        """Test that API keys of different providers are cached separately."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_api_key = AsyncMock(side_effect=lambda **kwargs: f"key-{kwargs['credential_provider_name']}")
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client') as mock_client_class:
+                mock_client_class.return_value = mock_identity_client
+
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_api_key(credential_provider_name="provider-a")
+                    async def function_a(api_key):
+                        return api_key
+
+                    @requires_api_key(credential_provider_name="provider-b")
+                    async def function_b(api_key):
+                        return api_key
+
+                    assert await function_a() == "key-provider-a"
+                    assert await function_b() == "key-provider-b"
+                    assert await function_a() == "key-provider-a"
+                    assert mock_identity_client.get_api_key.await_count == 2
+
+
+class TestAccessTokenCaching:
+    """Test cases for caching OAuth2 access tokens in requires_access_token."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _oauth2_token_cache.clear()
+
+    def _mock_identity_client(self, get_token):
+        mock_identity_client = Mock()
+        mock_identity_client.get_token = AsyncMock(side_effect=get_token)
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+        return mock_identity_client
+
+    def test_cache_key_normalizes_scopes_and_parameters(self):
+        """Test that the cache key does not depend on scope or parameter order."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            key1 = _get_access_token_cache_key("provider", ["b", "a"], {"x": "1", "y": "2"}, "user-1", None)
+            key2 = _get_access_token_cache_key("provider", ["a", "b"], {"y": "2", "x": "1"}, "user-1", None)
+            assert key1 == key2
+            assert key1 != _get_access_token_cache_key("provider", ["a"], {"y": "2", "x": "1"}, "user-1", None)
+            assert key1 != _get_access_token_cache_key("provider", ["a", "b"], {"y": "2", "x": "1"}, "user-2", None)
+            assert key1 != _get_access_token_cache_key("provider", ["a", "b"], {"y": "2", "x": "1"}, "user-1", "user-jwt")
+
+    @pytest.mark.asyncio
+    async def test_cached_access_token_skips_round_trips(self):
+        """Test that a cached access token is injected without fetching any credential."""
+        access_token = _make_jwt({"exp": int(time.time()) + 3600})
+        mock_identity_client = self._mock_identity_client(lambda **kwargs: access_token)
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client):
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_access_token(credential_provider_name="test-provider", scopes=["read"])
+                    async def sample_async_function(access_token):
+                        return access_token
+
+                    for _ in range(3):
+                        assert await sample_async_function() == access_token
+
+                    mock_get_token.assert_called_once()
+                    mock_identity_client.get_token.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_access_tokens_cached_per_user(self):
+        """Test that users do not share cached access tokens."""
+        mock_identity_client = self._mock_identity_client(["token-user-1", "token-user-2"])
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client):
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_access_token(credential_provider_name="test-provider")
+                    async def sample_async_function(access_token):
+                        return access_token
+
+                    with patch('agent_identity_python_sdk.core.decorators.AgentIdentityContext') as mock_context:
+                        mock_context.get_workload_access_token.return_value = None
+                        mock_context.get_user_token.return_value = None
+                        mock_context.get_custom_state.return_value = None
+                        mock_context.get_user_id.return_value = "user-1"
+                        assert await sample_async_function() == "token-user-1"
+                        mock_context.get_user_id.return_value = "user-2"
+                        assert await sample_async_function() == "token-user-2"
+                        mock_context.get_user_id.return_value = "user-1"
+                        assert await sample_async_function() == "token-user-1"
+
+                    assert mock_identity_client.get_token.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_context_workload_tokens_sharing_configured_name_not_mixed(self):
+        """Test that requests with different context workload tokens get their own tokens under one configured name."""
+        mock_identity_client = self._mock_identity_client(
+            lambda **kwargs: f"token-for-{kwargs['workload_identity_token']}")
+
+        @requires_access_token(credential_provider_name="test-provider")
+        async def sample_async_function(access_token):
+            return access_token
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "wl"}), \
+                patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client):
+            try:
+                AgentIdentityContext.set_workload_access_token("alice-workload-token")
+                assert await sample_async_function() == "token-for-alice-workload-token"
+                AgentIdentityContext.set_workload_access_token("bob-workload-token")
+                assert await sample_async_function() == "token-for-bob-workload-token"
+                AgentIdentityContext.set_workload_access_token("alice-workload-token")
+                assert await sample_async_function() == "token-for-alice-workload-token"
+            finally:
+                AgentIdentityContext.clear()
+
+        assert mock_identity_client.get_token.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_force_authentication_bypasses_cache(self):
+        """Test that forced authentication always fetches a new token and does not cache it."""
+        mock_identity_client = self._mock_identity_client(lambda **kwargs: "access-token")
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client):
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_access_token(credential_provider_name="test-provider", force_authentication=True)
+                    async def sample_async_function(access_token):
+                        return access_token
+
+                    await sample_async_function()
+                    await sample_async_function()
+
+                    assert mock_identity_client.get_token.await_count == 2
+                    assert len(_oauth2_token_cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_invalidate_access_token_forces_refetch(self):
+        """Test that invalidating an access token makes the next call fetch it again."""
+        mock_identity_client = self._mock_identity_client(["old-token", "new-token"])
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}):
+            with patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client):
+                with patch('agent_identity_python_sdk.core.decorators._get_workload_access_token') as mock_get_token:
+                    mock_get_token.return_value = "workload-token"
+
+                    @requires_access_token(credential_provider_name="test-provider", scopes=["read"])
+                    async def sample_async_function(access_token):
+                        return access_token
+
+                    assert await sample_async_function() == "old-token"
+                    assert await sample_async_function() == "old-token"
+
+                    invalidate_access_token("test-provider", scopes=["read"])
+
+                    assert await sample_async_function() == "new-token"
@@ -1,13 +1,26 @@
 """Tests for the IdentityClient class."""
 import asyncio
 import os
+import threading
+import time
 from unittest.mock import Mock, patch, AsyncMock, PropertyMock
 import pytest
 from alibabacloud_tea_openapi import models as open_api_models
 from alibabacloud_credentials.client import Client as CredentialClient
 from alibabacloud_credentials.models import Config as CredentialConfig
-from agent_identity_python_sdk.core.identity import IdentityClient, _get_sts_cache_key
-from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.core.identity import IdentityClient, _get_sts_cache_key, clear_identity_clients, get_identity_client
+from agent_identity_python_sdk.model.stscredential import CompactSTSCredential, STSCredential
+from agent_identity_python_sdk.utils.event_loop import run_sync
+from agent_identity_python_sdk.utils.retry import RetryBudget, RetryPolicy
+
+
+class _ServiceError(Exception):
+    """Error carrying an error code and HTTP status code, like the errors of the Alibaba Cloud SDKs."""
+
+    def __init__(self, code, status_code):
+        super().__init__(code)
+        self.code = code
+        self.status_code = status_code
 
 
 class TestGetStsCacheKey:
@@ -25,6 +38,72 @@ class TestGetStsCacheKey:
         assert actual_key == expected_key
 
 
+class TestGetIdentityClient:
+    """Test cases for the shared IdentityClient registry."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        clear_identity_clients()
+
+    def teardown_method(self):
+        """Drop the mocked clients created by the test."""
+        clear_identity_clients()
+
+    def test_same_configuration_shares_client(self):
+        """Test that the same region and endpoints return one shared client."""
+        with patch('agent_identity_python_sdk.core.identity.IdentityClient') as mock_client_class:
+            mock_client_class.side_effect = lambda *args, **kwargs: Mock()
+
+            first = get_identity_client("cn-beijing")
+            second = get_identity_client("cn-beijing")
+
+            assert first is second
+            mock_client_class.assert_called_once_with("cn-beijing", data_api_endpoint=None, control_api_endpoint=None)
+
+    def test_different_configurations_use_different_clients(self):
+        """Test that regions, endpoints and the STS setting each get their own client."""
+        with patch('agent_identity_python_sdk.core.identity.IdentityClient') as mock_client_class:
+            mock_client_class.side_effect = lambda *args, **kwargs: Mock()
+
+            with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "true"}):
+                clients = [
+                    get_identity_client("cn-beijing"),
+                    get_identity_client("cn-hangzhou"),
+                    get_identity_client("cn-beijing", data_api_endpoint="data.example.com"),
+                    get_identity_client("cn-beijing", control_api_endpoint="control.example.com"),
+                ]
+            with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}):
+                clients.append(get_identity_client("cn-beijing"))
+
+            assert len({id(client) for client in clients}) == 5
+
+    def test_concurrent_first_use_creates_one_client(self):
+        """Test that threads racing on first use share a single client."""
+        with patch('agent_identity_python_sdk.core.identity.IdentityClient') as mock_client_class:
+            mock_client_class.side_effect = lambda *args, **kwargs: Mock()
+            results = []
+
+            threads = [threading.Thread(target=lambda: results.append(get_identity_client("cn-beijing")))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert len({id(client) for client in results}) == 1
+            mock_client_class.assert_called_once()
+
+    def test_clear_identity_clients(self):
+        """Test that clearing the registry creates a new client on next use."""
+        with patch('agent_identity_python_sdk.core.identity.IdentityClient') as mock_client_class:
+            mock_client_class.side_effect = lambda *args, **kwargs: Mock()
+
+            first = get_identity_client("cn-beijing")
+            clear_identity_clients()
+
+            assert get_identity_client("cn-beijing") is not first
+
+
 class TestIdentityClientInitialization:
     """Test cases for IdentityClient initialization."""
 
@@ -81,6 +160,39 @@ class TestIdentityClientInitialization:
             assert client.control_api_endpoint == "custom-control-endpoint.com"
             mock_credential_client.assert_called_once_with()
 
+    def test_initialization_with_endpoint_urls(self):
+        """Test that endpoints given as URLs set the protocol of the API clients."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+
+            client = IdentityClient(
+                region_id="cn-beijing",
+                data_api_endpoint="http://127.0.0.1:8765/",
+                control_api_endpoint="custom-control-endpoint.com"
+            )
+            assert client.control_client is mock_control_client_class.return_value
+
+            data_config = mock_data_client_class.call_args.kwargs["config"]
+            assert data_config.endpoint == "127.0.0.1:8765"
+            assert data_config.protocol == "HTTP"
+            control_config = mock_control_client_class.call_args.kwargs["config"]
+            assert control_config.endpoint == "custom-control-endpoint.com"
+            assert control_config.protocol is None
+
+    def test_control_client_created_on_first_use(self):
+        """Test that the control API client is only created when it is first needed."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient'):
+
+            client = IdentityClient(region_id="cn-beijing")
+            mock_control_client_class.assert_not_called()
+
+            assert client.control_client is client.control_client
+            mock_control_client_class.assert_called_once()
+            assert mock_control_client_class.call_args.kwargs["config"].endpoint == "agentidentity.cn-beijing.aliyuncs.com"
+
     def test_initialization_with_sts_disabled(self):
         """Test IdentityClient initialization with STS disabled."""
         with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}):
@@ -423,6 +535,55 @@ class TestGetWorkloadAccessToken:
                 with pytest.raises(Exception, match="API Error"):
                     client.get_workload_access_token("my-workload")
 
+    @pytest.mark.asyncio
+    async def test_get_workload_access_token_async_with_user_id(self):
+        """Test the non-blocking variant uses the asynchronous data API."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_instance = Mock()
+            mock_credential_client.return_value = mock_credential_instance
+            
+            mock_control_client = Mock()
+            mock_control_client_class.return_value = mock_control_client
+            
+            mock_data_client = Mock()
+            mock_data_client_class.return_value = mock_data_client
+            
+            client = IdentityClient(region_id="cn-beijing")
+            mock_response = Mock()
+            mock_response.body = Mock(workload_access_token="workload-token-async")
+            
+            with patch.object(client.data_client, 'get_workload_access_token_for_user_id_async', new=AsyncMock(return_value=mock_response)) as mock_call:
+                result = await client.get_workload_access_token_async("my-workload", user_id="user123")
+                
+                assert result == "workload-token-async"
+                mock_call.assert_awaited_once()
+                mock_data_client.get_workload_access_token_for_user_id.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_workload_access_token_async_error_handling(self):
+        """Test error handling in the non-blocking variant."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_instance = Mock()
+            mock_credential_client.return_value = mock_credential_instance
+            
+            mock_control_client = Mock()
+            mock_control_client_class.return_value = mock_control_client
+            
+            mock_data_client = Mock()
+            mock_data_client_class.return_value = mock_data_client
+            
+            client = IdentityClient(region_id="cn-beijing")
+            
+            with patch.object(client.data_client, 'get_workload_access_token_async', new=AsyncMock(side_effect=Exception("API Error"))):
+                with pytest.raises(Exception, match="API Error"):
+                    await client.get_workload_access_token_async("my-workload")
+
 
 class TestConfirmUserAuth:
     """Test cases for confirm_user_auth method."""
@@ -540,6 +701,33 @@ class TestConfirmUserAuth:
                 with pytest.raises(Exception, match="API Error"):
                     client.confirm_user_auth("session-uri", user_id="user123")
 
+    @pytest.mark.asyncio
+    async def test_confirm_user_auth_async(self):
+        """Test the non-blocking variant of confirm_user_auth."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_instance = Mock()
+            mock_credential_client.return_value = mock_credential_instance
+            
+            mock_control_client = Mock()
+            mock_control_client_class.return_value = mock_control_client
+            
+            mock_data_client = Mock()
+            mock_data_client_class.return_value = mock_data_client
+            
+            client = IdentityClient(region_id="cn-beijing")
+            mock_response = Mock()
+            
+            with patch.object(client.data_client, 'complete_resource_token_auth_async', new=AsyncMock(return_value=mock_response)) as mock_call:
+                result = await client.confirm_user_auth_async("session-uri", user_token="user-jwt")
+                
+                assert result == mock_response
+                request = mock_call.call_args.args[0]
+                assert request.session_uri == "session-uri"
+                assert request.user_identifier.user_jwt == "user-jwt"
+
 
 class TestGetToken:
     """Test cases for get_token method."""
@@ -568,7 +756,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_token(
                     credential_provider_name="test-provider",
                     workload_identity_token="workload-token",
@@ -603,7 +791,7 @@ class TestGetToken:
             
             mock_on_auth_url = AsyncMock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 with patch.object(client, 'poll_for_oauth2_token', new=AsyncMock(return_value="final-token")):
                     result = await client.get_token(
                         credential_provider_name="test-provider",
@@ -641,7 +829,7 @@ class TestGetToken:
             
             mock_on_auth_url = Mock()  # Synchronous callback
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 with patch.object(client, 'poll_for_oauth2_token', new=AsyncMock(return_value="final-token")):
                     result = await client.get_token(
                         credential_provider_name="test-provider",
@@ -653,6 +841,51 @@ class TestGetToken:
                     mock_on_auth_url.assert_called_once_with("https://example.com/auth")
                     assert result == "final-token"
 
+    def test_blocking_on_auth_url_does_not_stall_other_sync_callers(self):
+        """Test that a synchronous callback blocking on the background loop does not delay other synchronous callers."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+
+            mock_credential_client.return_value = Mock()
+            mock_control_client_class.return_value = Mock()
+            mock_data_client_class.return_value = Mock()
+
+            client = IdentityClient(region_id="cn-beijing")
+            mock_response = Mock(body=Mock(access_token=None, authorization_url="https://example.com/auth",
+                                           session_uri="session123"))
+            called = threading.Event()
+            released = threading.Event()
+            errors = []
+
+            def on_auth_url(url):
+                called.set()
+                released.wait(5)
+
+            def blocked_caller():
+                try:
+                    run_sync(client.get_token(credential_provider_name="test-provider",
+                                              workload_identity_token="workload-token",
+                                              auth_flow="USER_FEDERATION", on_auth_url=on_auth_url,
+                                              poll_for_token=False))
+                except RuntimeError as e:
+                    errors.append(e)
+
+            async def other_lookup():
+                return "other"
+
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
+                thread = threading.Thread(target=blocked_caller)
+                thread.start()
+                try:
+                    assert called.wait(5)
+                    assert run_sync(other_lookup(), timeout=1) == "other"
+                finally:
+                    released.set()
+                    thread.join(5)
+
+            assert len(errors) == 1
+
     @pytest.mark.asyncio
     async def test_get_token_with_force_authentication(self):
         """Test get_token with force_authentication parameter."""
@@ -679,10 +912,10 @@ class TestGetToken:
             
             mock_on_auth_url = AsyncMock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', side_effect=[
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=[
                 mock_response,  # First call
                 Mock(body=Mock(access_token="final-token", authorization_url=None, session_uri=None))  # Second call after setting force_authentication=False
-            ]):
+            ])):
                 with patch.object(client, 'poll_for_oauth2_token', new=AsyncMock(return_value="final-token")):
                     result = await client.get_token(
                         credential_provider_name="test-provider",
@@ -718,7 +951,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_token(
                     credential_provider_name="test-provider",
                     workload_identity_token="workload-token",
@@ -752,7 +985,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_token(
                     credential_provider_name="test-provider",
                     scopes=["scope1", "scope2"],
@@ -786,7 +1019,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_token(
                     credential_provider_name="test-provider",
                     workload_identity_token="workload-token",
@@ -820,7 +1053,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_token(
                     credential_provider_name="test-provider",
                     workload_identity_token="workload-token",
@@ -860,7 +1093,7 @@ class TestGetToken:
                     mock_data_client_new = Mock()
                     mock_data_client_new_class.return_value = mock_data_client_new
                     
-                    with patch.object(mock_data_client_new, 'get_resource_oauth2_token', return_value=mock_response):
+                    with patch.object(mock_data_client_new, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                         result = await client.get_token(
                             credential_provider_name="test-provider",
                             workload_identity_token="workload-token",
@@ -904,7 +1137,7 @@ class TestGetToken:
                     mock_data_client_new = Mock()
                     mock_data_client_new_class.return_value = mock_data_client_new
                     
-                    with patch.object(mock_data_client_new, 'get_resource_oauth2_token', return_value=mock_response):
+                    with patch.object(mock_data_client_new, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                         with patch.object(client, 'poll_for_oauth2_token', new=AsyncMock(return_value="final-token")):
                             result = await client.get_token(
                                 credential_provider_name="test-provider",
@@ -935,7 +1168,7 @@ class TestGetToken:
             
             client = IdentityClient(region_id="cn-beijing")
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', side_effect=Exception("API Error")):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=Exception("API Error"))):
                 with pytest.raises(Exception, match="API Error"):
                     await client.get_token(
                         credential_provider_name="test-provider",
@@ -961,7 +1194,7 @@ class TestGetToken:
             
             client = IdentityClient(region_id="cn-beijing")
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', side_effect=Exception("API Error")):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=Exception("API Error"))):
                 with pytest.raises(Exception, match="API Error"):
                     await client.get_token(
                         credential_provider_name="test-provider",
@@ -992,7 +1225,7 @@ class TestGetToken:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 with pytest.raises(RuntimeError, match="Failed to obtain OAuth2 token"):
                     await client.get_token(
                         credential_provider_name="test-provider",
@@ -1026,7 +1259,7 @@ class TestGetApiKey:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_apikey', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_apikey_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.get_api_key(
                     credential_provider_name="test-provider",
                     agent_identity_token="workload-token"
@@ -1062,7 +1295,7 @@ class TestGetApiKey:
                     mock_data_client_new = Mock()
                     mock_data_client_new_class.return_value = mock_data_client_new
                     
-                    with patch.object(mock_data_client_new, 'get_resource_apikey', return_value=mock_response):
+                    with patch.object(mock_data_client_new, 'get_resource_apikey_async', new=AsyncMock(return_value=mock_response)):
                         result = await client.get_api_key(
                             credential_provider_name="test-provider",
                             agent_identity_token="workload-token",
@@ -1100,7 +1333,7 @@ class TestGetApiKey:
                     mock_data_client_new = Mock()
                     mock_data_client_new_class.return_value = mock_data_client_new
                     
-                    with patch.object(mock_data_client_new, 'get_resource_apikey', return_value=mock_response):
+                    with patch.object(mock_data_client_new, 'get_resource_apikey_async', new=AsyncMock(return_value=mock_response)):
                         result = await client.get_api_key(
                             credential_provider_name="test-provider",
                             agent_identity_token="workload-token"
@@ -1128,7 +1361,7 @@ class TestGetApiKey:
             
             client = IdentityClient(region_id="cn-beijing")
             
-            with patch.object(client.data_client, 'get_resource_apikey', side_effect=Exception("API Error")):
+            with patch.object(client.data_client, 'get_resource_apikey_async', new=AsyncMock(side_effect=Exception("API Error"))):
                 with pytest.raises(Exception, match="API Error"):
                     await client.get_api_key(
                         credential_provider_name="test-provider",
@@ -1157,7 +1390,7 @@ class TestGetApiKey:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'get_resource_apikey', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_apikey_async', new=AsyncMock(return_value=mock_response)):
                 with pytest.raises(RuntimeError, match="Agent identity service did not return an API key."):
                     await client.get_api_key(
                         credential_provider_name="test-provider",
@@ -1196,6 +1429,159 @@ class TestConvertToCredential:
                 mock_credential_class.assert_called_once_with(mock_config_instance)
 
 
+class TestCredentialClientPool:
+    """Test cases for reusing credential clients across calls with the same STS credential."""
+
+    @staticmethod
+    def _sts_credential(access_key_id="test-access-key-id", security_token="test-security-token",
+                        expiration="2099-12-31T23:59:59Z"):
+        return STSCredential(
+            access_key_id=access_key_id,
+            access_key_secret="test-access-key-secret",
+            security_token=security_token,
+            expiration=expiration
+        )
+
+    @staticmethod
+    def _make_client():
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient'), \
+             patch('agent_identity_python_sdk.core.identity.DataClient'):
+            return IdentityClient(region_id="cn-beijing")
+
+    @pytest.mark.asyncio
+    async def test_cache_hits_reuse_credential_client(self):
+        """Test that cache hits return the credential client built for the cached credential."""
+        client = self._make_client()
+        # A copy of the credential, as returned by cache backends that serialize credentials
+        cached_credentials = [self._sts_credential(), self._sts_credential()]
+
+        with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', side_effect=cached_credentials), \
+             patch.object(client, '_convert_to_credential', side_effect=lambda credential: Mock()) as mock_convert:
+            first = await client.get_sts_credential_client("workload-token", "user123", None)
+            second = await client.get_sts_credential_client("workload-token", "user123", None)
+
+        assert first is second
+        mock_convert.assert_called_once()
+
+    def test_changed_credential_gets_new_client(self):
+        """Test that a credential differing from the pooled one with the same key is not served the pooled client."""
+        client = self._make_client()
+
+        with patch.object(client, '_convert_to_credential', side_effect=lambda credential: Mock()) as mock_convert:
+            first = client._get_credential_client(self._sts_credential(security_token="token-1"))
+            second = client._get_credential_client(self._sts_credential(security_token="token-2"))
+
+        assert first is not second
+        assert mock_convert.call_count == 2
+
+    def test_expired_credential_is_not_pooled(self):
+        """Test that a credential client is not kept for a credential that already expired."""
+        client = self._make_client()
+
+        with patch.object(client, '_convert_to_credential', side_effect=lambda credential: Mock()):
+            client._get_credential_client(self._sts_credential(expiration="2000-01-01T00:00:00Z"))
+
+        assert len(client._credential_client_pool) == 0
+
+
+class TestDataClientPool:
+    """Test cases for reusing data clients across calls with the same STS credential."""
+
+    @staticmethod
+    def _sts_credential(access_key_id="test-access-key-id", expiration="2099-12-31T23:59:59Z"):
+        return STSCredential(
+            access_key_id=access_key_id,
+            access_key_secret="test-access-key-secret",
+            security_token="test-security-token",
+            expiration=expiration
+        )
+
+    @staticmethod
+    def _make_client():
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "true"}), \
+             patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient'), \
+             patch('agent_identity_python_sdk.core.identity.DataClient'):
+            return IdentityClient(region_id="cn-beijing")
+
+    def test_same_credential_reuses_data_client(self):
+        """Test that credential clients converted from the same STS credential share a data client."""
+        client = self._make_client()
+        sts_credential = self._sts_credential()
+
+        with patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            mock_data_client_class.side_effect = lambda config: Mock()
+            first = client._get_data_client(IdentityClient._convert_to_credential(sts_credential))
+            second = client._get_data_client(IdentityClient._convert_to_credential(sts_credential))
+
+        assert first is second
+        assert mock_data_client_class.call_count == 1
+
+    def test_different_credentials_use_different_data_clients(self):
+        """Test that a new STS credential gets its own data client."""
+        client = self._make_client()
+
+        with patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            mock_data_client_class.side_effect = lambda config: Mock()
+            first = client._get_data_client(
+                IdentityClient._convert_to_credential(self._sts_credential("key-1")))
+            second = client._get_data_client(
+                IdentityClient._convert_to_credential(self._sts_credential("key-2")))
+
+        assert first is not second
+        assert mock_data_client_class.call_count == 2
+
+    def test_expired_credential_is_not_pooled(self):
+        """Test that a data client is not kept for a credential that already expired."""
+        client = self._make_client()
+        sts_credential = self._sts_credential(expiration="2000-01-01T00:00:00Z")
+
+        with patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            mock_data_client_class.side_effect = lambda config: Mock()
+            client._get_data_client(IdentityClient._convert_to_credential(sts_credential))
+            client._get_data_client(IdentityClient._convert_to_credential(sts_credential))
+
+        assert mock_data_client_class.call_count == 2
+        assert len(client._data_client_pool) == 0
+
+    def test_pool_is_bounded(self):
+        """Test that the least recently used data clients are evicted when the pool is full."""
+        client = self._make_client()
+        client._data_client_pool.set_max_size(2)
+
+        with patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            mock_data_client_class.side_effect = lambda config: Mock()
+            for access_key_id in ("key-1", "key-2", "key-3"):
+                client._get_data_client(
+                    IdentityClient._convert_to_credential(self._sts_credential(access_key_id)))
+
+        assert len(client._data_client_pool) == 2
+
+    def test_unknown_credential_gets_new_data_client(self):
+        """Test that credentials not issued by the SDK are not pooled."""
+        client = self._make_client()
+        custom_credential = Mock()
+
+        with patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            mock_data_client_class.side_effect = lambda config: Mock()
+            first = client._get_data_client(custom_credential)
+            second = client._get_data_client(custom_credential)
+
+        assert first is not second
+        assert len(client._data_client_pool) == 0
+
+    def test_default_data_client_without_sts(self):
+        """Test that the default data client is used when STS is disabled."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+             patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient'), \
+             patch('agent_identity_python_sdk.core.identity.DataClient'):
+            client = IdentityClient(region_id="cn-beijing")
+
+        assert client._get_data_client(Mock()) is client.data_client
+
+
 class TestGetStsCredentialClient:
     """Test cases for get_sts_credential_client method."""
 
@@ -1225,7 +1611,7 @@ class TestGetStsCredentialClient:
                 expiration="2025-12-31T23:59:59Z"
             )
             
-            with patch('agent_identity_python_sdk.core.identity.get_cached_credential', return_value=cached_credential):
+            with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', return_value=cached_credential):
                 with patch('agent_identity_python_sdk.core.identity.store_credential_in_cache') as mock_store:
                     with patch.object(client, '_convert_to_credential') as mock_convert:
                         result = await client.get_sts_credential_client("workload-token", "user123", "user-token")
@@ -1260,16 +1646,128 @@ class TestGetStsCredentialClient:
                 expiration="2025-12-31T23:59:59Z"
             )
             
-            with patch('agent_identity_python_sdk.core.identity.get_cached_credential', return_value=None):
+            with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', return_value=None):
                 with patch.object(client, 'assume_role_for_workload_identity', return_value=mock_sts_credential) as mock_assume:
-                    with patch('agent_identity_python_sdk.core.identity.store_credential_in_cache') as mock_store:
+                    with patch('agent_identity_python_sdk.core.identity._get_or_compute_compact_credential',
+                               side_effect=lambda cache_key, compute: compute()) as mock_store:
                         with patch.object(client, '_convert_to_credential') as mock_convert:
                             result = await client.get_sts_credential_client("workload-token", "user123", "user-token")
                             
                             # Verify that assume_role was called, credential was stored, and converted
                             mock_assume.assert_called_once()
                             mock_store.assert_called_once()
-                            mock_convert.assert_called_once_with(mock_sts_credential)
+                            mock_convert.assert_called_once_with(CompactSTSCredential.from_sts_credential(mock_sts_credential))
+
+    @pytest.mark.asyncio
+    async def test_get_sts_credential_client_concurrent_misses_share_one_fetch(self):
+        """Test that concurrent cache misses for the same key assume the role only once."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_client.return_value = Mock()
+            mock_control_client_class.return_value = Mock()
+            mock_data_client_class.return_value = Mock()
+            
+            client = IdentityClient(region_id="cn-beijing")
+            
+            mock_sts_credential = STSCredential(
+                access_key_id="new-access-key-id",
+                access_key_secret="new-access-key-secret",
+                security_token="new-security-token",
+                expiration="2025-12-31T23:59:59Z"
+            )
+
+            async def slow_assume_role(**kwargs):
+                await asyncio.sleep(0.05)
+                return mock_sts_credential
+            
+            with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', return_value=None):
+                with patch.object(client, 'assume_role_for_workload_identity', new=AsyncMock(side_effect=slow_assume_role)) as mock_assume:
+                    with patch('agent_identity_python_sdk.core.identity._get_or_compute_compact_credential',
+                               side_effect=lambda cache_key, compute: compute()) as mock_store:
+                        with patch.object(client, '_convert_to_credential') as mock_convert:
+                            await asyncio.gather(*(
+                                client.get_sts_credential_client("workload-token-concurrent", "user123", "user-token")
+                                for _ in range(10)
+                            ))
+                            
+                            mock_assume.assert_awaited_once()
+                            mock_store.assert_called_once()
+                            assert mock_convert.call_count == 10
+
+    @pytest.mark.asyncio
+    async def test_get_sts_credential_client_refreshes_ahead_of_expiration(self):
+        """Test that a credential close to expiry is served while it is refreshed in the background."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_client.return_value = Mock()
+            mock_control_client_class.return_value = Mock()
+            mock_data_client_class.return_value = Mock()
+            
+            client = IdentityClient(region_id="cn-beijing")
+            
+            cached_credential = STSCredential(
+                access_key_id="cached-access-key-id",
+                access_key_secret="cached-access-key-secret",
+                security_token="cached-security-token",
+                expiration="2099-12-31T23:59:59Z"
+            )
+            refreshed_credential = STSCredential(
+                access_key_id="refreshed-access-key-id",
+                access_key_secret="refreshed-access-key-secret",
+                security_token="refreshed-security-token",
+                expiration="2099-12-31T23:59:59Z"
+            )
+            refreshed = threading.Event()
+
+            def store(cache_key, credential, ttl=None):
+                refreshed.set()
+            
+            with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', return_value=cached_credential), \
+                 patch('agent_identity_python_sdk.core.identity.claim_credential_refresh', return_value=True), \
+                 patch('agent_identity_python_sdk.core.identity.store_credential_in_cache', side_effect=store) as mock_store:
+                with patch.object(client, 'assume_role_for_workload_identity', new=AsyncMock(return_value=refreshed_credential)) as mock_assume:
+                    with patch.object(client, '_convert_to_credential') as mock_convert:
+                        await client.get_sts_credential_client("workload-token-refresh", "user123", "user-token")
+                        
+                        # The cached credential is served immediately
+                        mock_convert.assert_called_once_with(cached_credential)
+                        assert refreshed.wait(timeout=2)
+                        mock_assume.assert_awaited_once()
+                        assert mock_store.call_args.args[1] == CompactSTSCredential.from_sts_credential(refreshed_credential)
+
+    @pytest.mark.asyncio
+    async def test_get_sts_credential_client_failed_refresh_releases_claim(self):
+        """Test that a failed background refresh allows a later retry."""
+        with patch('agent_identity_python_sdk.core.identity.CredentialClient') as mock_credential_client, \
+             patch('agent_identity_python_sdk.core.identity.ControlClient') as mock_control_client_class, \
+             patch('agent_identity_python_sdk.core.identity.DataClient') as mock_data_client_class:
+            
+            mock_credential_client.return_value = Mock()
+            mock_control_client_class.return_value = Mock()
+            mock_data_client_class.return_value = Mock()
+            
+            client = IdentityClient(region_id="cn-beijing")
+            
+            cached_credential = STSCredential(
+                access_key_id="cached-access-key-id",
+                access_key_secret="cached-access-key-secret",
+                security_token="cached-security-token",
+                expiration="2099-12-31T23:59:59Z"
+            )
+            released = threading.Event()
+            
+            with patch('agent_identity_python_sdk.core.identity._get_cached_compact_credential', return_value=cached_credential), \
+                 patch('agent_identity_python_sdk.core.identity.claim_credential_refresh', return_value=True), \
+                 patch('agent_identity_python_sdk.core.identity.release_credential_refresh', side_effect=lambda key: released.set()):
+                with patch.object(client, 'assume_role_for_workload_identity', new=AsyncMock(side_effect=Exception("API Error"))):
+                    with patch.object(client, '_convert_to_credential'):
+                        await client.get_sts_credential_client("workload-token-refresh-fail", "user123", "user-token")
+                        
+                        assert released.wait(timeout=2)
 
 
 class TestAssumeRoleForWorkloadIdentity:
@@ -1306,7 +1804,7 @@ class TestAssumeRoleForWorkloadIdentity:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'assume_role_for_workload_identity', return_value=mock_response):
+            with patch.object(client.data_client, 'assume_role_for_workload_identity_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.assume_role_for_workload_identity(
                     workload_token="workload-token",
                     role_session_name="test-session"
@@ -1349,7 +1847,7 @@ class TestAssumeRoleForWorkloadIdentity:
             mock_response = Mock()
             mock_response.body = mock_response_body
             
-            with patch.object(client.data_client, 'assume_role_for_workload_identity', return_value=mock_response):
+            with patch.object(client.data_client, 'assume_role_for_workload_identity_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.assume_role_for_workload_identity(
                     workload_token="workload-token",
                     role_session_name="test-session",
@@ -1378,7 +1876,7 @@ class TestAssumeRoleForWorkloadIdentity:
             
             client = IdentityClient(region_id="cn-beijing")
             
-            with patch.object(client.data_client, 'assume_role_for_workload_identity', side_effect=Exception("API Error")):
+            with patch.object(client.data_client, 'assume_role_for_workload_identity_async', new=AsyncMock(side_effect=Exception("API Error"))):
                 with pytest.raises(Exception, match="API Error"):
                     await client.assume_role_for_workload_identity(
                         workload_token="workload-token",
@@ -1414,11 +1912,11 @@ class TestPollForOAuth2Token:
             
             request = Mock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 result = await client.poll_for_oauth2_token(request, max_retries=3, delay_sec=0.1)
                 
                 assert result == "poll-token"
-                client.data_client.get_resource_oauth2_token.assert_called_once_with(request)
+                client.data_client.get_resource_oauth2_token_async.assert_called_once_with(request)
 
     @pytest.mark.asyncio
     async def test_poll_for_oauth2_token_success_on_second_attempt(self):
@@ -1451,15 +1949,15 @@ class TestPollForOAuth2Token:
             
             request = Mock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', side_effect=[
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=[
                 mock_response_no_token, 
                 mock_response_with_token
-            ]):
+            ])):
                 with patch('asyncio.sleep', return_value=None):  # Mock sleep to avoid actual delays
                     result = await client.poll_for_oauth2_token(request, max_retries=3, delay_sec=0.1)
                     
                     assert result == "poll-token"
-                    assert client.data_client.get_resource_oauth2_token.call_count == 2
+                    assert client.data_client.get_resource_oauth2_token_async.call_count == 2
 
     @pytest.mark.asyncio
     async def test_poll_for_oauth2_token_max_retries_exceeded(self):
@@ -1487,7 +1985,7 @@ class TestPollForOAuth2Token:
             
             request = Mock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', return_value=mock_response):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(return_value=mock_response)):
                 with patch('asyncio.sleep', return_value=None):  # Mock sleep to avoid actual delays
                     with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after 2 attempts"):
                         await client.poll_for_oauth2_token(request, max_retries=2, delay_sec=0.1)
@@ -1512,7 +2010,206 @@ class TestPollForOAuth2Token:
             
             request = Mock()
             
-            with patch.object(client.data_client, 'get_resource_oauth2_token', side_effect=Exception("API Error")):
+            with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=ConnectionError("Connection reset"))), \
+                 patch('agent_identity_python_sdk.core.identity.get_retry_policy', return_value=RetryPolicy()):
                 with patch('asyncio.sleep', return_value=None):  # Mock sleep to avoid actual delays
                     with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after 2 attempts"):
-                        await client.poll_for_oauth2_token(request, max_retries=2, delay_sec=0.1)
\ No newline at end of file
+                        await client.poll_for_oauth2_token(request, max_retries=2, delay_sec=0.1)
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_with_non_retryable_exception(self):
+        """Test that polling stops at the first error that is not retryable."""
+        client = self._make_client()
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(side_effect=_ServiceError("InvalidParameter.SessionURI", 400))):
+            with pytest.raises(_ServiceError):
+                await client.poll_for_oauth2_token(Mock(), max_retries=3, delay_sec=0)
+            assert client.data_client.get_resource_oauth2_token_async.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_stops_when_retry_budget_exhausted(self):
+        """Test that polling stops retrying errors once the retry budget is exhausted."""
+        client = self._make_client()
+        policy = RetryPolicy(budget=RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1))
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(side_effect=_ServiceError("ServiceUnavailable", 503))), \
+             patch('agent_identity_python_sdk.core.identity.get_retry_policy', return_value=policy):
+            with pytest.raises(_ServiceError):
+                await client.poll_for_oauth2_token(Mock(), max_retries=5, delay_sec=0)
+            assert client.data_client.get_resource_oauth2_token_async.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_polls_do_not_earn_retries(self):
+        """Test that pending polls are not counted as calls earning retries of the budget."""
+        client = self._make_client()
+        budget = RetryBudget(ratio=0.5, min_retries_per_second=0, max_tokens=1)
+        assert budget.try_spend()
+        policy = RetryPolicy(budget=budget)
+        responses = [self._pending_response() for _ in range(4)] + [_ServiceError("ServiceUnavailable", 503)]
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(side_effect=responses)), \
+             patch('agent_identity_python_sdk.core.identity.get_retry_policy', return_value=policy):
+            with pytest.raises(_ServiceError):
+                await client.poll_for_oauth2_token(Mock(), max_retries=10, delay_sec=0)
+            assert client.data_client.get_resource_oauth2_token_async.call_count == 5
+
+    @staticmethod
+    def _make_client():
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+             patch('agent_identity_python_sdk.core.identity.CredentialClient'), \
+             patch('agent_identity_python_sdk.core.identity.ControlClient'), \
+             patch('agent_identity_python_sdk.core.identity.DataClient'):
+            return IdentityClient(region_id="cn-beijing")
+
+    @staticmethod
+    def _pending_response():
+        mock_response = Mock()
+        mock_response.body.access_token = None
+        return mock_response
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_stops_at_deadline(self):
+        """Test that polling stops once the overall deadline has passed."""
+        client = self._make_client()
+        request = Mock(session_uri=None)
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(return_value=self._pending_response())) as mock_get:
+            with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after"):
+                await client.poll_for_oauth2_token(request, timeout=0.2, delay_sec=0.05)
+
+            assert 2 <= mock_get.await_count <= 6
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_uses_exponential_backoff_by_default(self):
+        """Test that the default delays start short and grow up to the cap."""
+        client = self._make_client()
+        request = Mock(session_uri=None)
+        responses = [self._pending_response()] * 8
+        success = Mock()
+        success.body.access_token = "poll-token"
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(side_effect=responses + [success])), \
+             patch('agent_identity_python_sdk.utils.backoff.random.random', return_value=0.0), \
+             patch('asyncio.sleep', return_value=None) as mock_sleep:
+            result = await client.poll_for_oauth2_token(request)
+
+        assert result == "poll-token"
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays[0] == 0.5
+        assert delays == sorted(delays)
+        assert max(delays) == 5.0
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_custom_backoff(self):
+        """Test that a custom backoff strategy determines the delays."""
+        from agent_identity_python_sdk.utils.backoff import ExponentialBackoff
+
+        client = self._make_client()
+        request = Mock(session_uri=None)
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(return_value=self._pending_response())), \
+             patch('asyncio.sleep', return_value=None) as mock_sleep:
+            with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after 4 attempts"):
+                await client.poll_for_oauth2_token(
+                    request, max_retries=4,
+                    backoff=ExponentialBackoff(initial_interval=1, multiplier=2, max_interval=3, jitter=0))
+
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_timeout_from_environment(self):
+        """Test that the deadline defaults to AGENT_IDENTITY_OAUTH2_POLL_TIMEOUT."""
+        client = self._make_client()
+        request = Mock(session_uri=None)
+
+        with patch.dict(os.environ, {"AGENT_IDENTITY_OAUTH2_POLL_TIMEOUT": "0"}), \
+             patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(return_value=self._pending_response())):
+            with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after 1 attempts"):
+                await client.poll_for_oauth2_token(request)
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_cancels_promptly(self):
+        """Test that cancelling the awaiting task stops polling immediately."""
+        client = self._make_client()
+        request = Mock(session_uri=None)
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(return_value=self._pending_response())) as mock_get:
+            task = asyncio.create_task(client.poll_for_oauth2_token(request, delay_sec=10))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(task, timeout=1)
+            assert mock_get.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_wakes_on_confirmation(self):
+        """Test that confirming the session in process makes the poller fetch the token right away."""
+        client = self._make_client()
+        request = Mock(session_uri="urn:session:wake")
+        success = Mock()
+        success.body.access_token = "poll-token"
+        confirmed = False
+
+        async def get_token(_request):
+            return success if confirmed else self._pending_response()
+
+        with patch.object(client.data_client, 'get_resource_oauth2_token_async', new=AsyncMock(side_effect=get_token)), \
+             patch.object(client.data_client, 'complete_resource_token_auth_async', new=AsyncMock(return_value=Mock())):
+            task = asyncio.create_task(client.poll_for_oauth2_token(request, delay_sec=10))
+            await asyncio.sleep(0.05)
+
+            confirmed = True
+            start = time.monotonic()
+            await client.confirm_user_auth_async(session_uri="urn:session:wake", user_id="user-1")
+
+            assert await asyncio.wait_for(task, timeout=2) == "poll-token"
+            assert time.monotonic() - start < 1
+            assert client.data_client.get_resource_oauth2_token_async.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_poll_for_oauth2_token_uses_notification_once(self):
+        """Test that after a notification the poller goes back to its regular delays."""
+        client = self._make_client()
+        request = Mock(session_uri="urn:session:once")
+
+        with patch('agent_identity_python_sdk.core.identity.wait_for_auth_completion',
+                   new=AsyncMock(return_value=True)) as mock_wait, \
+             patch.object(client.data_client, 'get_resource_oauth2_token_async',
+                          new=AsyncMock(return_value=self._pending_response())), \
+             patch('asyncio.sleep', return_value=None) as mock_sleep:
+            with pytest.raises(RuntimeError, match="Failed to get OAuth2 token after 3 attempts"):
+                await client.poll_for_oauth2_token(request, max_retries=3, delay_sec=1)
+
+        mock_wait.assert_awaited_once_with("urn:session:once", 1)
+        assert [call.args[0] for call in mock_sleep.call_args_list] == [1]
+
+    def test_confirm_user_auth_notifies_completion(self):
+        """Test that a successful confirmation notifies waiting pollers."""
+        client = self._make_client()
+
+        with patch.object(client.data_client, 'complete_resource_token_auth', return_value=Mock()), \
+             patch('agent_identity_python_sdk.core.identity.notify_auth_completed') as mock_notify:
+            client.confirm_user_auth(session_uri="urn:session", user_id="user-1")
+
+        mock_notify.assert_called_once_with("urn:session")
+
+    def test_failed_confirm_user_auth_does_not_notify(self):
+        """Test that a failed confirmation does not wake pollers."""
+        client = self._make_client()
+
+        with patch.object(client.data_client, 'complete_resource_token_auth', side_effect=Exception("API Error")), \
+             patch('agent_identity_python_sdk.core.identity.notify_auth_completed') as mock_notify:
+            with pytest.raises(Exception, match="API Error"):
+                client.confirm_user_auth(session_uri="urn:session", user_id="user-1")
+
+        mock_notify.assert_not_called()
+
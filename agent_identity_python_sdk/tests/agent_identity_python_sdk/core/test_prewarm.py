@@ -0,0 +1,172 @@
+"""Tests for the prewarm module."""
+import asyncio
+import base64
+import json
+import os
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from pydantic import ValidationError
+
+from agent_identity_python_sdk.context import AgentIdentityContext
+from agent_identity_python_sdk.core.decorators import requires_access_token, requires_api_key
+from agent_identity_python_sdk.core.prewarm import prewarm_credentials, prewarm_credentials_async
+from agent_identity_python_sdk.model.prewarm import PrewarmSpec
+from agent_identity_python_sdk.utils.cache import (
+    _api_key_cache,
+    _oauth2_token_cache,
+    _sts_cache,
+    _workload_access_token_cache
+)
+
+
+def _make_jwt(payload):
+    encoded = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+    return f"header.{encoded}.signature"
+
+
+class TestPrewarmSpec:
+    """Test cases for the PrewarmSpec model."""
+
+    def test_credential_provider_name_required(self):
+        """Test that API keys and OAuth2 tokens require a credential provider."""
+        with pytest.raises(ValidationError):
+            PrewarmSpec(kind="api_key")
+        with pytest.raises(ValidationError):
+            PrewarmSpec(kind="oauth2", user_id="user-1")
+        assert PrewarmSpec(kind="sts", user_id="user-1").credential_provider_name is None
+
+    def test_unknown_kind(self):
+        """Test that unknown kinds are rejected."""
+        with pytest.raises(ValidationError):
+            PrewarmSpec(kind="password")
+
+
+class TestPrewarmCredentials:
+    """Test cases for prewarm_credentials and prewarm_credentials_async."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        for cache in (_api_key_cache, _oauth2_token_cache, _sts_cache, _workload_access_token_cache):
+            cache.clear()
+        self.client = Mock()
+        self.client.get_workload_access_token_async = AsyncMock(
+            side_effect=lambda name, user_id=None, user_token=None: _make_jwt(
+                {"sub": user_id or user_token, "exp": int(time.time()) + 3600}))
+        self.client.get_sts_credential_client = AsyncMock(return_value=Mock())
+        self.client.get_api_key = AsyncMock(return_value="api-key")
+        self.client.get_token = AsyncMock(
+            side_effect=lambda **kwargs: _make_jwt({"provider": kwargs["credential_provider_name"],
+                                                    "exp": int(time.time()) + 3600}))
+        self.patches = [
+            patch.dict(os.environ, {"AGENT_IDENTITY_WORKLOAD_IDENTITY_NAME": "test-workload-identity"}),
+            patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=self.client),
+            patch('agent_identity_python_sdk.core.decorators.write_local_config'),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        for p in self.patches:
+            p.stop()
+        AgentIdentityContext.clear()
+
+    @pytest.mark.asyncio
+    async def test_prewarmed_credentials_are_served_from_cache(self):
+        """Test that decorated functions find the prewarmed credentials in the caches."""
+        results = await prewarm_credentials_async([
+            PrewarmSpec(kind="sts", user_id="user-1"),
+            PrewarmSpec(kind="api_key", credential_provider_name="api-provider"),
+            PrewarmSpec(kind="oauth2", credential_provider_name="oauth-provider", user_id="user-1", scopes=["read"]),
+        ])
+
+        assert all(result.succeeded for result in results)
+        assert self.client.get_token.await_args.kwargs["poll_for_token"] is False
+        assert {call.kwargs["user_id"] for call in self.client.get_sts_credential_client.await_args_list} == {"user-1", None}
+
+        @requires_api_key(credential_provider_name="api-provider")
+        async def api_key_tool(api_key):
+            return api_key
+
+        @requires_access_token(credential_provider_name="oauth-provider", scopes=["read"])
+        async def oauth_tool(access_token):
+            return access_token
+
+        AgentIdentityContext.set_user_id("user-1")
+        assert await api_key_tool() == "api-key"
+        assert await oauth_tool()
+        self.client.get_api_key.assert_awaited_once()
+        self.client.get_token.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failures_do_not_abort_the_batch(self):
+        """Test that failures are reported per spec, in the order of the specs."""
+        self.client.get_token = AsyncMock(side_effect=RuntimeError("authorization flow needs to be completed"))
+        specs = [
+            PrewarmSpec(kind="oauth2", credential_provider_name="oauth-provider", user_id="user-1"),
+            PrewarmSpec(kind="workload_access_token", user_id="user-2"),
+            PrewarmSpec(kind="workload_access_token", user_token="user-jwt"),
+        ]
+
+        results = await prewarm_credentials_async(specs)
+
+        assert [result.spec for result in results] == specs
+        assert isinstance(results[0].error, RuntimeError)
+        assert results[1].succeeded and results[2].succeeded
+        assert len(_workload_access_token_cache) == 3
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency credentials are fetched at once."""
+        in_flight = 0
+        max_in_flight = 0
+
+        async def get_api_key(**kwargs):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return kwargs["credential_provider_name"]
+
+        self.client.get_api_key = AsyncMock(side_effect=get_api_key)
+        specs = [PrewarmSpec(kind="api_key", credential_provider_name=f"provider-{i}") for i in range(10)]
+
+        results = await prewarm_credentials_async(specs, max_concurrency=3)
+
+        assert all(result.succeeded for result in results)
+        assert max_in_flight == 3
+
+    @pytest.mark.asyncio
+    async def test_caller_context_is_untouched(self):
+        """Test that the users of the specs do not leak into the calling context."""
+        AgentIdentityContext.set_user_id("caller")
+
+        await prewarm_credentials_async([PrewarmSpec(kind="workload_access_token", user_id="user-1")])
+
+        assert AgentIdentityContext.get_user_id() == "caller"
+
+    @pytest.mark.asyncio
+    async def test_context_workload_access_token_is_warned_about(self, caplog):
+        """Test that prewarming users with the workload access token of the calling context logs a warning."""
+        AgentIdentityContext.set_workload_access_token("context-workload-token")
+
+        with caplog.at_level("WARNING", logger="agentidentity.core.prewarm"):
+            await prewarm_credentials_async([PrewarmSpec(kind="sts", user_id="user-1")])
+
+        assert "workload access token of the calling context" in caplog.text
+        self.client.get_workload_access_token_async.assert_not_awaited()
+
+    def test_sync(self):
+        """Test prewarming from synchronous code."""
+        results = prewarm_credentials([PrewarmSpec(kind="api_key", credential_provider_name="api-provider")])
+
+        assert results[0].succeeded
+        self.client.get_api_key.assert_awaited_once()
+
+    def test_invalid_concurrency(self):
+        """Test that the concurrency must be positive."""
+        with pytest.raises(ValueError):
+            prewarm_credentials([], max_concurrency=0)
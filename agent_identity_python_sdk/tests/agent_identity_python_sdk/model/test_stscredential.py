@@ -0,0 +1,72 @@
+"""Tests for the stscredential module."""
+import dataclasses
+from datetime import datetime, timezone
+
+import pytest
+
+from agent_identity_python_sdk.model.stscredential import CompactSTSCredential, STSCredential
+from agent_identity_python_sdk.utils.cache_backends import _decode, _encode
+
+
+def _sts_credential(expiration="2099-12-31T23:59:59Z"):
+    return STSCredential(
+        access_key_id="test-access-key-id",
+        access_key_secret="test-access-key-secret",
+        security_token="test-security-token",
+        expiration=expiration
+    )
+
+
+class TestCompactSTSCredential:
+    """Test cases for the CompactSTSCredential class."""
+
+    def test_round_trip(self):
+        """Test converting from and back to STSCredential."""
+        credential = _sts_credential()
+
+        compact = CompactSTSCredential.from_sts_credential(credential)
+
+        assert compact.expires_at == datetime(2099, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+        assert compact.expiration == "2099-12-31T23:59:59Z"
+        assert compact.to_sts_credential() == credential
+
+    def test_expiration_with_offset_is_kept(self):
+        """Test that an expiration with an offset is converted back as the service returned it."""
+        credential = _sts_credential("2100-01-01T07:59:59+08:00")
+        compact = CompactSTSCredential.from_sts_credential(credential)
+
+        assert compact.expires_at == datetime(2099, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+        assert compact.to_sts_credential() == credential
+
+    def test_unparseable_expiration(self):
+        """Test that an expiration that cannot be parsed is unknown to the cache but kept for callers."""
+        credential = _sts_credential("not a timestamp")
+        compact = CompactSTSCredential.from_sts_credential(credential)
+
+        assert compact.expires_at is None
+        assert compact.to_sts_credential() == credential
+
+    def test_expiration_formatted_when_not_given(self):
+        """Test that a credential built from a timestamp only gets an expiration in UTC."""
+        expires_at = datetime(2099, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+
+        assert CompactSTSCredential("id", "secret", "token", expires_at).expiration == "2099-12-31T23:59:59Z"
+        assert CompactSTSCredential("id", "secret", "token", None).expiration == ""
+
+    def test_immutable_and_compact(self):
+        """Test that instances cannot be modified and have no per-instance dictionary."""
+        compact = CompactSTSCredential.from_sts_credential(_sts_credential())
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            compact.access_key_id = "other"
+        assert not hasattr(compact, "__dict__")
+        assert hash(compact) == hash(CompactSTSCredential.from_sts_credential(_sts_credential()))
+
+    def test_serialization(self):
+        """Test encoding for cache backends that store JSON."""
+        compact = CompactSTSCredential.from_sts_credential(_sts_credential())
+
+        assert _decode(_encode(compact)) == compact
+        offset = CompactSTSCredential.from_sts_credential(_sts_credential("2100-01-01T07:59:59+08:00"))
+        assert _decode(_encode(offset)).expiration == "2100-01-01T07:59:59+08:00"
+        assert _decode(_encode(_sts_credential())) == _sts_credential()
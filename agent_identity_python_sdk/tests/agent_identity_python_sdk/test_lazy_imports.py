@@ -0,0 +1,54 @@
+"""Tests for the lazy imports of the package."""
+import json
+import subprocess
+import sys
+
+import pytest
+
+
+def _imported_modules(code):
+    """Run code in a fresh interpreter and return the Alibaba Cloud SDK and pydantic modules it imported."""
+    script = code + "\nimport json, sys\n" \
+                    "print(json.dumps(sorted(m for m in sys.modules if m.startswith(('alibabacloud', 'pydantic')))))"
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True).stdout
+    return set(json.loads(output.splitlines()[-1]))
+
+
+class TestLazyImports:
+    """Test cases for deferring the import of the Alibaba Cloud SDK until it is used."""
+
+    def test_package_import_is_light(self):
+        """Test that importing the package imports neither the Alibaba Cloud SDK nor pydantic."""
+        assert _imported_modules("import agent_identity_python_sdk") == set()
+
+    def test_decorators_do_not_import_sdk(self):
+        """Test that decorating functions does not import the Alibaba Cloud SDK."""
+        modules = _imported_modules(
+            "from agent_identity_python_sdk import requires_api_key\n"
+            "requires_api_key(credential_provider_name='provider')(lambda api_key: api_key)")
+
+        assert not any(module.startswith("alibabacloud") for module in modules)
+
+    def test_control_api_not_imported_on_request_path(self):
+        """Test that creating an IdentityClient imports the data API client but not the control API client."""
+        modules = _imported_modules(
+            "import os\n"
+            "os.environ['AGENT_IDENTITY_USE_STS'] = 'false'\n"
+            "from agent_identity_python_sdk.core.identity import IdentityClient\n"
+            "IdentityClient('cn-beijing')")
+
+        assert "alibabacloud_agentidentitydata20251127.client" in modules
+        assert "alibabacloud_agentidentity20250901.client" not in modules
+
+    @pytest.mark.parametrize("name", ["IdentityClient", "requires_access_token", "AgentIdentityContext"])
+    def test_exports(self, name):
+        """Test that the exported names resolve on access."""
+        import agent_identity_python_sdk
+        from agent_identity_python_sdk import core, model
+
+        assert getattr(agent_identity_python_sdk, name) is not None
+        assert name in dir(agent_identity_python_sdk)
+        assert core.prewarm_credentials is not None
+        assert model.PrewarmSpec is not None
+        with pytest.raises(AttributeError):
+            getattr(agent_identity_python_sdk, "missing")
@@ -0,0 +1,2 @@
+"""Test for Agent Identity Testing Package.
+"""
@@ -0,0 +1,184 @@
+"""Tests for the emulator module."""
+import asyncio
+import os
+import random
+import time
+from unittest.mock import patch
+
+import pytest
+from Tea.exceptions import TeaException
+
+from agent_identity_python_sdk.core.identity import IdentityClient
+from agent_identity_python_sdk.model.stscredential import STSCredential, parse_expiration
+from agent_identity_python_sdk.testing import DataApiEmulator, EmulatorError, LatencyDistribution
+from agent_identity_python_sdk.utils.backoff import FixedBackoff
+from agent_identity_python_sdk.utils.retry import RetryPolicy, get_retry_policy, set_retry_policy
+from agent_identity_python_sdk.utils.token import get_jwt_expiration
+
+_AUTH_UTIL = "alibabacloud_credentials.utils.auth_util"
+
+
+class TestLatencyDistribution:
+    """Test cases for the LatencyDistribution class."""
+
+    def test_parse(self):
+        """Test parsing distribution specifications."""
+        rng = random.Random(1)
+        assert LatencyDistribution.parse("0.02").sample(rng) == 0.02
+        assert LatencyDistribution.parse("constant:0.5").sample(rng) == 0.5
+        assert 0.01 <= LatencyDistribution.parse("uniform:0.01:0.03").sample(rng) <= 0.03
+        assert LatencyDistribution.parse("lognormal:0.02:0.5").sample(rng) > 0
+        assert LatencyDistribution.parse("normal:0:1").sample(rng) >= 0
+
+    @pytest.mark.parametrize("spec", ["fast", "uniform:0.1", "pareto:1:2", "normal:a:b"])
+    def test_parse_invalid(self, spec):
+        """Test that invalid specifications are rejected."""
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse(spec)
+
+
+class TestDataApiEmulator:
+    """Test cases for the DataApiEmulator class, driven through the real IdentityClient."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        # The credential chain reads the access key environment variables at import time
+        self.patches = [
+            patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}),
+            patch(f"{_AUTH_UTIL}.environment_access_key_id", "emulator-access-key-id"),
+            patch(f"{_AUTH_UTIL}.environment_access_key_secret", "emulator-access-key-secret"),
+        ]
+        for p in self.patches:
+            p.start()
+        self.retry_policy = get_retry_policy()
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        set_retry_policy(self.retry_policy)
+        for p in self.patches:
+            p.stop()
+
+    @pytest.mark.asyncio
+    async def test_credential_operations(self):
+        """Test workload access tokens, STS credentials and API keys."""
+        with DataApiEmulator() as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+
+            token = await client.get_workload_access_token_async("workload", user_id="user-1")
+            assert get_jwt_expiration(token) > time.time()
+            assert client.get_workload_access_token("workload", user_token="user-jwt")
+
+            credential = await client.assume_role_for_workload_identity(workload_token=token,
+                                                                        role_session_name="session",
+                                                                        duration_seconds=900)
+            assert isinstance(credential, STSCredential)
+            assert 800 < parse_expiration(credential.expiration) - time.time() <= 900
+
+            api_key = await client.get_api_key(credential_provider_name="provider", agent_identity_token=token)
+            assert api_key == "emulator-api-key-provider"
+
+            assert emulator.stats()["GetWorkloadAccessTokenForUserId"]["requests"] == 1
+
+    @pytest.mark.asyncio
+    async def test_oauth2_authorization_flow(self):
+        """Test that the token is returned once the authorization session has been confirmed."""
+        with DataApiEmulator(authorization_rate=1.0) as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+            token = await client.get_workload_access_token_async("workload", user_id="user-1")
+            auth_urls = []
+
+            async def confirm(url):
+                auth_urls.append(url)
+                session_uri = url.split("session=")[1]
+                await asyncio.sleep(0.1)
+                await client.confirm_user_auth_async(session_uri, user_id="user-1")
+
+            def on_auth_url(url):
+                asyncio.get_running_loop().create_task(confirm(url))
+
+            access_token = await client.get_token(credential_provider_name="provider", scopes=["read"],
+                                                  workload_identity_token=token, auth_flow="USER_FEDERATION",
+                                                  on_auth_url=on_auth_url)
+            assert access_token
+            assert len(auth_urls) == 1
+
+            # The grant is remembered once authorized
+            assert await client.get_token(credential_provider_name="provider", scopes=["read"],
+                                          workload_identity_token=token, auth_flow="USER_FEDERATION")
+
+    @pytest.mark.asyncio
+    async def test_sessions_complete_automatically(self):
+        """Test that sessions complete on their own after the configured delay."""
+        with DataApiEmulator(authorization_rate=1.0, auto_complete_after=0.1) as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+            token = await client.get_workload_access_token_async("workload")
+
+            access_token = await client.get_token(credential_provider_name="provider",
+                                                  workload_identity_token=token, auth_flow="USER_FEDERATION")
+
+            assert access_token
+            assert emulator.stats()["GetResourceOAuth2Token"]["requests"] >= 2
+
+    def test_unknown_session_is_rejected(self):
+        """Test that confirming an unknown session fails with the error code of the data API."""
+        with DataApiEmulator() as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+
+            with pytest.raises(TeaException) as exc_info:
+                client.confirm_user_auth("urn:unknown", user_id="user-1")
+            assert exc_info.value.code == "InvalidParameter.SessionURI"
+
+    def test_error_rate(self):
+        """Test that failing requests are returned as server errors, which are retried."""
+        set_retry_policy(RetryPolicy(max_attempts=2, backoff=FixedBackoff(0)))
+        with DataApiEmulator(error_rates={"GetWorkloadAccessToken": 1.0}) as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+
+            with pytest.raises(TeaException) as exc_info:
+                client.get_workload_access_token("workload")
+            assert exc_info.value.code == "ServiceUnavailable"
+            assert client.get_workload_access_token("workload", user_id="user-1")
+            assert emulator.stats()["GetWorkloadAccessToken"]["errors"] == 2
+
+    def test_throttling(self):
+        """Test that requests above the rate are throttled."""
+        set_retry_policy(RetryPolicy(max_attempts=1))
+        with DataApiEmulator(throttle_rate=1, throttle_burst=2) as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+            client.get_workload_access_token("workload")
+            client.get_workload_access_token("workload")
+
+            with pytest.raises(TeaException) as exc_info:
+                client.get_workload_access_token("workload")
+            assert exc_info.value.code == "Throttling.User"
+            assert emulator.stats()["GetWorkloadAccessToken"]["throttled"] == 1
+
+    def test_throttled_requests_retried_after_delay(self):
+        """Test that throttled requests are retried no sooner than the service asks for."""
+        set_retry_policy(RetryPolicy(backoff=FixedBackoff(0)))
+        with DataApiEmulator(throttle_rate=5, throttle_burst=1) as emulator:
+            client = IdentityClient("cn-beijing", data_api_endpoint=emulator.endpoint)
+            client.get_workload_access_token("workload")
+
+            start = time.monotonic()
+            assert client.get_workload_access_token("workload")
+            assert time.monotonic() - start >= 1
+            assert emulator.stats()["GetWorkloadAccessToken"]["throttled"] == 1
+
+    def test_latency(self):
+        """Test that responses are delayed by the configured latency."""
+        emulator = DataApiEmulator(latency=LatencyDistribution.constant(0.2))
+        start = time.monotonic()
+        emulator.handle("GetWorkloadAccessToken", {"WorkloadIdentityName": "workload"})
+        assert time.monotonic() - start >= 0.2
+        emulator.stop()
+
+    def test_missing_parameter(self):
+        """Test that missing mandatory parameters are rejected."""
+        emulator = DataApiEmulator()
+        with pytest.raises(EmulatorError) as exc_info:
+            emulator.handle("GetResourceAPIKey", {"WorkloadAccessToken": "token"})
+        assert exc_info.value.code == "MissingParameter.ResourceCredentialProviderName"
+        with pytest.raises(EmulatorError):
+            emulator.handle("DeleteEverything", {})
+        emulator.stop()
@@ -0,0 +1,164 @@
+"""Tests for the auth_completion module."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent_identity_python_sdk.utils.auth_completion import AuthCompletionChannel, AuthCompletionNotifier
+
+
+class _RecordingChannel(AuthCompletionChannel):
+    """Channel that records published notifications and lets tests deliver incoming ones."""
+
+    def __init__(self):
+        self.published = []
+        self.callbacks = []
+
+    def publish(self, session_uri):
+        self.published.append(session_uri)
+
+    def subscribe(self, callback):
+        self.callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        self.callbacks.remove(callback)
+
+    def deliver(self, session_uri):
+        for callback in self.callbacks:
+            callback(session_uri)
+
+
+class TestAuthCompletionChannel:
+    """Test cases for the AuthCompletionChannel base class."""
+
+    def test_is_abstract(self):
+        """Test that channels must implement publish and subscribe."""
+        class _PublishOnly(AuthCompletionChannel):
+            def publish(self, session_uri):
+                pass
+
+        with pytest.raises(TypeError):
+            _PublishOnly()
+
+
+class TestAuthCompletionNotifier:
+    """Test cases for the AuthCompletionNotifier class."""
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_without_notification(self):
+        """Test that wait returns False when the session is not confirmed in time."""
+        notifier = AuthCompletionNotifier()
+
+        assert await notifier.wait("urn:session", 0.05) is False
+
+    @pytest.mark.asyncio
+    async def test_notify_wakes_waiters(self):
+        """Test that all waiters of a session wake up when it is confirmed."""
+        notifier = AuthCompletionNotifier()
+
+        waiters = [asyncio.create_task(notifier.wait("urn:session", 5)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        start = time.monotonic()
+        notifier.notify("urn:session")
+
+        assert await asyncio.gather(*waiters) == [True, True, True]
+        assert time.monotonic() - start < 1
+
+    @pytest.mark.asyncio
+    async def test_notify_only_wakes_matching_session(self):
+        """Test that confirming one session does not wake waiters of another."""
+        notifier = AuthCompletionNotifier()
+
+        waiter = asyncio.create_task(notifier.wait("urn:other", 0.1))
+        await asyncio.sleep(0.01)
+        notifier.notify("urn:session")
+
+        assert await waiter is False
+
+    @pytest.mark.asyncio
+    async def test_completion_before_wait_is_remembered(self):
+        """Test that a waiter that starts after the confirmation returns immediately."""
+        notifier = AuthCompletionNotifier()
+        notifier.notify("urn:session")
+
+        assert await notifier.wait("urn:session", 5) is True
+
+    @pytest.mark.asyncio
+    async def test_remembered_completion_expires(self):
+        """Test that a confirmation is only remembered for the completion time to live."""
+        notifier = AuthCompletionNotifier(completion_ttl=0.01)
+        notifier.notify("urn:session")
+        await asyncio.sleep(0.05)
+
+        assert await notifier.wait("urn:session", 0.05) is False
+
+    @pytest.mark.asyncio
+    async def test_notify_from_other_thread(self):
+        """Test that a confirmation on another thread wakes a waiter on this event loop."""
+        notifier = AuthCompletionNotifier()
+
+        waiter = asyncio.create_task(notifier.wait("urn:session", 5))
+        await asyncio.sleep(0.01)
+        threading.Thread(target=notifier.notify, args=("urn:session",)).start()
+
+        assert await waiter is True
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_removed(self):
+        """Test that finished waiters do not accumulate."""
+        notifier = AuthCompletionNotifier()
+
+        await notifier.wait("urn:session", 0.01)
+
+        assert notifier._waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_channel_publishes_and_delivers(self):
+        """Test that confirmations are published to the channel and notifications from it wake waiters."""
+        notifier = AuthCompletionNotifier()
+        channel = _RecordingChannel()
+        notifier.set_channel(channel)
+
+        notifier.notify("urn:local")
+        assert channel.published == ["urn:local"]
+
+        waiter = asyncio.create_task(notifier.wait("urn:remote", 5))
+        await asyncio.sleep(0.01)
+        channel.deliver("urn:remote")
+
+        assert await waiter is True
+        assert channel.published == ["urn:local"]
+
+    @pytest.mark.asyncio
+    async def test_replaced_channel_is_unsubscribed(self):
+        """Test that notifications of a replaced channel no longer wake waiters."""
+        notifier = AuthCompletionNotifier()
+        old_channel = _RecordingChannel()
+        new_channel = _RecordingChannel()
+        notifier.set_channel(old_channel)
+        notifier.set_channel(new_channel)
+
+        assert old_channel.callbacks == []
+        old_channel.deliver("urn:session")
+        assert await notifier.wait("urn:session", 0.01) is False
+
+        notifier.set_channel(None)
+        assert new_channel.callbacks == []
+
+    def test_completed_sessions_named_in_metrics(self):
+        """Test that the cache of completed sessions has its own name in the cache metrics."""
+        assert AuthCompletionNotifier()._completed.name == "auth_completion"
+
+    def test_channel_publish_failure_is_not_raised(self):
+        """Test that a failing channel does not break the local notification."""
+        class _FailingChannel(_RecordingChannel):
+            def publish(self, session_uri):
+                raise ConnectionError("unavailable")
+
+        notifier = AuthCompletionNotifier()
+        notifier.set_channel(_FailingChannel())
+
+        notifier.notify("urn:session")
+
+        assert notifier._completed.get("urn:session") is True
@@ -0,0 +1,68 @@
+"""Tests for the backoff module."""
+from itertools import islice
+from unittest.mock import patch
+
+import pytest
+
+from agent_identity_python_sdk.utils.backoff import BackoffStrategy, ExponentialBackoff, FixedBackoff
+
+
+class TestBackoffStrategy:
+    """Test cases for the BackoffStrategy base class."""
+
+    def test_is_abstract(self):
+        """Test that strategies must implement delays."""
+        with pytest.raises(TypeError):
+            BackoffStrategy()
+
+
+class TestFixedBackoff:
+    """Test cases for the FixedBackoff strategy."""
+
+    def test_constant_delays(self):
+        """Test that every delay equals the interval."""
+        assert list(islice(FixedBackoff(3.0).delays(), 5)) == [3.0] * 5
+
+    def test_negative_interval_rejected(self):
+        """Test that a negative interval is rejected."""
+        with pytest.raises(ValueError):
+            FixedBackoff(-1)
+
+
+class TestExponentialBackoff:
+    """Test cases for the ExponentialBackoff strategy."""
+
+    def test_delays_grow_until_capped(self):
+        """Test that delays grow by the multiplier and stop at the maximum interval."""
+        backoff = ExponentialBackoff(initial_interval=0.5, multiplier=2, max_interval=3, jitter=0)
+        assert list(islice(backoff.delays(), 6)) == [0.5, 1.0, 2.0, 3, 3, 3]
+
+    def test_jitter_shortens_delays(self):
+        """Test that jitter shortens each delay by at most the jitter fraction."""
+        backoff = ExponentialBackoff(initial_interval=1, multiplier=1, max_interval=1, jitter=0.5)
+        with patch('agent_identity_python_sdk.utils.backoff.random.random', side_effect=[0.0, 0.5, 1.0]):
+            assert list(islice(backoff.delays(), 3)) == [1.0, 0.75, 0.5]
+
+    def test_initial_interval_above_cap(self):
+        """Test that the first delay is capped as well."""
+        backoff = ExponentialBackoff(initial_interval=10, max_interval=2, jitter=0)
+        assert next(backoff.delays()) == 2
+
+    def test_iterators_are_independent(self):
+        """Test that each call to delays starts over from the initial interval."""
+        backoff = ExponentialBackoff(initial_interval=1, multiplier=2, max_interval=10, jitter=0)
+        first = backoff.delays()
+        next(first)
+        next(first)
+        assert next(backoff.delays()) == 1
+
+    @pytest.mark.parametrize("kwargs", [
+        {"initial_interval": -1},
+        {"max_interval": -1},
+        {"multiplier": 0.5},
+        {"jitter": 1.5},
+    ])
+    def test_invalid_parameters_rejected(self, kwargs):
+        """Test that invalid parameters are rejected."""
+        with pytest.raises(ValueError):
+            ExponentialBackoff(**kwargs)
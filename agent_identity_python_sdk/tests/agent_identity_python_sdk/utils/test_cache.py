@@ -1,11 +1,25 @@
 """Tests for the cache module."""
 import time
 import threading
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+
 from agent_identity_python_sdk.utils.cache import (
     set_max_cache_size, get_cached_credential, store_credential_in_cache,
-    DEFAULT_MAX_CACHE_SIZE, _sts_credential_cache, _cache_lock
+    get_cached_workload_access_token, store_workload_access_token_in_cache,
+    claim_credential_refresh, release_credential_refresh,
+    set_credential_expiry_skew, set_refresh_ahead_ratio,
+    get_cached_api_key, store_api_key_in_cache, invalidate_cached_api_key, set_api_key_cache_ttl,
+    DEFAULT_API_KEY_TTL, _api_key_cache,
+    get_cached_oauth2_token, store_oauth2_token_in_cache, invalidate_cached_oauth2_token, set_oauth2_token_cache_ttl,
+    DEFAULT_OAUTH2_TOKEN_TTL, _oauth2_token_cache,
+    DEFAULT_MAX_CACHE_SIZE, DEFAULT_CREDENTIAL_EXPIRY_SKEW, DEFAULT_REFRESH_AHEAD_RATIO,
+    TTLCache, ShardedTTLCache, _workload_access_token_cache
 )
-from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.utils import cache as cache_module
+from agent_identity_python_sdk.model.stscredential import STSCredential, parse_expiration
 
 
 class TestCacheModule:
@@ -14,8 +28,7 @@ class TestCacheModule:
     def setup_method(self):
         """Set up test fixtures before each test method."""
         # Clear the cache before each test
-        with _cache_lock:
-            _sts_credential_cache.clear()
+        cache_module._sts_cache.clear()
         # Reset to default size
         set_max_cache_size(DEFAULT_MAX_CACHE_SIZE)
 
@@ -26,7 +39,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store the credential
@@ -36,11 +49,11 @@ class TestCacheModule:
         retrieved = get_cached_credential("test_key")
         
         # Verify the credential was retrieved correctly
-        assert retrieved is not None
+        assert isinstance(retrieved, STSCredential)
         assert retrieved.access_key_id == "test_key_id"
         assert retrieved.access_key_secret == "test_key_secret"
         assert retrieved.security_token == "test_token"
-        assert retrieved.expiration == "2023-12-31T23:59:59Z"
+        assert retrieved.expiration == "2099-12-31T23:59:59Z"
 
     def test_get_nonexistent_credential(self):
         """Test getting a credential that doesn't exist in cache."""
@@ -53,7 +66,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret", 
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store with a very short TTL
@@ -76,19 +89,19 @@ class TestCacheModule:
             access_key_id="key1",
             access_key_secret="secret1",
             security_token="token1", 
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         cred2 = STSCredential(
             access_key_id="key2", 
             access_key_secret="secret2",
             security_token="token2",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         cred3 = STSCredential(
             access_key_id="key3",
             access_key_secret="secret3", 
             security_token="token3",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         store_credential_in_cache("key1", cred1)
@@ -108,19 +121,19 @@ class TestCacheModule:
                 access_key_id=f"key{i}",
                 access_key_secret=f"secret{i}",
                 security_token=f"token{i}",
-                expiration="2023-12-31T23:59:59Z"
+                expiration="2099-12-31T23:59:59Z"
             )
             store_credential_in_cache(f"key{i}", cred)
         
         # Verify cache has default size entries
-        assert len(_sts_credential_cache) == DEFAULT_MAX_CACHE_SIZE
+        assert len(cache_module._sts_cache) == DEFAULT_MAX_CACHE_SIZE
         
         # Reduce cache size to smaller value
         new_size = DEFAULT_MAX_CACHE_SIZE - 3
         set_max_cache_size(new_size)
         
         # Verify cache now has the new size
-        assert len(_sts_credential_cache) == new_size
+        assert len(cache_module._sts_cache) == new_size
 
     def test_recently_used_items_not_evicted(self):
         """Test that recently used items are not evicted in LRU."""
@@ -131,13 +144,13 @@ class TestCacheModule:
             access_key_id="key1",
             access_key_secret="secret1",
             security_token="token1",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         cred2 = STSCredential(
             access_key_id="key2",
             access_key_secret="secret2", 
             security_token="token2",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         store_credential_in_cache("key1", cred1)
@@ -151,7 +164,7 @@ class TestCacheModule:
             access_key_id="key3",
             access_key_secret="secret3",
             security_token="token3", 
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         store_credential_in_cache("key3", cred3)
         
@@ -168,7 +181,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store with a 1 second TTL
@@ -198,7 +211,7 @@ class TestCacheModule:
                         access_key_id=f"key_{thread_id}_{i}",
                         access_key_secret=f"secret_{thread_id}_{i}",
                         security_token=f"token_{thread_id}_{i}",
-                        expiration="2023-12-31T23:59:59Z"
+                        expiration="2099-12-31T23:59:59Z"
                     )
                     cache_key = f"key_{thread_id}_{i}"
                     
@@ -234,7 +247,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store with 0 TTL
@@ -250,7 +263,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store with a large TTL
@@ -266,13 +279,13 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token1",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         cred2 = STSCredential(
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token2",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         store_credential_in_cache("Key", cred1)
@@ -293,7 +306,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Set max cache size to 0
@@ -312,7 +325,7 @@ class TestCacheModule:
             access_key_id="test_key_id",
             access_key_secret="test_key_secret",
             security_token="test_token",
-            expiration="2023-12-31T23:59:59Z"
+            expiration="2099-12-31T23:59:59Z"
         )
         
         # Store a credential
@@ -324,4 +337,406 @@ class TestCacheModule:
         
         # Should no longer be in cache
         result = get_cached_credential("test_key")
-        assert result is None
\ No newline at end of file
+        assert result is None
+
+
+def _iso_in(seconds: float) -> str:
+    """Format a UTC timestamp the given number of seconds from now like STS expirations."""
+    return datetime.fromtimestamp(time.time() + seconds, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class TestCredentialExpiration:
+    """Test cases for deriving the STS credential cache lifetime from its expiration."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        cache_module._sts_cache.clear()
+        set_max_cache_size(DEFAULT_MAX_CACHE_SIZE)
+        set_credential_expiry_skew(DEFAULT_CREDENTIAL_EXPIRY_SKEW)
+        set_refresh_ahead_ratio(DEFAULT_REFRESH_AHEAD_RATIO)
+
+    def teardown_method(self):
+        """Restore defaults after each test method."""
+        set_credential_expiry_skew(DEFAULT_CREDENTIAL_EXPIRY_SKEW)
+        set_refresh_ahead_ratio(DEFAULT_REFRESH_AHEAD_RATIO)
+
+    def _credential(self, expiration: str) -> STSCredential:
+        return STSCredential(
+            access_key_id="test_key_id",
+            access_key_secret="test_key_secret",
+            security_token="test_token",
+            expiration=expiration
+        )
+
+    def _assert_expires_in(self, key: str, seconds: float):
+        now = time.time()
+        with patch("agent_identity_python_sdk.utils.cache.time.time", return_value=now + seconds - 2):
+            assert get_cached_credential(key) is not None
+        with patch("agent_identity_python_sdk.utils.cache.time.time", return_value=now + seconds + 2):
+            assert get_cached_credential(key) is None
+
+    def test_parse_expiration(self):
+        """Test parsing STS expiration timestamps."""
+        assert parse_expiration("2025-12-31T23:59:59Z") == datetime(2025, 12, 31, 23, 59, 59, tzinfo=timezone.utc).timestamp()
+        assert parse_expiration("2025-12-31T23:59:59") == parse_expiration("2025-12-31T23:59:59Z")
+        assert parse_expiration("2026-01-01T07:59:59+08:00") == parse_expiration("2025-12-31T23:59:59Z")
+        assert parse_expiration("not a timestamp") is None
+        assert parse_expiration("") is None
+
+    def test_ttl_derived_from_expiration(self):
+        """Test that the default TTL follows the credential expiration minus the skew."""
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)))
+        self._assert_expires_in("test_key", 3600 - DEFAULT_CREDENTIAL_EXPIRY_SKEW)
+
+    def test_credential_within_skew_not_cached(self):
+        """Test that a credential expiring within the skew is not cached."""
+        set_credential_expiry_skew(120)
+        store_credential_in_cache("test_key", self._credential(_iso_in(60)))
+        assert get_cached_credential("test_key") is None
+
+    def test_expired_credential_not_cached(self):
+        """Test that an already expired credential is not cached."""
+        store_credential_in_cache("test_key", self._credential("2023-12-31T23:59:59Z"))
+        assert get_cached_credential("test_key") is None
+
+    def test_unparsable_expiration_uses_default_ttl(self):
+        """Test the fallback TTL for credentials whose expiration cannot be parsed."""
+        store_credential_in_cache("test_key", self._credential("unknown"))
+        self._assert_expires_in("test_key", 600)
+
+    def test_explicit_ttl_overrides_expiration(self):
+        """Test that an explicit TTL is used as is."""
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)), ttl=10)
+        self._assert_expires_in("test_key", 10)
+
+    def test_refresh_not_due_for_fresh_credential(self):
+        """Test that a fresh credential is not refreshed ahead."""
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)))
+        assert claim_credential_refresh("test_key") is False
+
+    def test_refresh_claimed_once_when_due(self):
+        """Test that only one caller claims the refresh of a credential close to expiry."""
+        set_refresh_ahead_ratio(0.5)
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)), ttl=0.2)
+        time.sleep(0.12)
+
+        assert get_cached_credential("test_key") is not None
+        assert claim_credential_refresh("test_key") is True
+        assert claim_credential_refresh("test_key") is False
+
+        release_credential_refresh("test_key")
+        assert claim_credential_refresh("test_key") is True
+
+        # Replacing the entry drops the claim and restarts its lifetime
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)), ttl=0.2)
+        assert claim_credential_refresh("test_key") is False
+
+    def test_refresh_ahead_disabled(self):
+        """Test that a zero ratio disables refresh-ahead."""
+        set_refresh_ahead_ratio(0)
+        store_credential_in_cache("test_key", self._credential(_iso_in(3600)), ttl=0.05)
+        time.sleep(0.04)
+        assert claim_credential_refresh("test_key") is False
+
+    def test_invalid_refresh_ahead_ratio(self):
+        """Test that refresh-ahead ratios outside [0, 1) are rejected."""
+        with pytest.raises(ValueError):
+            set_refresh_ahead_ratio(1)
+        with pytest.raises(ValueError):
+            set_refresh_ahead_ratio(-0.1)
+
+
+class TestTTLCache:
+    """Test cases for the TTLCache class."""
+
+    def test_set_get_and_delete(self):
+        """Test basic set, get and delete operations."""
+        cache = TTLCache(max_size=2)
+        cache.set("key", "value", ttl=60)
+        assert cache.get("key") == "value"
+        assert len(cache) == 1
+
+        cache.delete("key")
+        assert cache.get("key") is None
+        cache.delete("key")  # Deleting a missing key is a no-op
+
+    def test_clear(self):
+        """Test clearing all entries."""
+        cache = TTLCache()
+        cache.set("key1", "value1", ttl=60)
+        cache.set("key2", "value2", ttl=60)
+        cache.clear()
+        assert len(cache) == 0
+
+
+class TestShardedTTLCache:
+    """Test cases for the ShardedTTLCache class."""
+
+    def test_set_get_and_delete(self):
+        """Test basic set, get and delete operations."""
+        cache = ShardedTTLCache(max_size=10, segments=4)
+        cache.set("key", "value", ttl=60)
+        assert cache.get("key") == "value"
+        assert len(cache) == 1
+
+        cache.delete("key")
+        assert cache.get("key") is None
+        cache.delete("key")  # Deleting a missing key is a no-op
+
+    def test_entry_expires(self):
+        """Test that expired entries are not returned and are removed."""
+        cache = ShardedTTLCache(segments=4)
+        cache.set("key", "value", ttl=0.05)
+        time.sleep(0.1)
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_clear(self):
+        """Test clearing all segments."""
+        cache = ShardedTTLCache(segments=4)
+        for i in range(20):
+            cache.set(f"key{i}", f"value{i}", ttl=60)
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_capacity_is_approximate(self):
+        """Test that each segment is bounded, so the total stays close to the maximum size."""
+        cache = ShardedTTLCache(max_size=16, segments=4)
+        for i in range(200):
+            cache.set(f"key{i}", f"value{i}", ttl=60)
+
+        assert len(cache) <= 16
+        assert cache.get("key199") == "value199"
+
+        cache.set_max_size(4)
+        assert len(cache) <= 4
+
+    def test_recently_read_entries_survive_eviction(self):
+        """Test that an entry read since it was stored gets a second chance before eviction."""
+        cache = ShardedTTLCache(max_size=3, segments=1)
+        cache.set("key1", "value1", ttl=60)
+        cache.set("key2", "value2", ttl=60)
+        cache.set("key3", "value3", ttl=60)
+        cache.get("key1")
+
+        cache.set("key4", "value4", ttl=60)
+
+        assert cache.get("key1") == "value1"
+        assert cache.get("key2") is None
+        assert cache.get("key4") == "value4"
+
+    def test_claim_refresh(self):
+        """Test that a single caller claims the refresh of an entry due for it."""
+        cache = ShardedTTLCache(segments=4)
+        cache.set("due", "value", ttl=60, refresh_after=0)
+        cache.set("fresh", "value", ttl=60, refresh_after=30)
+
+        assert cache.claim_refresh("due") is True
+        assert cache.claim_refresh("due") is False
+        assert cache.claim_refresh("fresh") is False
+        assert cache.claim_refresh("missing") is False
+
+        cache.release_refresh("due")
+        assert cache.claim_refresh("due") is True
+
+    def test_namespace_is_separate_cache(self):
+        """Test that namespaces are separate caches with the same layout."""
+        cache = ShardedTTLCache(max_size=50, segments=8)
+        namespace = cache.namespace("sts")
+        namespace.set("key", "value", ttl=60)
+
+        assert cache.get("key") is None
+        assert namespace._max_size == 50
+        assert len(namespace._segments) == 8
+
+    def test_invalid_segments(self):
+        """Test that at least one segment is required."""
+        with pytest.raises(ValueError):
+            ShardedTTLCache(segments=0)
+
+    def test_concurrent_access(self):
+        """Test that concurrent readers and writers see consistent values."""
+        cache = ShardedTTLCache(max_size=1000, segments=8)
+        errors = []
+
+        def worker():
+            try:
+                for i in range(500):
+                    key = f"key{i % 50}"
+                    cache.set(key, key, ttl=60)
+                    value = cache.get(key)
+                    if value is not None and value != key:
+                        errors.append(value)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(cache) == 50
+
+    def test_get_or_compute_computes_once(self):
+        """Test that concurrent callers missing the same key compute it once."""
+        cache = ShardedTTLCache(segments=4)
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value", 60
+
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("key", compute)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+
+class TestWorkloadAccessTokenCache:
+    """Test cases for the workload access token cache."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _workload_access_token_cache.clear()
+
+    def test_store_and_get_token(self):
+        """Test that a token is served until shortly before it expires."""
+        store_workload_access_token_in_cache("workload:user:user-1", "token", expires_at=time.time() + 3600)
+        assert get_cached_workload_access_token("workload:user:user-1") == "token"
+
+    def test_token_within_margin_not_cached(self):
+        """Test that a token expiring within the safety margin is not cached."""
+        store_workload_access_token_in_cache("key", "token", expires_at=time.time() + 30, margin=60)
+        assert get_cached_workload_access_token("key") is None
+
+    def test_token_expires_at_margin(self):
+        """Test that a cached token stops being served once the margin is reached."""
+        store_workload_access_token_in_cache("key", "token", expires_at=time.time() + 0.06, margin=0.05)
+        assert get_cached_workload_access_token("key") == "token"
+        time.sleep(0.02)
+        assert get_cached_workload_access_token("key") is None
+
+    def test_independent_from_sts_cache(self):
+        """Test that workload access tokens and STS credentials do not share entries."""
+        store_workload_access_token_in_cache("shared", "token", expires_at=time.time() + 3600)
+        assert get_cached_credential("shared") is None
+
+
+class TestApiKeyCache:
+    """Test cases for the API key cache."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _api_key_cache.clear()
+        set_api_key_cache_ttl(DEFAULT_API_KEY_TTL)
+
+    def teardown_method(self):
+        """Restore defaults after each test method."""
+        set_api_key_cache_ttl(DEFAULT_API_KEY_TTL)
+
+    def test_store_get_and_invalidate(self):
+        """Test that an API key is served until it is invalidated."""
+        store_api_key_in_cache("provider:workload", "api-key")
+        assert get_cached_api_key("provider:workload") == "api-key"
+
+        invalidate_cached_api_key("provider:workload")
+        assert get_cached_api_key("provider:workload") is None
+
+    def test_api_key_expires_after_ttl(self):
+        """Test that API keys expire after the configured TTL."""
+        set_api_key_cache_ttl(0.01)
+        store_api_key_in_cache("provider:workload", "api-key")
+        time.sleep(0.02)
+        assert get_cached_api_key("provider:workload") is None
+
+    def test_zero_ttl_disables_cache(self):
+        """Test that a zero TTL disables API key caching and drops cached keys."""
+        store_api_key_in_cache("provider:workload", "api-key")
+        set_api_key_cache_ttl(0)
+        assert get_cached_api_key("provider:workload") is None
+
+        store_api_key_in_cache("provider:workload", "api-key")
+        assert get_cached_api_key("provider:workload") is None
+
+    def test_ttl_change_drops_cached_keys(self):
+        """Test that API keys cached with the previous TTL are not served after it changes."""
+        store_api_key_in_cache("provider:workload", "api-key")
+        set_api_key_cache_ttl(10)
+        assert get_cached_api_key("provider:workload") is None
+
+        store_api_key_in_cache("provider:workload", "api-key")
+        set_api_key_cache_ttl(10)
+        assert get_cached_api_key("provider:workload") == "api-key"
+
+    def test_api_key_cache_is_bounded(self):
+        """Test that the API key cache does not grow without bound."""
+        for i in range(DEFAULT_MAX_CACHE_SIZE + 10):
+            store_api_key_in_cache(f"provider-{i}:workload", f"api-key-{i}")
+        assert len(_api_key_cache) == DEFAULT_MAX_CACHE_SIZE
+
+
+class TestOAuth2TokenCache:
+    """Test cases for the OAuth2 access token cache."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        _oauth2_token_cache.clear()
+        set_oauth2_token_cache_ttl(DEFAULT_OAUTH2_TOKEN_TTL)
+
+    def teardown_method(self):
+        """Restore defaults after each test method."""
+        set_oauth2_token_cache_ttl(DEFAULT_OAUTH2_TOKEN_TTL)
+
+    def test_token_with_expiry_cached_until_margin(self):
+        """Test that a token with a known expiry is cached until shortly before it."""
+        store_oauth2_token_in_cache("key", "token", expires_at=time.time() + 3600)
+        entry = _oauth2_token_cache._entries["key"]
+        assert abs(entry.expire_time - (time.time() + 3600 - 60)) < 2
+        assert get_cached_oauth2_token("key") == "token"
+
+    def test_expiring_token_not_cached(self):
+        """Test that a token expiring within the margin is not cached."""
+        store_oauth2_token_in_cache("key", "token", expires_at=time.time() + 30)
+        assert get_cached_oauth2_token("key") is None
+
+    def test_token_without_expiry_uses_configured_ttl(self):
+        """Test that opaque tokens are cached for the configured TTL."""
+        set_oauth2_token_cache_ttl(120)
+        store_oauth2_token_in_cache("key", "opaque-token")
+        entry = _oauth2_token_cache._entries["key"]
+        assert abs(entry.expire_time - (time.time() + 120)) < 2
+
+    def test_zero_ttl_disables_caching_of_opaque_tokens(self):
+        """Test that a zero TTL disables caching of tokens without a readable expiry and drops cached ones."""
+        store_oauth2_token_in_cache("key", "opaque-token")
+        set_oauth2_token_cache_ttl(0)
+        assert get_cached_oauth2_token("key") is None
+
+        store_oauth2_token_in_cache("key", "opaque-token")
+        assert get_cached_oauth2_token("key") is None
+
+    def test_ttl_change_drops_cached_tokens(self):
+        """Test that tokens cached with the previous TTL are not served after it changes."""
+        store_oauth2_token_in_cache("key", "opaque-token")
+        set_oauth2_token_cache_ttl(10)
+        assert get_cached_oauth2_token("key") is None
+
+        store_oauth2_token_in_cache("key", "opaque-token")
+        set_oauth2_token_cache_ttl(10)
+        assert get_cached_oauth2_token("key") == "opaque-token"
+
+    def test_invalidate(self):
+        """Test removing a cached token."""
+        store_oauth2_token_in_cache("key", "token")
+        invalidate_cached_oauth2_token("key")
+        assert get_cached_oauth2_token("key") is None
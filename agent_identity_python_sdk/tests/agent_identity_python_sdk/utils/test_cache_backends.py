@@ -0,0 +1,396 @@
+"""Tests for the cache_backends module."""
+import asyncio
+import fnmatch
+import threading
+import time
+
+import pytest
+
+from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.utils import cache
+from agent_identity_python_sdk.utils.cache import (
+    TTLCache,
+    call_cache,
+    call_cache_compute,
+    claim_credential_refresh,
+    get_cached_api_key,
+    get_or_compute_api_key,
+    get_cached_credential,
+    set_cache_backend,
+    store_api_key_in_cache,
+    store_credential_in_cache
+)
+from agent_identity_python_sdk.utils.cache_backends import CacheBackend, RedisCacheBackend
+
+
+class _FakeRedis:
+    """In-process stand-in implementing the subset of the redis-py client used by RedisCacheBackend."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            value, expire_time = item
+            if expire_time is not None and time.time() >= expire_time:
+                del self._data[name]
+                return None
+            return value.encode()
+
+    def set(self, name, value, px=None, nx=False):
+        with self._lock:
+            item = self._data.get(name)
+            if nx and item is not None and (item[1] is None or time.time() < item[1]):
+                return None
+            self._data[name] = (value, time.time() + px / 1000 if px else None)
+            return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def scan_iter(self, match="*"):
+        with self._lock:
+            return [name for name in self._data if fnmatch.fnmatch(name, match)]
+
+
+class _BrokenRedis:
+    """Client whose every call fails, like a server that is unreachable."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise ConnectionError("connection refused")
+        return fail
+
+
+def _sts_credential(expiration="2099-12-31T23:59:59Z"):
+    return STSCredential(
+        access_key_id="test-access-key-id",
+        access_key_secret="test-access-key-secret",
+        security_token="test-security-token",
+        expiration=expiration
+    )
+
+
+class TestRedisCacheBackend:
+    """Test cases for the RedisCacheBackend class."""
+
+    def test_set_and_get_string(self):
+        """Test storing and reading a string value."""
+        backend = RedisCacheBackend(_FakeRedis())
+        backend.set("key", "value", 60)
+
+        assert backend.get("key") == "value"
+
+    def test_set_and_get_sts_credential(self):
+        """Test that STS credentials are serialized and restored."""
+        backend = RedisCacheBackend(_FakeRedis())
+        credential = _sts_credential()
+        backend.set("key", credential, 60)
+
+        result = backend.get("key")
+        assert isinstance(result, STSCredential)
+        assert result == credential
+
+    def test_entry_expires(self):
+        """Test that entries expire after their time to live."""
+        backend = RedisCacheBackend(_FakeRedis())
+        backend.set("key", "value", 0.05)
+        time.sleep(0.1)
+
+        assert backend.get("key") is None
+
+    def test_non_positive_ttl_is_not_stored(self):
+        """Test that entries without remaining lifetime are not stored."""
+        backend = RedisCacheBackend(_FakeRedis())
+        backend.set("key", "value", 0)
+
+        assert backend.get("key") is None
+
+    def test_delete(self):
+        """Test removing an entry."""
+        backend = RedisCacheBackend(_FakeRedis())
+        backend.set("key", "value", 60)
+        backend.delete("key")
+
+        assert backend.get("key") is None
+
+    def test_namespaces_are_isolated(self):
+        """Test that namespaces sharing a server do not see or clear each other's entries."""
+        client = _FakeRedis()
+        backend = RedisCacheBackend(client)
+        api_keys = backend.namespace("apikey")
+        tokens = backend.namespace("oauth2")
+        api_keys.set("key", "api-key", 60)
+        tokens.set("key", "token", 60)
+
+        assert api_keys.get("key") == "api-key"
+        assert tokens.get("key") == "token"
+
+        api_keys.clear()
+        assert api_keys.get("key") is None
+        assert tokens.get("key") == "token"
+
+    def test_keys_do_not_reveal_tokens(self):
+        """Test that the key names on the server are digests rather than the tokens in the cache keys."""
+        client = _FakeRedis()
+        backend = RedisCacheBackend(client).namespace("workload")
+        backend.set("workload-name:jwt:secret-user-token", "value", 60)
+
+        assert backend.get("workload-name:jwt:secret-user-token") == "value"
+        names = client.scan_iter()
+        assert len(names) == 1
+        assert names[0].startswith("agentidentity:workload:")
+        assert "secret-user-token" not in names[0]
+
+    def test_shared_between_instances(self):
+        """Test that backends of different workers pointed at one server share entries."""
+        client = _FakeRedis()
+        RedisCacheBackend(client).set("key", "value", 60)
+
+        assert RedisCacheBackend(client).get("key") == "value"
+
+    def test_get_or_compute_computes_once(self):
+        """Test that concurrent callers of different workers missing the same key compute it once."""
+        client = _FakeRedis()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return "value", 60
+
+        def worker():
+            results.append(RedisCacheBackend(client, poll_interval=0.01).get_or_compute("key", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+        assert client.get(RedisCacheBackend(client)._key("key") + ":lock") is None
+
+    def test_get_or_compute_takes_over_abandoned_lock(self):
+        """Test that a lock left behind by a crashed process does not block forever."""
+        client = _FakeRedis()
+        backend = RedisCacheBackend(client, lock_timeout=0.1, poll_interval=0.01)
+        lock_key = backend._key("key") + ":lock"
+        client.set(lock_key, "other-process", px=60000)
+
+        assert backend.get_or_compute("key", lambda: ("value", 60)) == "value"
+        assert client.get(lock_key) == b"other-process"
+
+    def test_get_or_compute_stores_refresh_delay(self):
+        """Test that a computed entry can be due for a refresh ahead of its expiry."""
+        backend = RedisCacheBackend(_FakeRedis())
+
+        assert backend.get_or_compute("key", lambda: ("value", 60, 0)) == "value"
+        assert backend.claim_refresh("key") is True
+
+    def test_claim_refresh(self):
+        """Test that a single caller claims the refresh of an entry due for it."""
+        backend = RedisCacheBackend(_FakeRedis())
+        backend.set("due", "value", 60, refresh_after=0)
+        backend.set("fresh", "value", 60, refresh_after=30)
+
+        assert backend.claim_refresh("due") is True
+        assert backend.claim_refresh("due") is False
+        assert backend.claim_refresh("fresh") is False
+        assert backend.claim_refresh("missing") is False
+
+        backend.release_refresh("due")
+        assert backend.claim_refresh("due") is True
+
+        backend.set("due", "refreshed", 60, refresh_after=0)
+        assert backend.claim_refresh("due") is True
+
+    def test_server_errors_are_cache_misses(self):
+        """Test that an unreachable server does not raise, and values are computed instead."""
+        backend = RedisCacheBackend(_BrokenRedis())
+        backend.set("key", "value", 60)
+        backend.delete("key")
+        backend.clear()
+
+        assert backend.get("key") is None
+        assert backend.claim_refresh("key") is False
+        assert backend.get_or_compute("key", lambda: ("value", 60)) == "value"
+
+
+class TestCacheBackend:
+    """Test cases for the CacheBackend base class."""
+
+    def test_is_abstract(self):
+        """Test that backends must implement the storage methods."""
+        class _Incomplete(CacheBackend):
+            def get(self, key):
+                return None
+
+        with pytest.raises(TypeError):
+            _Incomplete()
+
+
+class TestTTLCacheBackend:
+    """Test cases for TTLCache as a cache backend."""
+
+    def test_namespace_is_separate_cache(self):
+        """Test that namespaces of the in-memory backend are separate caches."""
+        backend = TTLCache(max_size=5)
+        namespace = backend.namespace("sts")
+        namespace.set("key", "value", 60)
+
+        assert backend.get("key") is None
+        assert namespace._max_size == 5
+
+    def test_get_or_compute_computes_once(self):
+        """Test that concurrent callers missing the same key compute it once."""
+        backend = TTLCache()
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value", 60
+
+        threads = [threading.Thread(target=lambda: results.append(backend.get_or_compute("key", compute)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+    def test_get_or_compute_does_not_store_expired_value(self):
+        """Test that a computed value without time to live is returned but not cached."""
+        backend = TTLCache()
+
+        assert backend.get_or_compute("key", lambda: ("value", 0)) == "value"
+        assert backend.get("key") is None
+
+
+class TestSetCacheBackend:
+    """Test cases for routing the SDK credential caches through a backend."""
+
+    @pytest.fixture(autouse=True)
+    def restore_caches(self):
+        """Restore the module caches replaced by the test."""
+        names = ["_sts_cache", "_workload_access_token_cache", "_api_key_cache", "_oauth2_token_cache"]
+        saved = {name: getattr(cache, name) for name in names}
+        yield
+        for name, value in saved.items():
+            setattr(cache, name, value)
+
+    def test_credential_caches_use_backend(self):
+        """Test that credentials stored by one worker are read by another worker sharing the server."""
+        client = _FakeRedis()
+        credential = _sts_credential()
+
+        set_cache_backend(RedisCacheBackend(client))
+        store_credential_in_cache("sts-key", credential)
+        store_api_key_in_cache("apikey-key", "api-key")
+
+        # Simulate another worker process with its own backend instance
+        set_cache_backend(RedisCacheBackend(client))
+        assert get_cached_credential("sts-key") == credential
+        assert get_cached_api_key("apikey-key") == "api-key"
+        assert get_cached_api_key("sts-key") is None
+
+    def test_refresh_ahead_with_backend(self):
+        """Test that refresh-ahead of STS credentials works with a shared backend."""
+        set_cache_backend(RedisCacheBackend(_FakeRedis()))
+        cache._sts_cache.set("sts-key", _sts_credential(), 60, refresh_after=0)
+
+        assert claim_credential_refresh("sts-key") is True
+        assert claim_credential_refresh("sts-key") is False
+
+    def test_blocking_backend_called_off_event_loop(self):
+        """Test that coroutines call a backend doing network I/O on a worker thread."""
+        set_cache_backend(RedisCacheBackend(_FakeRedis()))
+        store_api_key_in_cache("apikey-key", "api-key")
+        threads = []
+
+        def lookup(cache_key):
+            threads.append(threading.get_ident())
+            return get_cached_api_key(cache_key)
+
+        async def main():
+            return await call_cache(lookup, "apikey-key"), threading.get_ident()
+
+        api_key, loop_thread = asyncio.run(main())
+        assert api_key == "api-key"
+        assert threads and threads[0] != loop_thread
+
+    def test_in_memory_backend_called_on_event_loop(self):
+        """Test that the in-memory backend is called directly by coroutines."""
+        set_cache_backend(None)
+        threads = []
+
+        async def main():
+            await call_cache(lambda: threads.append(threading.get_ident()))
+            return threading.get_ident()
+
+        assert threads == [asyncio.run(main())]
+
+    def test_shared_backend_fetches_once_across_workers(self):
+        """Test that event loops of different workers missing the same key fetch it once."""
+        set_cache_backend(RedisCacheBackend(_FakeRedis(), poll_interval=0.01))
+        calls = []
+        results = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return "api-key"
+
+        def worker():
+            results.append(asyncio.run(call_cache_compute(get_or_compute_api_key, "apikey-key", fetch)))
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["api-key"] * 3
+        assert len(calls) == 1
+        assert get_cached_api_key("apikey-key") == "api-key"
+
+    def test_shared_backend_fetch_error_is_raised(self):
+        """Test that an error of the fetch reaches the caller and nothing is cached."""
+        set_cache_backend(RedisCacheBackend(_FakeRedis()))
+
+        async def fetch():
+            raise ValueError("fetch failed")
+
+        with pytest.raises(ValueError, match="fetch failed"):
+            asyncio.run(call_cache_compute(get_or_compute_api_key, "apikey-key", fetch))
+        assert get_cached_api_key("apikey-key") is None
+
+    def test_in_memory_backend_fetches_on_event_loop(self):
+        """Test that the in-memory backend fetches and stores without a worker thread."""
+        set_cache_backend(None)
+
+        async def fetch():
+            return "api-key"
+
+        assert asyncio.run(call_cache_compute(get_or_compute_api_key, "apikey-key", fetch)) == "api-key"
+        assert get_cached_api_key("apikey-key") == "api-key"
+
+    def test_reset_to_in_memory(self):
+        """Test that None restores in-memory caches."""
+        set_cache_backend(RedisCacheBackend(_FakeRedis()))
+        set_cache_backend(None)
+
+        assert isinstance(cache._sts_cache, TTLCache)
+        store_api_key_in_cache("apikey-key", "api-key")
+        assert get_cached_api_key("apikey-key") == "api-key"
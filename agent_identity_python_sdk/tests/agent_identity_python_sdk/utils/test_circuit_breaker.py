@@ -0,0 +1,323 @@
+"""Tests for the circuit_breaker module."""
+import asyncio
+import os
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from agent_identity_python_sdk.core.identity import IdentityClient
+from agent_identity_python_sdk.utils.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    get_circuit_breaker,
+    is_service_failure,
+    set_circuit_breaker
+)
+from agent_identity_python_sdk.utils.metrics import (
+    API_ERRORS,
+    CIRCUIT_BREAKER_OPEN,
+    CIRCUIT_BREAKER_REJECTIONS,
+    CIRCUIT_BREAKER_TRANSITIONS,
+    PrometheusMetricsSink,
+    set_metrics_sink
+)
+from agent_identity_python_sdk.utils.retry import RetryPolicy, get_retry_policy, set_retry_policy
+
+ENDPOINT = "agentidentitydata.cn-beijing.aliyuncs.com"
+
+
+class _ServiceError(Exception):
+    """Error carrying an HTTP status code, like the errors of the Alibaba Cloud SDKs."""
+
+    def __init__(self, status_code, code="ServiceUnavailable"):
+        super().__init__(code)
+        self.status_code = status_code
+        self.code = code
+
+
+def _fail():
+    raise _ServiceError(503)
+
+
+class TestIsServiceFailure:
+    """Test cases for classifying errors as failures of the service."""
+
+    @pytest.mark.parametrize("error, expected", [
+        (_ServiceError(500, "InternalError"), True),
+        (_ServiceError(503), True),
+        (_ServiceError(429, "Throttling.User"), True),
+        (_ServiceError(400, "InvalidParameter"), False),
+        (_ServiceError(404, "EntityNotExist"), False),
+        (ConnectionError("connection refused"), True),
+    ])
+    def test_classification(self, error, expected):
+        """Test that server errors, throttling and errors without a response are failures."""
+        assert is_service_failure(error) is expected
+
+    def test_status_code_in_data(self):
+        """Test that the status code is also read from the error data."""
+        error = Exception("bad request")
+        error.data = {"statusCode": 400}
+        assert is_service_failure(error) is False
+
+
+class TestCircuitBreaker:
+    """Test cases for the CircuitBreaker class."""
+
+    def setup_method(self):
+        self.now = 1000.0
+        self.patcher = patch("agent_identity_python_sdk.utils.circuit_breaker.time.monotonic",
+                             side_effect=lambda: self.now)
+        self.patcher.start()
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def _open(self, breaker, operation="GetResourceAPIKey"):
+        for _ in range(breaker.failure_threshold):
+            with pytest.raises(_ServiceError):
+                breaker.call(ENDPOINT, operation, _fail)
+
+    def test_opens_after_consecutive_failures(self):
+        """Test that the circuit opens at the failure threshold and then fails fast."""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=10)
+        func = Mock(side_effect=_ServiceError(503))
+
+        for _ in range(2):
+            with pytest.raises(_ServiceError):
+                breaker.call(ENDPOINT, "GetResourceAPIKey", func)
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+        with pytest.raises(_ServiceError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", func)
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "open"
+
+        with pytest.raises(CircuitOpenError) as exc_info:
+            breaker.call(ENDPOINT, "GetResourceAPIKey", func)
+        assert func.call_count == 3
+        assert exc_info.value.retry_after == 10
+        assert exc_info.value.operation == "GetResourceAPIKey"
+
+    def test_success_resets_failures(self):
+        """Test that only consecutive failures count."""
+        breaker = CircuitBreaker(failure_threshold=2)
+
+        with pytest.raises(_ServiceError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", _fail)
+        assert breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok") == "ok"
+        with pytest.raises(_ServiceError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", _fail)
+
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+
+    def test_client_errors_do_not_open(self):
+        """Test that errors a healthy service also returns do not count as failures."""
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        with pytest.raises(_ServiceError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", Mock(side_effect=_ServiceError(400, "InvalidParameter")))
+
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+
+    def test_circuits_are_per_endpoint_and_operation(self):
+        """Test that an open circuit does not affect other operations or endpoints."""
+        breaker = CircuitBreaker(failure_threshold=1)
+        self._open(breaker)
+
+        assert breaker.call(ENDPOINT, "GetResourceOAuth2Token", lambda: "ok") == "ok"
+        assert breaker.call("other.endpoint", "GetResourceAPIKey", lambda: "ok") == "ok"
+
+    def test_half_open_success_closes(self):
+        """Test that a successful trial call after the recovery timeout closes the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        self._open(breaker)
+
+        self.now += 10
+        assert breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok") == "ok"
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+
+    def test_half_open_failure_reopens(self):
+        """Test that a failed trial call opens the circuit for another recovery timeout."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        self._open(breaker)
+
+        self.now += 10
+        with pytest.raises(_ServiceError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", _fail)
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "open"
+        self.now += 5
+        with pytest.raises(CircuitOpenError):
+            breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok")
+
+    def test_half_open_limits_trial_calls(self):
+        """Test that concurrent calls beyond the trial calls are rejected while half-open."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+        self._open(breaker)
+        self.now += 10
+
+        def trial():
+            assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "half_open"
+            with pytest.raises(CircuitOpenError):
+                breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok")
+            return "ok"
+
+        assert breaker.call(ENDPOINT, "GetResourceAPIKey", trial) == "ok"
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+
+    def test_call_admitted_while_closed_is_not_a_trial(self):
+        """Test that a slow call admitted before the circuit opened neither frees a trial slot nor closes it."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10, half_open_max_calls=1)
+
+        async def main():
+            finish_slow = asyncio.Event()
+            trial_started = asyncio.Event()
+            finish_trial = asyncio.Event()
+
+            async def slow():
+                await finish_slow.wait()
+                return "ok"
+
+            async def trial():
+                trial_started.set()
+                await finish_trial.wait()
+                return "ok"
+
+            slow_call = asyncio.create_task(breaker.call_async(ENDPOINT, "GetResourceAPIKey", slow))
+            await asyncio.sleep(0)
+            self._open(breaker)
+            self.now += 10
+            trial_call = asyncio.create_task(breaker.call_async(ENDPOINT, "GetResourceAPIKey", trial))
+            await trial_started.wait()
+
+            finish_slow.set()
+            assert await slow_call == "ok"
+            assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "half_open"
+            with pytest.raises(CircuitOpenError):
+                breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok")
+
+            finish_trial.set()
+            assert await trial_call == "ok"
+            assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "closed"
+
+        asyncio.run(main())
+
+    def test_cancelled_trial_frees_slot(self):
+        """Test that a cancelled trial call lets another trial through without closing the circuit."""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+        self._open(breaker)
+        self.now += 10
+
+        async def cancelled():
+            raise asyncio.CancelledError()
+
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(breaker.call_async(ENDPOINT, "GetResourceAPIKey", cancelled))
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "half_open"
+        assert breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok") == "ok"
+
+    def test_call_async(self):
+        """Test that asynchronous calls are counted like synchronous ones."""
+        breaker = CircuitBreaker(failure_threshold=1)
+
+        with pytest.raises(_ServiceError):
+            asyncio.run(breaker.call_async(ENDPOINT, "GetResourceAPIKey", AsyncMock(side_effect=_ServiceError(503))))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(breaker.call_async(ENDPOINT, "GetResourceAPIKey", AsyncMock(return_value="ok")))
+
+    @pytest.mark.parametrize("kwargs", [
+        {"failure_threshold": 0},
+        {"half_open_max_calls": 0},
+        {"recovery_timeout": -1},
+    ])
+    def test_invalid_parameters_rejected(self, kwargs):
+        """Test that invalid parameters are rejected."""
+        with pytest.raises(ValueError):
+            CircuitBreaker(**kwargs)
+
+    def test_metrics(self):
+        """Test that transitions, rejections and open circuits are recorded."""
+        sink = PrometheusMetricsSink()
+        set_metrics_sink(sink)
+        try:
+            breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+            labels = {"endpoint": ENDPOINT, "operation": "GetResourceAPIKey"}
+            self._open(breaker)
+            with pytest.raises(CircuitOpenError):
+                breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok")
+
+            assert sink.get(CIRCUIT_BREAKER_OPEN, labels) == 1
+            assert sink.get(CIRCUIT_BREAKER_REJECTIONS, labels) == 1
+            assert sink.get(CIRCUIT_BREAKER_TRANSITIONS, dict(labels, state="open")) == 1
+
+            self.now += 10
+            breaker.call(ENDPOINT, "GetResourceAPIKey", lambda: "ok")
+
+            assert sink.get(CIRCUIT_BREAKER_OPEN, labels) == 0
+            assert sink.get(CIRCUIT_BREAKER_TRANSITIONS, dict(labels, state="half_open")) == 1
+            assert sink.get(CIRCUIT_BREAKER_TRANSITIONS, dict(labels, state="closed")) == 1
+        finally:
+            set_metrics_sink(None)
+
+
+class TestIdentityClientCircuitBreaker:
+    """Test cases for guarding the data API calls of IdentityClient."""
+
+    def setup_method(self):
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+                patch("agent_identity_python_sdk.core.identity.CredentialClient"), \
+                patch("agent_identity_python_sdk.core.identity.ControlClient"), \
+                patch("agent_identity_python_sdk.core.identity.DataClient"):
+            self.client = IdentityClient("cn-beijing")
+        # Count each call once, retries are covered by the tests of the retry module
+        self.retry_policy = get_retry_policy()
+        set_retry_policy(RetryPolicy(max_attempts=1))
+
+    def teardown_method(self):
+        set_retry_policy(self.retry_policy)
+        set_circuit_breaker(None)
+        set_metrics_sink(None)
+
+    def test_disabled_by_default(self):
+        """Test that no circuit breaker is set by default."""
+        assert get_circuit_breaker() is None
+
+    def test_open_circuit_fails_fast(self):
+        """Test that calls fail fast with CircuitOpenError once the data API keeps failing."""
+        breaker = CircuitBreaker(failure_threshold=2)
+        set_circuit_breaker(breaker)
+        self.client.data_client.get_resource_apikey_async = AsyncMock(side_effect=_ServiceError(503))
+
+        for _ in range(2):
+            with pytest.raises(_ServiceError):
+                asyncio.run(self.client.get_api_key(credential_provider_name="provider", agent_identity_token="token"))
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(self.client.get_api_key(credential_provider_name="provider", agent_identity_token="token"))
+
+        assert self.client.data_client.get_resource_apikey_async.call_count == 2
+        assert breaker.state(ENDPOINT, "GetResourceAPIKey") == "open"
+
+    def test_sync_and_async_variants_share_circuit(self):
+        """Test that the synchronous and asynchronous variants of an operation share its circuit."""
+        breaker = CircuitBreaker(failure_threshold=1)
+        set_circuit_breaker(breaker)
+        self.client.data_client.get_workload_access_token = Mock(side_effect=_ServiceError(503))
+        self.client.data_client.get_workload_access_token_async = AsyncMock()
+
+        with pytest.raises(_ServiceError):
+            self.client.get_workload_access_token("workload")
+        with pytest.raises(CircuitOpenError):
+            asyncio.run(self.client.get_workload_access_token_async("workload"))
+
+        self.client.data_client.get_workload_access_token_async.assert_not_called()
+
+    def test_rejection_reported_as_api_error(self):
+        """Test that fast failures are labelled with their own error code in the API metrics."""
+        sink = PrometheusMetricsSink()
+        set_metrics_sink(sink)
+        set_circuit_breaker(CircuitBreaker(failure_threshold=1))
+        self.client.data_client.complete_resource_token_auth = Mock(side_effect=_ServiceError(503))
+
+        for _ in range(2):
+            with pytest.raises(Exception):
+                self.client.confirm_user_auth("session-uri", user_id="user")
+
+        assert sink.get(API_ERRORS, {"operation": "confirm_user_auth", "code": "CircuitOpen"}) == 1
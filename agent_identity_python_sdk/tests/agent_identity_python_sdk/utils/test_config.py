@@ -3,8 +3,12 @@ import json
 import os
 import tempfile
 from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
 from agent_identity_python_sdk.utils.config import (
-    write_local_config, read_local_config, local_config_file
+    write_local_config, read_local_config, local_config_file, get_local_config_store
 )
 
 
@@ -214,4 +218,100 @@ class TestConfigModule:
         # Should be able to write to this file
         write_local_config("whitespace_key", "whitespace_value", empty_content_file)
         result = read_local_config("whitespace_key", empty_content_file)
-        assert result == "whitespace_value"
\ No newline at end of file
+        assert result == "whitespace_value"
+
+
+class TestLocalConfigStore:
+    """Test cases for the in-memory local config store."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.test_dir, "store_config.json")
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        for name in os.listdir(self.test_dir):
+            os.unlink(os.path.join(self.test_dir, name))
+        os.rmdir(self.test_dir)
+
+    def test_store_is_shared_per_absolute_path(self):
+        """Test that relative and absolute paths of the same file share a store."""
+        original_cwd = os.getcwd()
+        os.chdir(self.test_dir)
+        try:
+            assert get_local_config_store("store_config.json") is get_local_config_store(self.file_path)
+        finally:
+            os.chdir(original_cwd)
+
+    def test_read_does_not_reparse_unchanged_file(self):
+        """Test that repeated reads are served from memory while the file is unchanged."""
+        write_local_config("key", "value", self.file_path)
+
+        with patch('agent_identity_python_sdk.utils.config.open') as mock_open:
+            for _ in range(10):
+                assert read_local_config("key", self.file_path) == "value"
+            mock_open.assert_not_called()
+
+    def test_unchanged_value_is_not_written(self):
+        """Test that writing the value a key already has leaves the file untouched."""
+        write_local_config("key", "value", self.file_path)
+        stat_before = os.stat(self.file_path)
+
+        with patch('agent_identity_python_sdk.utils.config.tempfile.mkstemp') as mock_mkstemp:
+            write_local_config("key", "value", self.file_path)
+            mock_mkstemp.assert_not_called()
+
+        stat_after = os.stat(self.file_path)
+        assert (stat_after.st_mtime_ns, stat_after.st_ino) == (stat_before.st_mtime_ns, stat_before.st_ino)
+
+    def test_external_change_is_picked_up(self):
+        """Test that a file rewritten by another process is read again."""
+        write_local_config("key", "value", self.file_path)
+        assert read_local_config("key", self.file_path) == "value"
+
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump({"key": "external-value", "other": "other-value"}, f)
+
+        assert read_local_config("key", self.file_path) == "external-value"
+        assert read_local_config("other", self.file_path) == "other-value"
+
+    def test_write_keeps_external_changes(self):
+        """Test that a write merges into the latest content of the file."""
+        write_local_config("key1", "value1", self.file_path)
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump({"key1": "value1", "key2": "value2"}, f)
+
+        write_local_config("key3", "value3", self.file_path)
+
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == {"key1": "value1", "key2": "value2", "key3": "value3"}
+
+    def test_deleted_file_is_reset(self):
+        """Test that values are no longer returned once the file is deleted."""
+        write_local_config("key", "value", self.file_path)
+        os.unlink(self.file_path)
+
+        assert read_local_config("key", self.file_path) is None
+
+    def test_write_is_atomic(self):
+        """Test that the file is replaced by a complete temporary file and no temporary file is left."""
+        write_local_config("key", "value", self.file_path)
+
+        with patch('agent_identity_python_sdk.utils.config.os.replace', side_effect=OSError("disk full")):
+            with pytest.raises(OSError):
+                write_local_config("key", "new-value", self.file_path)
+
+        assert os.listdir(self.test_dir) == ["store_config.json"]
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            assert json.load(f) == {"key": "value"}
+        assert read_local_config("key", self.file_path) == "value"
+
+    def test_write_keeps_file_permissions(self):
+        """Test that replacing the file keeps its permissions."""
+        Path(self.file_path).touch()
+        os.chmod(self.file_path, 0o640)
+
+        write_local_config("key", "value", self.file_path)
+
+        assert os.stat(self.file_path).st_mode & 0o777 == 0o640
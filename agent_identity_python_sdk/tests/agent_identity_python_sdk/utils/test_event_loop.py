@@ -0,0 +1,155 @@
+"""Tests for the event_loop module."""
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from agent_identity_python_sdk.utils import event_loop
+from agent_identity_python_sdk.utils.event_loop import run_sync, set_sync_timeout, shutdown, submit
+
+_test_var = contextvars.ContextVar("test_var", default=None)
+
+
+class TestRunSync:
+    """Test cases for running coroutines on the background event loop."""
+
+    def teardown_method(self):
+        """Restore the default timeout after each test method."""
+        set_sync_timeout(None)
+
+    def test_returns_result(self):
+        """Test that the result of the coroutine is returned."""
+        async def compute():
+            return 42
+
+        assert run_sync(compute()) == 42
+
+    def test_propagates_exception(self):
+        """Test that an exception raised by the coroutine is raised to the caller."""
+        async def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError, match="boom"):
+            run_sync(fail())
+
+    def test_reuses_loop_thread(self):
+        """Test that consecutive calls run on the same long-lived loop and thread."""
+        async def current():
+            return asyncio.get_running_loop(), threading.current_thread()
+
+        first_loop, first_thread = run_sync(current())
+        second_loop, second_thread = run_sync(current())
+
+        assert first_loop is second_loop
+        assert first_thread is second_thread
+        assert first_thread is not threading.current_thread()
+
+    def test_propagates_context(self):
+        """Test that the coroutine sees the caller's context variables."""
+        async def read():
+            return _test_var.get()
+
+        token = _test_var.set("caller-value")
+        try:
+            assert run_sync(read()) == "caller-value"
+        finally:
+            _test_var.reset(token)
+
+    def test_context_is_isolated_between_threads(self):
+        """Test that callers on different threads each see their own context."""
+        results = {}
+
+        async def read():
+            await asyncio.sleep(0.01)
+            return _test_var.get()
+
+        def worker(value):
+            _test_var.set(value)
+            results[value] = run_sync(read())
+
+        threads = [threading.Thread(target=worker, args=(f"value-{i}",)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == {f"value-{i}": f"value-{i}" for i in range(8)}
+
+    def test_timeout_cancels_coroutine(self):
+        """Test that a coroutine exceeding the timeout is cancelled and TimeoutError is raised."""
+        cancelled = threading.Event()
+
+        async def slow():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        with pytest.raises(TimeoutError):
+            run_sync(slow(), timeout=0.05)
+
+        assert cancelled.wait(timeout=2)
+
+    def test_default_timeout(self):
+        """Test that the timeout set with set_sync_timeout applies when none is given."""
+        set_sync_timeout(0.05)
+
+        with pytest.raises(TimeoutError):
+            run_sync(asyncio.sleep(10))
+
+    @pytest.mark.asyncio
+    async def test_call_with_running_loop(self):
+        """Test that synchronous callers work while an event loop is running in their thread."""
+        async def compute():
+            return "value"
+
+        assert run_sync(compute()) == "value"
+
+    def test_call_from_loop_thread_does_not_deadlock(self):
+        """Test that run_sync called from a coroutine on the background loop does not block it."""
+        async def inner():
+            return "inner"
+
+        async def outer():
+            return run_sync(inner())
+
+        assert run_sync(outer(), timeout=5) == "inner"
+
+
+class TestSubmitAndShutdown:
+    """Test cases for scheduling coroutines and stopping the background event loop."""
+
+    def test_submit_returns_future(self):
+        """Test that submit schedules the coroutine without waiting for it."""
+        release = threading.Event()
+
+        async def wait_for_release():
+            await asyncio.get_running_loop().run_in_executor(None, release.wait)
+            return "done"
+
+        future = submit(wait_for_release())
+        assert not future.done()
+        release.set()
+        assert future.result(timeout=2) == "done"
+
+    def test_shutdown_cancels_pending_and_restarts(self):
+        """Test that shutdown cancels pending coroutines and the loop starts again on next use."""
+        async def current_thread():
+            return threading.current_thread()
+
+        first_thread = run_sync(current_thread())
+        pending = submit(asyncio.sleep(10))
+
+        shutdown(timeout=2)
+
+        assert pending.cancelled()
+        assert not first_thread.is_alive()
+        assert event_loop._loop is None
+        assert run_sync(current_thread()) is not first_thread
+
+    def test_shutdown_without_loop(self):
+        """Test that shutdown is a no-op when the loop was never started."""
+        shutdown()
+        shutdown()
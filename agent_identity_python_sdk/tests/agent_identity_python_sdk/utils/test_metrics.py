@@ -0,0 +1,268 @@
+"""Tests for the metrics module."""
+import asyncio
+import os
+import tempfile
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from agent_identity_python_sdk.core.identity import IdentityClient
+from agent_identity_python_sdk.utils.cache import ShardedTTLCache, TTLCache
+from agent_identity_python_sdk.utils.shared_memory_cache import SharedMemoryCacheBackend
+from agent_identity_python_sdk.utils.metrics import (
+    API_CALLS,
+    API_CANCELLATIONS,
+    API_ERRORS,
+    API_LATENCY,
+    CACHE_EVICTIONS,
+    CACHE_EXPIRATIONS,
+    CACHE_HITS,
+    CACHE_MISSES,
+    OAUTH2_POLLS_IN_FLIGHT,
+    MetricsSink,
+    PrometheusMetricsSink,
+    get_metrics_sink,
+    instrumented,
+    set_metrics_sink
+)
+
+
+class _ServiceError(Exception):
+    """Error carrying a service error code, like the errors of the Alibaba Cloud SDKs."""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class TestMetricsSink:
+    """Test cases for the MetricsSink base class."""
+
+    def test_is_abstract(self):
+        """Test that sinks must implement every kind of metric."""
+        class _CounterOnly(MetricsSink):
+            def increment(self, name, labels, value=1):
+                pass
+
+        with pytest.raises(TypeError):
+            _CounterOnly()
+
+
+class TestPrometheusMetricsSink:
+    """Test cases for the PrometheusMetricsSink class."""
+
+    def test_counters_and_gauges(self):
+        """Test that counters and gauges accumulate per label set."""
+        sink = PrometheusMetricsSink()
+        sink.increment(CACHE_HITS, {"cache": "sts"})
+        sink.increment(CACHE_HITS, {"cache": "sts"}, 2)
+        sink.increment(CACHE_HITS, {"cache": "apikey"})
+        sink.add(OAUTH2_POLLS_IN_FLIGHT, {}, 1)
+        sink.add(OAUTH2_POLLS_IN_FLIGHT, {}, 1)
+        sink.add(OAUTH2_POLLS_IN_FLIGHT, {}, -1)
+
+        assert sink.get(CACHE_HITS, {"cache": "sts"}) == 3
+        assert sink.get(CACHE_HITS, {"cache": "apikey"}) == 1
+        assert sink.get(CACHE_HITS, {"cache": "oauth2"}) == 0
+        assert sink.get(OAUTH2_POLLS_IN_FLIGHT) == 1
+
+    def test_expose(self):
+        """Test the Prometheus text exposition format."""
+        sink = PrometheusMetricsSink(buckets=(0.1, 1.0))
+        sink.increment(API_CALLS, {"operation": "get_token"})
+        sink.add(OAUTH2_POLLS_IN_FLIGHT, {}, 2)
+        sink.observe(API_LATENCY, {"operation": "get_token"}, 0.05)
+        sink.observe(API_LATENCY, {"operation": "get_token"}, 0.5)
+        sink.observe(API_LATENCY, {"operation": "get_token"}, 5)
+
+        lines = sink.expose().splitlines()
+
+        assert "# TYPE agentidentity_api_calls_total counter" in lines
+        assert 'agentidentity_api_calls_total{operation="get_token"} 1' in lines
+        assert "# TYPE agentidentity_oauth2_polls_in_flight gauge" in lines
+        assert "agentidentity_oauth2_polls_in_flight 2" in lines
+        assert "# TYPE agentidentity_api_latency_seconds histogram" in lines
+        assert 'agentidentity_api_latency_seconds_bucket{operation="get_token",le="0.1"} 1' in lines
+        assert 'agentidentity_api_latency_seconds_bucket{operation="get_token",le="1"} 2' in lines
+        assert 'agentidentity_api_latency_seconds_bucket{operation="get_token",le="+Inf"} 3' in lines
+        assert 'agentidentity_api_latency_seconds_sum{operation="get_token"} 5.55' in lines
+        assert 'agentidentity_api_latency_seconds_count{operation="get_token"} 3' in lines
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes, backslashes and newlines in label values are escaped."""
+        sink = PrometheusMetricsSink()
+        sink.increment(API_ERRORS, {"operation": "get_token", "code": 'a"b\\c\nd'})
+
+        assert 'code="a\\"b\\\\c\\nd"' in sink.expose()
+
+    def test_empty(self):
+        """Test that nothing is exposed before metrics are recorded."""
+        assert PrometheusMetricsSink().expose() == ""
+
+
+class TestInstrumentation:
+    """Test cases for the metrics recorded by the SDK."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.sink = PrometheusMetricsSink()
+        set_metrics_sink(self.sink)
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        set_metrics_sink(None)
+
+    def test_set_metrics_sink(self):
+        """Test that the sink can be set and disabled."""
+        assert get_metrics_sink() is self.sink
+        set_metrics_sink(None)
+        assert get_metrics_sink() is None
+
+    def test_disabled_metrics_call_through(self):
+        """Test that instrumented functions work without a sink."""
+        set_metrics_sink(None)
+
+        @instrumented("operation")
+        def operation():
+            return "result"
+
+        assert operation() == "result"
+
+    def test_sync_calls_and_errors(self):
+        """Test counting calls and errors by error code of a synchronous function."""
+        @instrumented("operation")
+        def operation(fail):
+            if fail:
+                raise _ServiceError("Throttling")
+            return "result"
+
+        assert operation(False) == "result"
+        with pytest.raises(_ServiceError):
+            operation(True)
+
+        assert self.sink.get(API_CALLS, {"operation": "operation"}) == 2
+        assert self.sink.get(API_ERRORS, {"operation": "operation", "code": "Throttling"}) == 1
+        assert self.sink.get(API_LATENCY, {"operation": "operation"}) == 2
+
+    @pytest.mark.asyncio
+    async def test_async_calls_and_errors(self):
+        """Test counting calls and errors of a coroutine function, by exception type without an error code."""
+        @instrumented("operation")
+        async def operation(fail):
+            await asyncio.sleep(0)
+            if fail:
+                raise ValueError("invalid")
+            return "result"
+
+        assert await operation(False) == "result"
+        with pytest.raises(ValueError):
+            await operation(True)
+
+        assert self.sink.get(API_CALLS, {"operation": "operation"}) == 2
+        assert self.sink.get(API_ERRORS, {"operation": "operation", "code": "ValueError"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_cancellations_are_not_errors(self):
+        """Test that a call cancelled by its caller is counted as a cancellation rather than an error."""
+        @instrumented("operation")
+        async def operation():
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(operation())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        labels = {"operation": "operation"}
+        assert self.sink.get(API_CALLS, labels) == 1
+        assert self.sink.get(API_CANCELLATIONS, labels) == 1
+        assert self.sink.get(API_ERRORS, {"operation": "operation", "code": "CancelledError"}) == 0
+        assert self.sink.get(API_LATENCY, labels) == 0
+
+    def test_ttl_cache_events(self):
+        """Test that the in-memory cache records hits, misses, evictions and expirations."""
+        cache = TTLCache(max_size=1, name="test")
+        cache.get("key")
+        cache.set("key", "value", 60)
+        cache.get("key")
+        cache.set("other", "value", 60)
+        cache.set("expired", "value", -1)
+        cache.get("expired")
+
+        labels = {"cache": "test"}
+        assert self.sink.get(CACHE_HITS, labels) == 1
+        assert self.sink.get(CACHE_MISSES, labels) == 2
+        assert self.sink.get(CACHE_EVICTIONS, labels) == 2
+        assert self.sink.get(CACHE_EXPIRATIONS, labels) == 1
+
+    def test_sharded_cache_events(self):
+        """Test that the sharded cache records hits, misses and evictions under its namespace name."""
+        cache = ShardedTTLCache(max_size=1, segments=1).namespace("sts")
+        cache.get("key")
+        cache.set("key", "value", 60)
+        cache.get("key")
+        cache.set("other", "value", 60)
+        cache.set("third", "value", 60)
+
+        labels = {"cache": "sts"}
+        assert self.sink.get(CACHE_HITS, labels) == 1
+        assert self.sink.get(CACHE_MISSES, labels) == 1
+        assert self.sink.get(CACHE_EVICTIONS, labels) == 2
+
+    def test_shared_memory_cache_expirations(self):
+        """Test that the shared memory cache reports an expired entry once when a lookup clears it."""
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SharedMemoryCacheBackend(f"{directory}/cache", slot_count=16).namespace("sts")
+            try:
+                backend.set("key", "value", 0.01)
+                time.sleep(0.02)
+                assert backend.get("key") is None
+                assert backend.get("key") is None
+            finally:
+                backend._region.close()
+
+        labels = {"cache": "sts"}
+        assert self.sink.get(CACHE_EXPIRATIONS, labels) == 1
+        assert self.sink.get(CACHE_MISSES, labels) == 2
+
+    @pytest.mark.asyncio
+    async def test_identity_client_methods(self):
+        """Test that IdentityClient API methods record calls and errors."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+                patch("agent_identity_python_sdk.core.identity.CredentialClient"), \
+                patch("agent_identity_python_sdk.core.identity.ControlClient"), \
+                patch("agent_identity_python_sdk.core.identity.DataClient"):
+            client = IdentityClient("cn-beijing")
+        client.data_client.get_workload_access_token_async = AsyncMock(
+            return_value=Mock(body=Mock(workload_access_token="token")))
+        client.data_client.get_resource_apikey_async = AsyncMock(side_effect=_ServiceError("Forbidden"))
+
+        assert await client.get_workload_access_token_async("workload") == "token"
+        with pytest.raises(_ServiceError):
+            await client.get_api_key(credential_provider_name="provider", agent_identity_token="token")
+
+        assert self.sink.get(API_CALLS, {"operation": "get_workload_access_token"}) == 1
+        assert self.sink.get(API_CALLS, {"operation": "get_api_key"}) == 1
+        assert self.sink.get(API_ERRORS, {"operation": "get_api_key", "code": "Forbidden"}) == 1
+
+    @pytest.mark.asyncio
+    async def test_oauth2_polls_in_flight(self):
+        """Test that the gauge of polls in flight rises while polling and falls afterwards."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+                patch("agent_identity_python_sdk.core.identity.CredentialClient"), \
+                patch("agent_identity_python_sdk.core.identity.ControlClient"), \
+                patch("agent_identity_python_sdk.core.identity.DataClient"):
+            client = IdentityClient("cn-beijing")
+        in_flight = []
+
+        async def get_token(request):
+            in_flight.append(self.sink.get(OAUTH2_POLLS_IN_FLIGHT))
+            return Mock(body=Mock(access_token="token" if len(in_flight) > 1 else None))
+
+        client.data_client.get_resource_oauth2_token_async = get_token
+
+        assert await client.poll_for_oauth2_token(Mock(session_uri=None), delay_sec=0.01) == "token"
+        assert in_flight == [1, 1]
+        assert self.sink.get(OAUTH2_POLLS_IN_FLIGHT) == 0
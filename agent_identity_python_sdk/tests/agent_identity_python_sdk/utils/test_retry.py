@@ -0,0 +1,268 @@
+"""Tests for the retry module."""
+import asyncio
+import os
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from agent_identity_python_sdk.core.identity import IdentityClient
+from agent_identity_python_sdk.utils.backoff import FixedBackoff
+from agent_identity_python_sdk.utils.circuit_breaker import CircuitOpenError
+from agent_identity_python_sdk.utils.metrics import (
+    API_RETRIES,
+    RETRY_BUDGET_EXHAUSTED,
+    PrometheusMetricsSink,
+    set_metrics_sink
+)
+from agent_identity_python_sdk.utils.retry import RetryBudget, RetryPolicy, get_retry_policy, set_retry_policy
+
+
+class _ServiceError(Exception):
+    """Error carrying an error code and HTTP status code, like the errors of the Alibaba Cloud SDKs."""
+
+    def __init__(self, code, status_code, retry_after=None):
+        super().__init__(code)
+        self.code = code
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class UnretryableException(Exception):
+    """Stand-in for the error the Alibaba Cloud SDKs raise when no response was received."""
+
+
+def _policy(**kwargs):
+    kwargs.setdefault("backoff", FixedBackoff(0))
+    return RetryPolicy(**kwargs)
+
+
+class TestRetryBudget:
+    """Test cases for the RetryBudget class."""
+
+    def setup_method(self):
+        self.now = 1000.0
+        self.patcher = patch("agent_identity_python_sdk.utils.retry.time.monotonic", side_effect=lambda: self.now)
+        self.patcher.start()
+
+    def teardown_method(self):
+        self.patcher.stop()
+
+    def test_starts_full_and_caps_burst(self):
+        """Test that the saved up retries are spent and then exhausted."""
+        budget = RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=2)
+
+        assert budget.try_spend()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+    def test_calls_earn_retries(self):
+        """Test that retries are capped to the ratio of the calls."""
+        budget = RetryBudget(ratio=0.25, min_retries_per_second=0, max_tokens=1)
+        assert budget.try_spend()
+
+        for _ in range(4):
+            assert not budget.try_spend()
+            budget.record_call()
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+    def test_retries_accrue_over_time(self):
+        """Test that retries accrue at the minimum rate without calls."""
+        budget = RetryBudget(ratio=0, min_retries_per_second=2, max_tokens=1)
+        assert budget.try_spend()
+        assert not budget.try_spend()
+
+        self.now += 0.5
+        assert budget.try_spend()
+
+    @pytest.mark.parametrize("kwargs", [
+        {"ratio": 1.5},
+        {"min_retries_per_second": -1},
+        {"max_tokens": -1},
+    ])
+    def test_invalid_parameters_rejected(self, kwargs):
+        """Test that invalid parameters are rejected."""
+        with pytest.raises(ValueError):
+            RetryBudget(**kwargs)
+
+
+class TestRetryPolicy:
+    """Test cases for the RetryPolicy class."""
+
+    @pytest.mark.parametrize("error, expected", [
+        (_ServiceError("Throttling.User", 429), True),
+        (_ServiceError("ServiceUnavailable", 503), True),
+        (_ServiceError("UnknownError", 502), True),
+        (_ServiceError("InvalidParameter", 400), False),
+        (_ServiceError("Forbidden.AccessDenied", 403), False),
+        (ConnectionError("connection reset"), True),
+        (TimeoutError(), True),
+        (UnretryableException("read timeout"), True),
+        (CircuitOpenError("endpoint", "GetResourceAPIKey", 10), False),
+        (ValueError("bad value"), False),
+    ])
+    def test_is_retryable(self, error, expected):
+        """Test the classification of errors with the default codes."""
+        assert RetryPolicy().is_retryable(error) is expected
+
+    def test_custom_codes(self):
+        """Test that the retryable codes can be declared."""
+        policy = RetryPolicy(retryable_codes={"Custom.Busy"}, retryable_status_codes=(), retry_network_errors=False)
+
+        assert policy.is_retryable(_ServiceError("Custom.Busy", 400))
+        assert not policy.is_retryable(_ServiceError("ServiceUnavailable", 503))
+        assert not policy.is_retryable(ConnectionError())
+
+    def test_retries_until_success(self):
+        """Test that retryable errors are retried."""
+        func = Mock(side_effect=[_ServiceError("ServiceUnavailable", 503), "ok"])
+
+        assert _policy().call("GetWorkloadAccessToken", func) == "ok"
+        assert func.call_count == 2
+
+    def test_gives_up_after_max_attempts(self):
+        """Test that the error of the last attempt is raised."""
+        func = Mock(side_effect=_ServiceError("ServiceUnavailable", 503))
+
+        with pytest.raises(_ServiceError):
+            _policy(max_attempts=3).call("GetWorkloadAccessToken", func)
+        assert func.call_count == 3
+
+    def test_non_retryable_error_raised_immediately(self):
+        """Test that errors that are not retryable are not retried."""
+        func = Mock(side_effect=_ServiceError("InvalidParameter", 400))
+
+        with pytest.raises(_ServiceError):
+            _policy().call("GetWorkloadAccessToken", func)
+        assert func.call_count == 1
+
+    def test_backoff_between_attempts(self):
+        """Test that the backoff delays are waited between attempts."""
+        func = Mock(side_effect=[_ServiceError("ServiceUnavailable", 503)] * 2 + ["ok"])
+
+        with patch("agent_identity_python_sdk.utils.retry.time.sleep") as mock_sleep:
+            _policy(backoff=FixedBackoff(0.25)).call("GetWorkloadAccessToken", func)
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.25, 0.25]
+
+    def test_throttling_delay(self):
+        """Test that throttling errors are retried no sooner than the service asks for."""
+        func = Mock(side_effect=[_ServiceError("Throttling.User", 429, retry_after=1500), "ok"])
+
+        with patch("agent_identity_python_sdk.utils.retry.time.sleep") as mock_sleep:
+            _policy().call("GetWorkloadAccessToken", func)
+        mock_sleep.assert_called_once_with(1.5)
+
+    def test_throttling_delay_above_max_delay_not_retried(self):
+        """Test that errors asking to wait longer than the maximum delay are raised."""
+        func = Mock(side_effect=_ServiceError("Throttling.User", 429, retry_after=60000))
+
+        with pytest.raises(_ServiceError):
+            _policy(max_delay=5).call("GetWorkloadAccessToken", func)
+        assert func.call_count == 1
+
+    def test_budget_caps_retries(self):
+        """Test that no retry is made once the budget is exhausted."""
+        policy = _policy(budget=RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1))
+        func = Mock(side_effect=_ServiceError("ServiceUnavailable", 503))
+
+        with pytest.raises(_ServiceError):
+            policy.call("GetWorkloadAccessToken", func)
+        with pytest.raises(_ServiceError):
+            policy.call("GetWorkloadAccessToken", func)
+        assert func.call_count == 3
+
+    def test_call_async(self):
+        """Test that asynchronous calls are retried."""
+        func = AsyncMock(side_effect=[ConnectionError("connection reset"), "ok"])
+
+        assert asyncio.run(_policy().call_async("GetResourceAPIKey", func)) == "ok"
+        assert func.call_count == 2
+
+    def test_metrics(self):
+        """Test that retries and exhausted budgets are recorded."""
+        sink = PrometheusMetricsSink()
+        set_metrics_sink(sink)
+        try:
+            policy = _policy(max_attempts=3, budget=RetryBudget(ratio=0, min_retries_per_second=0, max_tokens=1))
+            with pytest.raises(_ServiceError):
+                policy.call("GetResourceAPIKey", Mock(side_effect=_ServiceError("ServiceUnavailable", 503)))
+
+            assert sink.get(API_RETRIES, {"operation": "GetResourceAPIKey"}) == 1
+            assert sink.get(RETRY_BUDGET_EXHAUSTED, {"operation": "GetResourceAPIKey"}) == 1
+        finally:
+            set_metrics_sink(None)
+
+    @pytest.mark.parametrize("kwargs", [
+        {"max_attempts": 0},
+        {"max_delay": -1},
+    ])
+    def test_invalid_parameters_rejected(self, kwargs):
+        """Test that invalid parameters are rejected."""
+        with pytest.raises(ValueError):
+            RetryPolicy(**kwargs)
+
+
+class TestIdentityClientRetries:
+    """Test cases for retrying the data API calls of IdentityClient."""
+
+    def setup_method(self):
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+                patch("agent_identity_python_sdk.core.identity.CredentialClient"), \
+                patch("agent_identity_python_sdk.core.identity.ControlClient"), \
+                patch("agent_identity_python_sdk.core.identity.DataClient"):
+            self.client = IdentityClient("cn-beijing")
+        self.retry_policy = get_retry_policy()
+        set_retry_policy(_policy())
+
+    def teardown_method(self):
+        set_retry_policy(self.retry_policy)
+
+    def _response(self, **body):
+        response = Mock()
+        response.body = Mock(**body)
+        return response
+
+    def test_get_workload_access_token(self):
+        """Test that fetching a workload access token is retried."""
+        self.client.data_client.get_workload_access_token = Mock(side_effect=[
+            _ServiceError("ServiceUnavailable", 503), self._response(workload_access_token="token")])
+
+        assert self.client.get_workload_access_token("workload") == "token"
+
+    def test_get_api_key(self):
+        """Test that fetching an API key is retried."""
+        self.client.data_client.get_resource_apikey_async = AsyncMock(side_effect=[
+            _ServiceError("Throttling.User", 429), self._response(apikey="api-key")])
+
+        assert asyncio.run(self.client.get_api_key(credential_provider_name="provider",
+                                                   agent_identity_token="token")) == "api-key"
+
+    def test_assume_role_for_workload_identity(self):
+        """Test that assuming a role is retried."""
+        credentials = Mock(access_key_id="id", access_key_secret="secret", security_token="token",
+                           expiration="2099-12-31T23:59:59Z")
+        self.client.data_client.assume_role_for_workload_identity_async = AsyncMock(side_effect=[
+            ConnectionError("connection reset"), self._response(credentials=credentials)])
+
+        credential = asyncio.run(self.client.assume_role_for_workload_identity(workload_token="token",
+                                                                               role_session_name="session"))
+        assert credential.access_key_id == "id"
+
+    def test_confirm_user_auth_not_retried_on_client_error(self):
+        """Test that client errors are raised without retrying."""
+        self.client.data_client.complete_resource_token_auth = Mock(
+            side_effect=_ServiceError("InvalidParameter.SessionURI", 400))
+
+        with pytest.raises(_ServiceError):
+            self.client.confirm_user_auth("session-uri", user_id="user")
+        assert self.client.data_client.complete_resource_token_auth.call_count == 1
+
+    def test_retries_disabled(self):
+        """Test that a single attempt is made with one maximum attempt."""
+        set_retry_policy(RetryPolicy(max_attempts=1))
+        self.client.data_client.complete_resource_token_auth_async = AsyncMock(
+            side_effect=_ServiceError("ServiceUnavailable", 503))
+
+        with pytest.raises(_ServiceError):
+            asyncio.run(self.client.confirm_user_auth_async("session-uri", user_id="user"))
+        assert self.client.data_client.complete_resource_token_auth_async.call_count == 1
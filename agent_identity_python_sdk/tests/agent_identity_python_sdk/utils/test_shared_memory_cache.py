@@ -0,0 +1,309 @@
+"""Tests for the shared_memory_cache module."""
+import multiprocessing
+import os
+import struct
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from agent_identity_python_sdk.model.stscredential import STSCredential
+from agent_identity_python_sdk.utils import cache
+from agent_identity_python_sdk.utils.cache import get_cached_credential, set_cache_backend, store_credential_in_cache
+from agent_identity_python_sdk.utils.shared_memory_cache import SharedMemoryCacheBackend
+
+
+def _sts_credential(access_key_id="test-access-key-id"):
+    return STSCredential(
+        access_key_id=access_key_id,
+        access_key_secret="test-access-key-secret",
+        security_token="test-security-token",
+        expiration="2099-12-31T23:59:59Z"
+    )
+
+
+def _store_in_child(path, key, access_key_id):
+    backend = SharedMemoryCacheBackend(path, slot_count=64)
+    backend.set(key, _sts_credential(access_key_id), 60)
+    backend.close()
+
+
+def _write_in_child(path, worker, rounds):
+    backend = SharedMemoryCacheBackend(path, slot_count=64)
+    for i in range(rounds):
+        backend.set("shared-key", {"worker": worker, "round": i, "padding": "x" * (i % 200)}, 60)
+    backend.close()
+
+
+def _compute_in_child(path, marker_dir, worker):
+    def compute():
+        open(os.path.join(marker_dir, str(worker)), "w").close()
+        time.sleep(0.2)
+        return f"value-{worker}", 60
+
+    backend = SharedMemoryCacheBackend(path, slot_count=64)
+    backend.get_or_compute("key", compute)
+    backend.close()
+
+
+class TestSharedMemoryCacheBackend:
+    """Test cases for the SharedMemoryCacheBackend class."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.test_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.test_dir, "cache")
+        self.backend = SharedMemoryCacheBackend(self.path, slot_count=64)
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        self.backend.close()
+        os.unlink(self.path)
+        os.rmdir(self.test_dir)
+
+    def test_set_and_get(self):
+        """Test storing and reading strings and STS credentials."""
+        credential = _sts_credential()
+        self.backend.set("token", "value", 60)
+        self.backend.set("sts", credential, 60)
+
+        assert self.backend.get("token") == "value"
+        assert self.backend.get("sts") == credential
+        assert self.backend.get("missing") is None
+
+    def test_overwrite(self):
+        """Test that setting a key again replaces its value."""
+        self.backend.set("key", "old", 60)
+        self.backend.set("key", "new", 60)
+
+        assert self.backend.get("key") == "new"
+
+    def test_entry_expires(self):
+        """Test that entries expire after their time to live."""
+        self.backend.set("key", "value", 0.05)
+        time.sleep(0.1)
+
+        assert self.backend.get("key") is None
+
+    def test_delete_and_clear(self):
+        """Test removing single entries and all entries of a namespace."""
+        api_keys = self.backend.namespace("apikey")
+        tokens = self.backend.namespace("oauth2")
+        api_keys.set("a", "1", 60)
+        api_keys.set("b", "2", 60)
+        tokens.set("a", "token", 60)
+
+        api_keys.delete("a")
+        assert api_keys.get("a") is None
+        assert api_keys.get("b") == "2"
+
+        api_keys.clear()
+        assert api_keys.get("b") is None
+        assert tokens.get("a") == "token"
+
+    def test_oversized_entry_is_not_cached(self):
+        """Test that an entry larger than a slot is skipped."""
+        self.backend.set("key", "x" * 10000, 60)
+
+        assert self.backend.get("key") is None
+
+    def test_full_cache_evicts_entries(self):
+        """Test that entries keep being stored when there are more keys than slots."""
+        for i in range(200):
+            self.backend.set(f"key-{i}", f"value-{i}", 60 + i)
+
+        assert self.backend.get("key-199") == "value-199"
+        stored = sum(self.backend.get(f"key-{i}") is not None for i in range(200))
+        assert stored <= 64
+
+    def test_claim_refresh(self):
+        """Test that a single caller claims the refresh of an entry due for it."""
+        self.backend.set("due", "value", 60, refresh_after=0)
+        self.backend.set("fresh", "value", 60, refresh_after=30)
+        self.backend.set("never", "value", 60)
+
+        assert self.backend.claim_refresh("due") is True
+        assert self.backend.claim_refresh("due") is False
+        assert self.backend.claim_refresh("fresh") is False
+        assert self.backend.claim_refresh("never") is False
+        assert self.backend.get("due") == "value"
+
+        self.backend.release_refresh("due")
+        assert self.backend.claim_refresh("due") is True
+
+    def test_get_or_compute_computes_once(self):
+        """Test that concurrent callers missing the same key compute it once."""
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.05)
+            return "value", 60
+
+        threads = [threading.Thread(target=lambda: results.append(self.backend.get_or_compute("key", compute)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 5
+        assert len(calls) == 1
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_get_or_compute_computes_once_across_processes(self):
+        """Test that processes missing the same key compute it once."""
+        marker_dir = tempfile.mkdtemp()
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_compute_in_child, args=(self.path, marker_dir, worker))
+                     for worker in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(10)
+            assert process.exitcode == 0
+
+        markers = os.listdir(marker_dir)
+        assert len(markers) == 1
+        assert self.backend.get("key") == f"value-{markers[0]}"
+        os.unlink(os.path.join(marker_dir, markers[0]))
+        os.rmdir(marker_dir)
+
+    def test_file_does_not_reveal_keys(self):
+        """Test that slots hold a digest rather than the tokens in the cache keys."""
+        backend = self.backend.namespace("workload")
+        backend.set("workload-name:jwt:secret-user-token", "value", 60)
+
+        assert backend.get("workload-name:jwt:secret-user-token") == "value"
+        with open(self.path, "rb") as f:
+            assert b"secret-user-token" not in f.read()
+
+        backend.clear()
+        assert backend.get("workload-name:jwt:secret-user-token") is None
+
+    def test_file_is_private(self):
+        """Test that the backing file is only accessible by its owner."""
+        assert os.stat(self.path).st_mode & 0o777 == 0o600
+
+    @pytest.mark.skipif(os.name != "posix", reason="requires POSIX permissions")
+    def test_file_accessible_by_others_rejected(self):
+        """Test that a backing file other users can read or write is refused."""
+        path = os.path.join(self.test_dir, "shared")
+        with open(path, "wb"):
+            pass
+        os.chmod(path, 0o644)
+        try:
+            with pytest.raises(PermissionError):
+                SharedMemoryCacheBackend(path, slot_count=64)
+        finally:
+            os.unlink(path)
+
+    @pytest.mark.skipif(not hasattr(os, "O_NOFOLLOW"), reason="requires O_NOFOLLOW")
+    def test_symlink_rejected(self):
+        """Test that a symbolic link planted at the path is not followed."""
+        link = os.path.join(self.test_dir, "link")
+        os.symlink(self.path, link)
+        try:
+            with pytest.raises(OSError):
+                SharedMemoryCacheBackend(link, slot_count=64)
+        finally:
+            os.unlink(link)
+
+    @pytest.mark.skipif(os.name != "posix", reason="requires POSIX permissions")
+    def test_default_path_is_in_private_directory(self):
+        """Test that the default backing file is created in a directory only its owner can access."""
+        with patch.dict(os.environ, {"XDG_RUNTIME_DIR": ""}), \
+                patch("agent_identity_python_sdk.utils.shared_memory_cache.tempfile.gettempdir",
+                      return_value=self.test_dir):
+            backend = SharedMemoryCacheBackend(slot_count=64)
+        directory = os.path.dirname(backend._region.path)
+        try:
+            assert os.path.dirname(directory) == self.test_dir
+            assert os.stat(directory).st_mode & 0o777 == 0o700
+        finally:
+            backend.close()
+            os.unlink(backend._region.path)
+            os.rmdir(directory)
+
+    @pytest.mark.skipif(os.name != "posix", reason="requires POSIX permissions")
+    def test_default_directory_of_other_permissions_rejected(self):
+        """Test that a default directory other users can access is refused."""
+        directory = os.path.join(self.test_dir, f"agentidentity-{os.getuid()}")
+        os.mkdir(directory, 0o777)
+        os.chmod(directory, 0o777)
+        try:
+            with patch.dict(os.environ, {"XDG_RUNTIME_DIR": ""}), \
+                    patch("agent_identity_python_sdk.utils.shared_memory_cache.tempfile.gettempdir",
+                          return_value=self.test_dir):
+                with pytest.raises(PermissionError):
+                    SharedMemoryCacheBackend(slot_count=64)
+        finally:
+            os.rmdir(directory)
+
+    def test_slot_abandoned_mid_write_recovered(self):
+        """Test that a slot left with an odd sequence number by a crashed writer is cleared, not busy forever."""
+        self.backend.set("key", "value", 60)
+        index = self.backend._scan("key")[0].index
+        offset = self.backend._region.slot_offset(index)
+        seq = struct.unpack_from("<Q", self.backend._region.mm, offset)[0]
+        # A writer died after marking the slot as being written
+        struct.pack_into("<Q", self.backend._region.mm, offset, seq + 1)
+
+        assert self.backend.get("key") is None
+        self.backend.set("key", "new-value", 60)
+        assert self.backend.get("key") == "new-value"
+        assert struct.unpack_from("<Q", self.backend._region.mm, offset)[0] % 2 == 0
+
+    def test_mismatched_layout_rejected(self):
+        """Test that opening a file with a different slot layout fails."""
+        with pytest.raises(ValueError):
+            SharedMemoryCacheBackend(self.path, slot_count=128)
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_visible_to_other_processes(self):
+        """Test that an entry stored by another process is visible immediately."""
+        context = multiprocessing.get_context("fork")
+        process = context.Process(target=_store_in_child, args=(self.path, "sts", "child-access-key-id"))
+        process.start()
+        process.join(10)
+
+        assert process.exitcode == 0
+        assert self.backend.get("sts").access_key_id == "child-access-key-id"
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_concurrent_writers_never_expose_partial_entries(self):
+        """Test that readers only see complete entries while several processes write the same key."""
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=_write_in_child, args=(self.path, worker, 300)) for worker in range(3)]
+        for process in processes:
+            process.start()
+
+        while any(process.is_alive() for process in processes):
+            value = self.backend.get("shared-key")
+            if value is not None:
+                assert set(value) == {"worker", "round", "padding"}
+                assert value["padding"] == "x" * (value["round"] % 200)
+        for process in processes:
+            process.join(10)
+            assert process.exitcode == 0
+
+        final = self.backend.get("shared-key")
+        assert final is not None and final["round"] == 299
+        assert len(self.backend._scan("shared-key")) == 1
+
+    def test_drop_in_for_credential_cache(self):
+        """Test that the backend can be used behind store_credential_in_cache/get_cached_credential."""
+        saved = cache._sts_cache, cache._workload_access_token_cache, cache._api_key_cache, cache._oauth2_token_cache
+        try:
+            set_cache_backend(self.backend)
+            credential = _sts_credential()
+            store_credential_in_cache("sts-key", credential)
+
+            assert get_cached_credential("sts-key") == credential
+            assert self.backend.namespace("sts").get("sts-key").to_sts_credential() == credential
+        finally:
+            (cache._sts_cache, cache._workload_access_token_cache,
+             cache._api_key_cache, cache._oauth2_token_cache) = saved
@@ -0,0 +1,140 @@
+"""Tests for the singleflight module."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from agent_identity_python_sdk.utils.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for the SingleFlight class."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_fetch(self):
+        """Test that concurrent callers for the same key share a single fetch."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "value"
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(20)))
+
+        assert results == ["value"] * 20
+        assert calls == 1
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_fetch_independently(self):
+        """Test that different keys are not deduplicated."""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key
+
+        results = await asyncio.gather(flight.do("a", lambda: fetch("a")), flight.do("b", lambda: fetch("b")))
+
+        assert results == ["a", "b"]
+        assert sorted(calls) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_sequential_calls_fetch_again(self):
+        """Test that a completed fetch is not reused by later callers."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("key", fetch) == 1
+        assert await flight.do("key", fetch) == 2
+
+    @pytest.mark.asyncio
+    async def test_exception_propagates_to_all_callers(self):
+        """Test that a failed fetch raises in every waiting caller."""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.02)
+            raise ValueError("backend error")
+
+        results = await asyncio.gather(*(flight.do("key", fetch) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_follower_does_not_cancel_fetch(self):
+        """Test that cancelling a waiting caller leaves the shared fetch running."""
+        flight = SingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+
+        assert await leader == "value"
+        assert follower.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_hands_over_fetch(self):
+        """Test that a waiting caller retries when the leading caller is cancelled."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "value"
+
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await follower == "value"
+        assert calls == 2
+
+    def test_callers_on_different_event_loops_share_fetch(self):
+        """Test deduplication across threads that each run their own event loop."""
+        flight = SingleFlight()
+        calls = 0
+        calls_lock = threading.Lock()
+        results = []
+
+        async def fetch():
+            nonlocal calls
+            with calls_lock:
+                calls += 1
+            await asyncio.sleep(0.1)
+            return "value"
+
+        def worker():
+            results.append(asyncio.run(flight.do("key", fetch)))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+
+        assert results == ["value"] * 8
+        assert calls == 1
@@ -0,0 +1,48 @@
+"""Tests for the token module."""
+import base64
+import json
+
+from agent_identity_python_sdk.utils.token import decode_jwt_payload, get_jwt_expiration
+
+
+def _make_jwt(claims) -> str:
+    """Build an unsigned JWT carrying the given claims."""
+    def encode(data) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+    return f"{encode({'alg': 'none'})}.{encode(claims)}.signature"
+
+
+class TestTokenModule:
+    """Test cases for the token module."""
+
+    def test_decode_jwt_payload(self):
+        """Test decoding the claims of a well-formed JWT."""
+        token = _make_jwt({"sub": "user-123", "exp": 1700000000})
+        assert decode_jwt_payload(token) == {"sub": "user-123", "exp": 1700000000}
+
+    def test_decode_jwt_payload_not_a_jwt(self):
+        """Test that opaque tokens are not decoded."""
+        assert decode_jwt_payload("opaque-token") is None
+        assert decode_jwt_payload("a.b") is None
+
+    def test_decode_jwt_payload_invalid_payload(self):
+        """Test that malformed payloads are not decoded."""
+        assert decode_jwt_payload("header.!!!.signature") is None
+        assert decode_jwt_payload("header.bm90LWpzb24.signature") is None
+
+    def test_decode_jwt_payload_non_object_claims(self):
+        """Test that payloads which are not JSON objects are rejected."""
+        token = _make_jwt(["not", "an", "object"])
+        assert decode_jwt_payload(token) is None
+
+    def test_get_jwt_expiration(self):
+        """Test reading the exp claim."""
+        token = _make_jwt({"exp": 1700000000})
+        assert get_jwt_expiration(token) == 1700000000.0
+
+    def test_get_jwt_expiration_missing_or_invalid_claim(self):
+        """Test tokens without a usable exp claim."""
+        assert get_jwt_expiration(_make_jwt({"sub": "user-123"})) is None
+        assert get_jwt_expiration(_make_jwt({"exp": "tomorrow"})) is None
+        assert get_jwt_expiration(_make_jwt({"exp": True})) is None
+        assert get_jwt_expiration("opaque-token") is None
@@ -0,0 +1,166 @@
+"""Tests for the tracing module."""
+import contextvars
+import os
+from contextlib import contextmanager
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from agent_identity_python_sdk.context import AgentIdentityContext
+from agent_identity_python_sdk.core.decorators import requires_access_token
+from agent_identity_python_sdk.core.identity import IdentityClient
+from agent_identity_python_sdk.utils.tracing import (
+    OpenTelemetryTracer,
+    Span,
+    Tracer,
+    get_tracer,
+    set_tracer,
+    start_span
+)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class _FakeSpan:
+    """Span recording its attributes, parent and exception."""
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.exception = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+
+class _FakeOpenTelemetryTracer:
+    """Stand-in for an OpenTelemetry tracer, tracking the current span in a context variable like the real API."""
+
+    def __init__(self):
+        self.spans = []
+
+    @contextmanager
+    def start_as_current_span(self, name, attributes=None):
+        span = _FakeSpan(name, dict(attributes or {}), _current_span.get())
+        self.spans.append(span)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.exception = e
+            raise
+        finally:
+            _current_span.reset(token)
+
+    def span(self, name):
+        return next(span for span in self.spans if span.name == name)
+
+
+class TestTracerInterface:
+    """Test cases for the Tracer and Span base classes."""
+
+    def test_are_abstract(self):
+        """Test that tracers and spans must implement their methods."""
+        with pytest.raises(TypeError):
+            Tracer()
+        with pytest.raises(TypeError):
+            Span()
+
+    def test_noop_span_ignores_attributes(self):
+        """Test that the span used without a tracer accepts attributes."""
+        with start_span("agentidentity.test") as span:
+            span.set_attribute("key", "value")
+
+
+class TestTracing:
+    """Test cases for the spans emitted by the SDK."""
+
+    def setup_method(self):
+        """Set up test fixtures before each test method."""
+        self.tracer = _FakeOpenTelemetryTracer()
+        set_tracer(OpenTelemetryTracer(self.tracer))
+
+    def teardown_method(self):
+        """Clean up after each test method."""
+        set_tracer(None)
+        AgentIdentityContext.clear()
+
+    def test_disabled_tracing_is_no_op(self):
+        """Test that spans are no-ops without a tracer."""
+        set_tracer(None)
+        assert get_tracer() is None
+
+        with start_span("stage", {"key": "value"}) as span:
+            span.set_attribute("key", "value")
+
+        assert self.tracer.spans == []
+
+    def test_exceptions_are_recorded(self):
+        """Test that exceptions raised in a span are recorded by the tracer."""
+        with pytest.raises(ValueError):
+            with start_span("stage"):
+                raise ValueError("failed")
+
+        assert isinstance(self.tracer.span("stage").exception, ValueError)
+
+    def test_sync_decorator_spans_nest_under_caller_span(self):
+        """Test that the stages of a synchronous decorated call nest under the caller's span."""
+        mock_identity_client = Mock()
+        mock_identity_client.get_sts_credential_client = AsyncMock(return_value=Mock())
+        mock_identity_client.get_token = AsyncMock(return_value="access-token")
+        AgentIdentityContext.set_workload_access_token("workload-token")
+
+        @requires_access_token(credential_provider_name="test-provider")
+        def tool(access_token):
+            return access_token
+
+        with patch('agent_identity_python_sdk.core.decorators.get_identity_client', return_value=mock_identity_client), \
+                patch('agent_identity_python_sdk.core.decorators._get_access_token_cache_key', return_value=None):
+            with self.tracer.start_as_current_span("caller") as caller:
+                assert tool() == "access-token"
+
+        root = self.tracer.span("agentidentity.requires_access_token")
+        assert root.parent is caller
+        assert root.attributes["agentidentity.credential_provider_name"] == "test-provider"
+        assert self.tracer.span("agentidentity.context_lookup").parent is root
+        workload = self.tracer.span("agentidentity.workload_access_token")
+        assert workload.parent is root
+        assert workload.attributes["agentidentity.from_context"] is True
+
+    @pytest.mark.asyncio
+    async def test_identity_client_stages(self):
+        """Test the spans of the STS credential client, GetResourceOAuth2Token and polling stages."""
+        with patch.dict(os.environ, {"AGENT_IDENTITY_USE_STS": "false"}), \
+                patch("agent_identity_python_sdk.core.identity.CredentialClient"), \
+                patch("agent_identity_python_sdk.core.identity.ControlClient"), \
+                patch("agent_identity_python_sdk.core.identity.DataClient"):
+            client = IdentityClient("cn-beijing")
+        client.data_client.get_resource_oauth2_token_async = AsyncMock(side_effect=[
+            Mock(body=Mock(access_token=None, authorization_url="https://auth", session_uri=None)),
+            Mock(body=Mock(access_token=None)),
+            Mock(body=Mock(access_token="access-token")),
+        ])
+        client.poll_for_oauth2_token = _with_delay(client.poll_for_oauth2_token, 0.01)
+
+        with patch("agent_identity_python_sdk.core.identity._get_cached_compact_credential", return_value=Mock()), \
+                patch("agent_identity_python_sdk.core.identity.claim_credential_refresh", return_value=False), \
+                patch.object(IdentityClient, "_get_credential_client", return_value=Mock()):
+            await client.get_sts_credential_client("workload-token", None, None)
+
+        token = await client.get_token(credential_provider_name="test-provider", workload_identity_token="token",
+                                       auth_flow="USER_FEDERATION")
+
+        assert token == "access-token"
+        assert self.tracer.span("agentidentity.sts_credential_client").attributes["agentidentity.cache_hit"] is True
+        request = self.tracer.span("agentidentity.get_resource_oauth2_token")
+        assert request.attributes["agentidentity.credential_provider_name"] == "test-provider"
+        assert request.attributes["agentidentity.authorization_required"] is True
+        poll = self.tracer.span("agentidentity.poll_oauth2_token")
+        assert poll.attributes["agentidentity.poll_attempts"] == 2
+
+
+def _with_delay(poll, delay_sec):
+    async def wrapper(request, **kwargs):
+        return await poll(request, delay_sec=delay_sec, **kwargs)
+    return wrapper